@@ -0,0 +1,391 @@
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import mysql.connector
+
+from App.db import get_pool
+
+# ---------------------------------------------------------
+# Asynchronous, batched audit log
+# ---------------------------------------------------------
+# Write handlers call record_audit() after committing their change. The
+# record (with the time of the action) goes onto an in-process queue and the
+# request returns; a background thread drains the queue and writes the
+# records to audit_logs in multi-row INSERTs of up to AUDIT_BATCH_SIZE rows,
+# at least every AUDIT_FLUSH_INTERVAL seconds.
+#
+# Nothing is dropped when the database cannot take them: a batch that fails
+# to insert, or a record that does not fit in a full queue, is appended to
+# AUDIT_FALLBACK_FILE (one JSON object per line). The writer replays the file
+# into audit_logs once inserts succeed again, trying at most every
+# AUDIT_RETRY_INTERVAL seconds while they fail; whatever a replay cannot write
+# goes back to the file. A replay file left behind by a process that stopped
+# mid-replay is folded back into the fallback file by the next writer. At
+# interpreter exit the queue is flushed (to the database, or else to the file).
+#
+# A batch the database refuses for its data (not for being unreachable) is
+# retried row by row; rows refused on their own, and lines of the fallback
+# file that are not valid JSON, go to <AUDIT_FALLBACK_FILE>.rejected so they
+# never hold back the records behind them.
+#
+# AUDIT_ASYNC=0 writes each record synchronously instead (still after the
+# handler's commit, on its own pooled connection).
+
+_BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+AUDIT_CONFIG = {
+    "async": os.getenv("AUDIT_ASYNC", "1") not in ("0", "false", "no", ""),
+    "batch_size": int(os.getenv("AUDIT_BATCH_SIZE", "200")),
+    # seconds a record may wait in the queue
+    "flush_interval": float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0")),
+    "queue_size": int(os.getenv("AUDIT_QUEUE_SIZE", "10000")),
+    # seconds between attempts to replay the fallback file while the database fails
+    "retry_interval": float(os.getenv("AUDIT_RETRY_INTERVAL", "10")),
+    "fallback_file": os.getenv("AUDIT_FALLBACK_FILE", os.path.join(_BASE_DIR, "logs", "audit_fallback.jsonl")),
+}
+
+_COLUMNS = ("student_id", "action_type", "table_name", "record_id", "action_timestamp")
+_INSERT_SQL = f"INSERT INTO audit_logs ({', '.join(_COLUMNS)}) VALUES ({', '.join(['%s'] * len(_COLUMNS))})"
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+_STOP = object()
+# a replay file untouched for this long belongs to a process that is gone
+_REPLAY_STALE_AFTER = 300.0
+
+
+class AuditWriter:
+    """Queue + background thread writing audit records in batches."""
+
+    def __init__(self, batch_size=200, flush_interval=1.0, queue_size=10000, fallback_file=None,
+                 retry_interval=10.0):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self._retry_at = 0.0
+        self._adopt_at = 0.0
+        self.fallback_file = fallback_file
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "queued": 0,
+            "written": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "rejected": 0,
+            "errors": 0,
+        }
+        self._fallback_pending = bool(fallback_file and os.path.exists(fallback_file))
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            self._stats[name] += n
+
+    # ---------- producer side ----------
+    def submit(self, record):
+        """Queue one record (tuple in _COLUMNS order); spill to the file when the queue is full."""
+        try:
+            self._queue.put_nowait(record)
+            self._count("queued")
+        except queue.Full:
+            self._spill([record])
+
+    # ---------- writer thread ----------
+    def _run(self):
+        self._adopt_leftovers()
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            # an unexpected error (e.g. the disk holding the fallback file)
+            # must not end the thread: later records would only pile up
+            try:
+                if batch:
+                    if self._flush(batch) and self._fallback_pending:
+                        self._replay()
+                elif time.monotonic() >= self._adopt_at:
+                    self._adopt_leftovers()
+                elif self._fallback_pending and time.monotonic() >= self._retry_at:
+                    self._replay()
+            except Exception:
+                self._count("errors")
+                self._retry_at = time.monotonic() + self.retry_interval
+
+    def _flush(self, batch):
+        """Write `batch`; True when the database took it (rows refused on their own aside)."""
+        written, rejected, unwritten = _write_batch(batch)
+        if written:
+            self._count("written", written)
+            self._count("batches")
+        if rejected:
+            self._reject(rejected)
+        if unwritten:
+            self._count("failed_batches")
+            self._retry_at = time.monotonic() + self.retry_interval
+            self._spill(unwritten)
+            return False
+        return True
+
+    def close(self, timeout=10.0):
+        """Stop the thread after it has written everything queued so far."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        # whatever the thread could not reach goes to the fallback file
+        rest = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                rest.append(item)
+        if rest:
+            self._spill(rest)
+
+    # ---------- fallback file ----------
+    def _append_lines(self, lines):
+        with self._file_lock:
+            os.makedirs(os.path.dirname(self.fallback_file) or ".", exist_ok=True)
+            with open(self.fallback_file, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+            self._fallback_pending = True
+
+    def _spill(self, records):
+        if not self.fallback_file:
+            return
+        self._append_lines(_dump(rec) for rec in records)
+        self._count("spilled", len(records))
+
+    def _replay(self):
+        """Move the records of the fallback file into audit_logs."""
+        # renamed per process, so two workers never replay the same records
+        replaying = f"{self.fallback_file}.{os.getpid()}.replay"
+        with self._file_lock:
+            if not os.path.exists(self.fallback_file):
+                self._fallback_pending = False
+                return
+            os.replace(self.fallback_file, replaying)
+            self._fallback_pending = False
+
+        records, bad_lines = [], []
+        with open(replaying, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                    records.append(tuple(data.get(c) for c in _COLUMNS))
+                except (ValueError, AttributeError):
+                    # e.g. a line cut short by a crash while it was appended
+                    bad_lines.append(line if line.endswith("\n") else line + "\n")
+        if bad_lines:
+            self._reject_lines(bad_lines)
+
+        for start in range(0, len(records), self.batch_size):
+            written, rejected, unwritten = _write_batch(records[start:start + self.batch_size])
+            self._count("replayed", written)
+            if rejected:
+                self._reject(rejected)
+            if unwritten:
+                # the rest goes back to the fallback file, where a restarted
+                # process finds it too
+                self._retry_at = time.monotonic() + self.retry_interval
+                self._append_lines(_dump(rec) for rec in unwritten + records[start + self.batch_size:])
+                break
+            # tells the other workers this replay is still in progress
+            os.utime(replaying)
+        os.remove(replaying)
+
+    def _reject(self, records):
+        self._reject_lines(_dump(rec) for rec in records)
+
+    def _reject_lines(self, lines):
+        """Set aside lines that can never be written (kept for a manual look)."""
+        lines = list(lines)
+        self._count("rejected", len(lines))
+        if not self.fallback_file:
+            return
+        with self._file_lock:
+            with open(self.fallback_file + ".rejected", "a", encoding="utf-8") as f:
+                f.writelines(lines)
+
+    def _adopt_leftovers(self):
+        """Fold replay files of processes that stopped mid-replay back into the fallback file."""
+        self._adopt_at = time.monotonic() + _REPLAY_STALE_AFTER
+        if not self.fallback_file:
+            return
+        own = f"{self.fallback_file}.{os.getpid()}.replay"
+        stale_before = time.time() - _REPLAY_STALE_AFTER
+        for path in glob.glob(glob.escape(self.fallback_file) + ".*.replay"):
+            claimed = f"{path}.{os.getpid()}.adopt"
+            try:
+                if path != own and os.path.getmtime(path) > stale_before:
+                    continue  # another worker is replaying it right now
+                os.replace(path, claimed)
+            except OSError:
+                continue  # replayed or adopted by another process meanwhile
+            with open(claimed, encoding="utf-8") as f:
+                lines = [line if line.endswith("\n") else line + "\n" for line in f if line.strip()]
+            if lines:
+                self._append_lines(lines)
+            os.remove(claimed)
+
+    def stats(self):
+        with self._stats_lock:
+            data = dict(self._stats)
+        data["pending"] = self._queue.qsize()
+        data["fallback_pending"] = self._fallback_pending
+        data["alive"] = self._thread.is_alive()
+        return data
+
+
+def _dump(record):
+    return json.dumps(dict(zip(_COLUMNS, record))) + "\n"
+
+
+def _insert(conn, records):
+    cur = conn.cursor()
+    try:
+        # mysql-connector sends an INSERT ... VALUES executemany as one multi-row statement
+        cur.executemany(_INSERT_SQL, records)
+    finally:
+        cur.close()
+    conn.commit()
+
+
+def _without_deleted_students(conn, records):
+    """`records` with the ids of students deleted since they were queued set to NULL."""
+    ids = sorted({r[0] for r in records if r[0] is not None})
+    existing = set()
+    if ids:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                f"SELECT student_id FROM students WHERE student_id IN ({', '.join(['%s'] * len(ids))})", ids
+            )
+            existing = {row[0] for row in cur.fetchall()}
+        finally:
+            cur.close()
+    return [r if r[0] is None or r[0] in existing else (None,) + tuple(r[1:]) for r in records]
+
+
+def _try_write(records):
+    """Insert `records` in one multi-row statement; the error, or None once written."""
+    pool = get_pool()
+    try:
+        conn = pool.acquire()
+    except Exception as e:
+        return e
+    try:
+        try:
+            _insert(conn, records)
+        except Exception as e:
+            if getattr(e, "errno", None) != 1452:  # not a foreign key failure
+                raise
+            # a student was deleted in the meantime (databases whose audit_logs
+            # still has the ON DELETE SET NULL foreign key to students)
+            conn.rollback()
+            _insert(conn, _without_deleted_students(conn, records))
+    except Exception as e:
+        pool.discard(conn)
+        return e
+    pool.release(conn)
+    return None
+
+
+def write_records(records):
+    """Insert `records` in one multi-row statement; False when the database refused them."""
+    return _try_write(list(records)) is None
+
+
+def _refuses_data(error):
+    """True when the database is up but will not take these rows (bad values, constraints)."""
+    return isinstance(error, (mysql.connector.DataError, mysql.connector.IntegrityError))
+
+
+def _write_batch(records):
+    """
+    Write `records`; returns (number written, records refused, records not
+    written because the database failed). A batch refused for its data is
+    retried row by row, so one bad row cannot hold back the others.
+    """
+    records = list(records)
+    error = _try_write(records)
+    if error is None:
+        return len(records), [], []
+    if not _refuses_data(error):
+        return 0, [], records
+    written, rejected = 0, []
+    for i, rec in enumerate(records):
+        error = _try_write([rec])
+        if error is None:
+            written += 1
+        elif _refuses_data(error):
+            rejected.append(rec)
+        else:
+            return written, rejected, records[i:]
+    return written, rejected, []
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer():
+    """Process-wide writer, started on first use and flushed at exit."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditWriter(
+                    batch_size=AUDIT_CONFIG["batch_size"],
+                    flush_interval=AUDIT_CONFIG["flush_interval"],
+                    queue_size=AUDIT_CONFIG["queue_size"],
+                    fallback_file=AUDIT_CONFIG["fallback_file"],
+                    retry_interval=AUDIT_CONFIG["retry_interval"],
+                )
+                atexit.register(_writer.close)
+    return _writer
+
+
+def record_audit(student_id, action_type, table_name, record_id):
+    """
+    Log a committed CREATE / UPDATE / DELETE on `table_name`. Returns at once;
+    the row reaches audit_logs in the writer's next batch.
+    """
+    record = (student_id, action_type, table_name, record_id, datetime.now().strftime(_TIME_FORMAT))
+    if not AUDIT_CONFIG["async"]:
+        if not write_records([record]):
+            get_audit_writer()._spill([record])
+        return
+    get_audit_writer().submit(record)
+
+
+def get_audit_stats():
+    """
+    Returns audit writer metrics (queued, written, batches, spilled, replayed...).
+    """
+    return get_audit_writer().stats()
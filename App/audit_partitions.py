@@ -0,0 +1,183 @@
+import calendar
+import os
+from datetime import datetime, timezone
+
+# ---------------------------------------------------------
+# audit_logs partitions: layout, migration and retention
+# ---------------------------------------------------------
+# audit_logs is RANGE-partitioned by month on UNIX_TIMESTAMP(action_timestamp):
+#
+#   p202610  VALUES LESS THAN (<2026-11-01 00:00 UTC>)   rows of October 2026
+#   p202611  VALUES LESS THAN (<2026-12-01 00:00 UTC>)
+#   ...
+#   pmax     VALUES LESS THAN MAXVALUE                   always kept empty
+#
+# (the first partition also holds everything older than its month). MySQL
+# requires the partitioning column in every unique key, so the primary key
+# is (log_id, action_timestamp), and partitioned InnoDB tables cannot have
+# foreign keys, so student_id no longer references students.
+#
+# maintain_audit_partitions() keeps AUDIT_PARTITIONS_AHEAD empty months in
+# front of the current one (splitting an empty pmax is a metadata change)
+# and removes months older than AUDIT_RETENTION_MONTHS: with AUDIT_ARCHIVE
+# the partition is first swapped into its own table audit_logs_archive_<p>
+# (EXCHANGE PARTITION), then dropped. Both are O(1) whatever the number of
+# rows. Run it from cron through scripts/audit_maintenance.py; the loader
+# runs it too. Databases created before partitioning are converted once.
+
+AUDIT_PARTITION_CONFIG = {
+    # months of audit history kept in audit_logs (0 = keep everything)
+    "retention_months": int(os.getenv("AUDIT_RETENTION_MONTHS", "24")),
+    "ahead": int(os.getenv("AUDIT_PARTITIONS_AHEAD", "3")),
+    # move expired months to audit_logs_archive_<partition> instead of deleting them
+    "archive": os.getenv("AUDIT_ARCHIVE", "1") not in ("0", "false", "no", ""),
+}
+
+AUDIT_TABLE = "audit_logs"
+ARCHIVE_PREFIX = "audit_logs_archive_"
+
+# index name -> columns, as declared in SQL/database.sql
+AUDIT_INDEXES = {
+    "idx_audit_record": "table_name, record_id, action_timestamp",
+    "idx_audit_student_time": "student_id, action_timestamp",
+    "idx_audit_time": "action_timestamp",
+}
+
+
+def _add_months(year, month, n):
+    index = year * 12 + (month - 1) + n
+    return index // 12, index % 12 + 1
+
+
+def _month_boundary(year, month):
+    """Epoch seconds of the first instant of year-month (UTC)."""
+    return calendar.timegm((year, month, 1, 0, 0, 0))
+
+
+def partition_name(year, month):
+    return f"p{year:04d}{month:02d}"
+
+
+def list_partitions(cur):
+    """[(name, upper bound or None for MAXVALUE)] in order; [] when not partitioned."""
+    cur.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (AUDIT_TABLE,))
+    return [
+        (name, None if desc in (None, "MAXVALUE") else int(desc))
+        for name, desc in cur.fetchall()
+    ]
+
+
+def _run(cur, sql, actions, dry_run):
+    actions.append(" ".join(sql.split()))
+    if not dry_run:
+        cur.execute(sql)
+
+
+def _convert(cur, actions, dry_run):
+    """Turn an unpartitioned audit_logs (original schema) into the partitioned layout."""
+    cur.execute("""
+        SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS
+        WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (AUDIT_TABLE,))
+    for (fk,) in cur.fetchall():
+        _run(cur, f"ALTER TABLE {AUDIT_TABLE} DROP FOREIGN KEY `{fk}`", actions, dry_run)
+
+    _run(cur, f"UPDATE {AUDIT_TABLE} SET action_timestamp = CURRENT_TIMESTAMP "
+              f"WHERE action_timestamp IS NULL", actions, dry_run)
+    cur.execute("""
+        SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (AUDIT_TABLE,))
+    existing = {row[0] for row in cur.fetchall()}
+    changes = [
+        "MODIFY action_timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP",
+        "DROP PRIMARY KEY",
+        "ADD PRIMARY KEY (log_id, action_timestamp)",
+    ] + [f"ADD INDEX {name} ({cols})" for name, cols in AUDIT_INDEXES.items() if name not in existing]
+    if "student_id" in existing:
+        # implicit index of the dropped foreign key, covered by idx_audit_student_time
+        changes.append("DROP INDEX student_id")
+    _run(cur, f"ALTER TABLE {AUDIT_TABLE} " + ", ".join(changes), actions, dry_run)
+    _run(cur, f"ALTER TABLE {AUDIT_TABLE} PARTITION BY RANGE (UNIX_TIMESTAMP(action_timestamp)) "
+              f"(PARTITION pmax VALUES LESS THAN MAXVALUE)", actions, dry_run)
+
+
+def _add_future(cur, partitions, now, ahead, actions, dry_run):
+    """Split pmax so that the current month and `ahead` more have their own partition."""
+    highest = max((bound for _name, bound in partitions if bound is not None), default=None)
+    new = []
+    for n in range(ahead + 1):
+        year, month = _add_months(now.year, now.month, n)
+        bound = _month_boundary(*_add_months(year, month, 1))
+        if highest is None or bound > highest:
+            new.append(f"PARTITION {partition_name(year, month)} VALUES LESS THAN ({bound})")
+    if new:
+        new.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+        _run(cur, f"ALTER TABLE {AUDIT_TABLE} REORGANIZE PARTITION pmax INTO ({', '.join(new)})",
+             actions, dry_run)
+
+
+def _expire(cur, partitions, now, months, archive, actions, dry_run):
+    """Archive and/or drop the partitions whose rows are all older than `months` months."""
+    if months <= 0:
+        return
+    cutoff = _month_boundary(*_add_months(now.year, now.month, -months))
+    for name, bound in partitions:
+        if bound is None or bound > cutoff:
+            continue
+        if archive:
+            table = ARCHIVE_PREFIX + name
+            cur.execute("""
+                SELECT COUNT(*) FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            """, (table,))
+            if not cur.fetchone()[0]:
+                _run(cur, f"CREATE TABLE {table} LIKE {AUDIT_TABLE}", actions, dry_run)
+                _run(cur, f"ALTER TABLE {table} REMOVE PARTITIONING", actions, dry_run)
+                archived = False
+            else:
+                cur.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+                archived = bool(cur.fetchone()[0])
+            if not archived:
+                _run(cur, f"ALTER TABLE {AUDIT_TABLE} EXCHANGE PARTITION {name} WITH TABLE {table}",
+                     actions, dry_run)
+            else:
+                # an earlier run exchanged the month but stopped before the drop:
+                # exchanging again would move the archive back and drop it
+                cur.execute(f"SELECT EXISTS (SELECT 1 FROM {AUDIT_TABLE} PARTITION ({name}))")
+                if cur.fetchone()[0]:
+                    continue  # both hold rows: leave them for a manual look
+        _run(cur, f"ALTER TABLE {AUDIT_TABLE} DROP PARTITION {name}", actions, dry_run)
+
+
+def maintain_audit_partitions(conn, now=None, retention_months=None, archive=None, dry_run=False):
+    """
+    Convert audit_logs to the partitioned layout if needed, add the coming
+    months' partitions and expire old ones. Returns the DDL statements run
+    (or, with dry_run, that would run).
+    """
+    now = now or datetime.now(timezone.utc)
+    months = AUDIT_PARTITION_CONFIG["retention_months"] if retention_months is None else retention_months
+    archive = AUDIT_PARTITION_CONFIG["archive"] if archive is None else archive
+    actions = []
+    cur = conn.cursor()
+    try:
+        partitions = list_partitions(cur)
+        if not partitions:
+            _convert(cur, actions, dry_run)
+            if dry_run:
+                return actions
+            partitions = list_partitions(cur)
+        _add_future(cur, partitions, now, AUDIT_PARTITION_CONFIG["ahead"], actions, dry_run)
+        if not dry_run:
+            partitions = list_partitions(cur)
+        _expire(cur, partitions, now, months, archive, actions, dry_run)
+        conn.commit()
+    finally:
+        cur.close()
+    return actions
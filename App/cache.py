@@ -0,0 +1,282 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# ---------------------------------------------------------
+# Query result cache with table-version invalidation
+# ---------------------------------------------------------
+# Lookup queries (country lists, indicator lists, region lists, unit maps...)
+# return the same rows on almost every request. cached_query() keeps their
+# results in a process-local LRU with a TTL and, when QUERY_CACHE_URL points
+# at a Redis server, in a shared backend visible to every worker.
+#
+# Every cached query declares the tables it reads. Each table has a version
+# counter that is part of the cache key; write handlers call
+# bump_table_versions() after committing, so entries built from the old
+# version are never served again (they simply age out of the LRU).
+#
+# A bump also records when the table last changed. Together with the epoch
+# (when this set of counters started: process start, or first use of the
+# shared backend) these change stamps drive conditional GET (App/conditional.py).
+
+CACHE_CONFIG = {
+    # max number of result sets kept in this process
+    "max_entries": int(os.getenv("QUERY_CACHE_SIZE", "512")),
+    # seconds a cached result stays valid (0 disables caching)
+    "ttl": float(os.getenv("QUERY_CACHE_TTL", "300")),
+    # optional shared backend, e.g. redis://localhost:6379/0
+    "url": os.getenv("QUERY_CACHE_URL", ""),
+}
+
+_KEY_PREFIX = "wdi:qc:"
+
+
+def _connect_backend(url):
+    """Return a Redis client for `url`, or None when unavailable."""
+    if not url:
+        return None
+    try:
+        import redis
+    except ImportError:
+        return None
+    try:
+        client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        client.ping()
+        return client
+    except Exception:
+        return None
+
+
+class QueryCache:
+    """
+    Thread-safe LRU + TTL cache of query results, with per-table versions.
+
+    When a shared backend is configured the table versions live there too, so
+    a write in one worker invalidates the entries of every other worker.
+    """
+
+    def __init__(self, max_entries=512, ttl=300.0, backend=None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._changed = {}
+        self.epoch = time.time()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "backend_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "backend_errors": 0,
+        }
+
+    # ---------- table versions ----------
+    def versions(self, tables):
+        """Current version of each table in `tables` (same order)."""
+        tables = list(tables)
+        if not tables:
+            return ()
+        if self.backend is not None:
+            try:
+                raw = self.backend.mget([f"{_KEY_PREFIX}ver:{t}" for t in tables])
+                return tuple(int(v) if v is not None else 0 for v in raw)
+            except Exception:
+                self._count("backend_errors")
+        with self._lock:
+            return tuple(self._versions.get(t, 0) for t in tables)
+
+    def bump(self, *tables):
+        """Invalidate every cached result that depends on one of `tables`."""
+        tables = [t for t in tables if t]
+        if not tables:
+            return
+        now = time.time()
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+                self._changed[t] = now
+            self._stats["invalidations"] += len(tables)
+        if self.backend is not None:
+            try:
+                pipe = self.backend.pipeline()
+                for t in tables:
+                    pipe.incr(f"{_KEY_PREFIX}ver:{t}")
+                    pipe.set(f"{_KEY_PREFIX}ts:{t}", repr(now))
+                pipe.execute()
+            except Exception:
+                self._count("backend_errors")
+
+    def stamps(self, tables):
+        """
+        (epoch, versions, changed_at) of `tables`: changed_at is the time of
+        the latest bump of any of them, or the epoch if none was bumped since.
+        """
+        tables = list(tables)
+        if self.backend is not None:
+            try:
+                keys = [f"{_KEY_PREFIX}epoch"]
+                keys += [f"{_KEY_PREFIX}ver:{t}" for t in tables]
+                keys += [f"{_KEY_PREFIX}ts:{t}" for t in tables]
+                raw = self.backend.mget(keys)
+                if raw[0] is None:
+                    # first use (or the backend lost its data): start a new epoch
+                    self.backend.set(keys[0], repr(time.time()), nx=True)
+                    raw[0] = self.backend.get(keys[0])
+                epoch = float(raw[0])
+                n = len(tables)
+                versions = tuple(int(v) if v is not None else 0 for v in raw[1:1 + n])
+                changed = [float(v) for v in raw[1 + n:] if v is not None]
+                return epoch, versions, max(changed + [epoch])
+            except Exception:
+                self._count("backend_errors")
+        with self._lock:
+            versions = tuple(self._versions.get(t, 0) for t in tables)
+            changed = max([self._changed.get(t, self.epoch) for t in tables] + [self.epoch])
+            return self.epoch, versions, changed
+
+    # ---------- entries ----------
+    def make_key(self, sql, params, tables, dictionary=True, one=False):
+        # row shape is part of the key: the same SQL may be cached as dicts and as tuples
+        raw = repr((
+            " ".join(sql.split()), tuple(params or ()), tuple(tables), self.versions(tables),
+            bool(dictionary), bool(one),
+        ))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return (found, value)."""
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None:
+                if hit[1] > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return True, hit[0]
+                del self._entries[key]
+
+        if self.backend is not None:
+            try:
+                raw = self.backend.get(_KEY_PREFIX + key)
+            except Exception:
+                raw = None
+                self._count("backend_errors")
+            if raw is not None:
+                value = pickle.loads(raw)
+                self._store_local(key, value, self.ttl)
+                self._count("backend_hits")
+                return True, value
+
+        self._count("misses")
+        return False, None
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._store_local(key, value, ttl)
+        if self.backend is not None:
+            try:
+                self.backend.setex(_KEY_PREFIX + key, max(1, int(ttl)), pickle.dumps(value))
+            except Exception:
+                self._count("backend_errors")
+
+    def _store_local(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Snapshot of cache metrics, suitable for logging or a JSON endpoint."""
+        with self._lock:
+            data = dict(self._stats)
+            lookups = data["hits"] + data["backend_hits"] + data["misses"]
+            data["hit_ratio"] = round((data["hits"] + data["backend_hits"]) / lookups, 4) if lookups else 0.0
+            data["entries"] = len(self._entries)
+            data["max_entries"] = self.max_entries
+            data["ttl"] = self.ttl
+            data["backend"] = "redis" if self.backend is not None else None
+            data["table_versions"] = dict(self._versions)
+            return data
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Returns the process-wide query cache, creating it on first use.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryCache(
+                    CACHE_CONFIG["max_entries"],
+                    CACHE_CONFIG["ttl"],
+                    backend=_connect_backend(CACHE_CONFIG["url"]),
+                )
+    return _cache
+
+
+def get_cache_stats():
+    """
+    Returns the current cache metrics (hits, misses, evictions, versions...).
+    """
+    return get_cache().stats()
+
+
+def bump_table_versions(*tables):
+    """
+    Mark `tables` as changed. Call it after the write has been committed.
+    """
+    get_cache().bump(*tables)
+
+
+def cached_query(conn, sql, params=(), tables=(), ttl=None, one=False, dictionary=True, prepared=False):
+    """
+    Run `sql` on `conn` unless an up-to-date result is cached.
+
+    `tables` lists every table the query reads; the result is dropped as soon
+    as one of them is bumped. Returns fetchall() rows (or fetchone() with
+    one=True). Row dicts are copied so callers may modify them freely.
+    With prepared=True a miss runs through the connection's prepared-statement
+    cache (App/statements.py).
+    """
+    cache = get_cache()
+    key = cache.make_key(sql, params, tables, dictionary=dictionary, one=one)
+    found, value = cache.get(key)
+    if not found:
+        if prepared:
+            from App.statements import run_prepared
+            value = run_prepared(conn, sql, params, one=one, dictionary=dictionary)
+        else:
+            cur = conn.cursor(dictionary=dictionary)
+            try:
+                cur.execute(sql, params or ())
+                value = cur.fetchone() if one else cur.fetchall()
+            finally:
+                cur.close()
+        cache.set(key, value, ttl)
+
+    if one:
+        return dict(value) if isinstance(value, dict) else value
+    return [dict(r) if isinstance(r, dict) else r for r in value]
@@ -0,0 +1,69 @@
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from App import cache as query_cache
+from App.cache import QueryCache, cached_query
+
+COUNTRY_SQL = "SELECT country_id, country_name, country_code FROM countries ORDER BY country_name"
+COUNTRY_ROWS = [(1, "Albania", "ALB"), (2, "Brazil", "BRA")]
+
+
+class _StubCursor:
+    def __init__(self, conn, dictionary):
+        self.conn = conn
+        self.dictionary = dictionary
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        self.conn.executed += 1
+        self.rows = [
+            dict(zip(("country_id", "country_name", "country_code"), r)) if self.dictionary else r
+            for r in COUNTRY_ROWS
+        ]
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def close(self):
+        pass
+
+
+class _StubConnection:
+    def __init__(self):
+        self.executed = 0
+
+    def cursor(self, dictionary=False):
+        return _StubCursor(self, dictionary)
+
+
+def test_cached_query_keeps_dict_and_tuple_rows_apart():
+    query_cache._cache = QueryCache(max_entries=16, ttl=60)
+    conn = _StubConnection()
+    try:
+        as_dicts = cached_query(conn, COUNTRY_SQL, tables=("countries",))
+        as_tuples = cached_query(conn, COUNTRY_SQL, tables=("countries",), dictionary=False)
+        first_tuple = cached_query(conn, COUNTRY_SQL, tables=("countries",), dictionary=False, one=True)
+
+        assert as_dicts[0]["country_name"] == "Albania"
+        assert as_tuples[0][0] == 1
+        assert first_tuple == (1, "Albania", "ALB")
+        assert conn.executed == 3
+
+        # each shape is served from its own entry
+        assert cached_query(conn, COUNTRY_SQL, tables=("countries",))[1]["country_code"] == "BRA"
+        assert cached_query(conn, COUNTRY_SQL, tables=("countries",), dictionary=False)[1][2] == "BRA"
+        assert conn.executed == 3
+    finally:
+        query_cache._cache = None
+
+
+if __name__ == "__main__":
+    test_cached_query_keeps_dict_and_tuple_rows_apart()
+    print("SUCCESS: cached_query keys dict and tuple rows separately.")
@@ -0,0 +1,277 @@
+import os
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency: callers fall back to SQL
+    np = None
+
+from App.cache import get_cache
+from App.db import get_pool
+from App.domains import DOMAINS
+
+# ---------------------------------------------------------
+# In-process columnar copy of the fact tables (optional, needs NumPy)
+# ---------------------------------------------------------
+# Each fact table is held as four contiguous arrays of equal length:
+#
+#   country   int32    index into FactColumns.country_ids
+#   indicator int32    index into FactColumns.indicator_ids
+#   year      int32
+#   value     float64  NaN for NULL
+#
+# Dimensions are dictionary-encoded (sorted id arrays + per-country region
+# codes), so filters and group-bys are integer comparisons over whole
+# columns. A store is rebuilt when the fact table's or countries' version in
+# App/cache.py changes (the add/edit/delete handlers bump it) or after
+# COLUMNAR_TTL seconds, which covers writes made by other processes.
+#
+# Rebuilds run on a background thread with their own pooled connection, so
+# no request pays for loading a whole fact table. Until the new copy is
+# ready, reads after a bump fall back to SQL (the old copy is known to be
+# out of date) and reads after a TTL expiry keep using the old copy.
+
+COLUMNAR_CONFIG = {
+    "enabled": os.getenv("COLUMNAR_STORE", "1") not in ("0", "false", "no", ""),
+    "ttl": float(os.getenv("COLUMNAR_TTL", "300")),
+}
+
+_AGGREGATES = ("mean", "sum", "min", "max", "count")
+
+
+def is_available():
+    return np is not None and COLUMNAR_CONFIG["enabled"]
+
+
+def _decode(code, labels):
+    value = labels[code] if labels is not None else code
+    return value.item() if hasattr(value, "item") else value
+
+
+class FactColumns:
+    """Immutable columnar snapshot of one fact table."""
+
+    def __init__(self, domain, country, indicator, year, value,
+                 country_ids, indicator_ids, country_region, regions, versions):
+        self.domain = domain
+        self.country = country
+        self.indicator = indicator
+        self.year = year
+        self.value = value
+        self.country_ids = country_ids
+        self.indicator_ids = indicator_ids
+        self.country_region = country_region  # region code per country index (-1 = none)
+        self.regions = regions
+        self.versions = versions
+        self.built_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.value)
+
+    # ---------- encoding helpers ----------
+    @staticmethod
+    def _codes(ids, wanted):
+        """Positions of `wanted` ids in the sorted `ids` array (unknown ids dropped)."""
+        wanted = np.asarray([int(w) for w in wanted], dtype=ids.dtype)
+        if not len(ids):
+            return wanted[:0]
+        pos = np.minimum(np.searchsorted(ids, wanted), len(ids) - 1)
+        return pos[ids[pos] == wanted]
+
+    def _dimension(self, dim):
+        """(per-row codes, labels) of a group-by dimension; labels None = codes are values."""
+        if dim == "country":
+            return self.country, self.country_ids
+        if dim == "indicator":
+            return self.indicator, self.indicator_ids
+        if dim == "year":
+            return self.year, None
+        if dim == "region":
+            # code -1 (country without region) picks the trailing None
+            return self.country_region[self.country], np.array(self.regions + [None], dtype=object)
+        raise ValueError(f"unknown dimension: {dim}")
+
+    # ---------- filtering ----------
+    def mask(self, indicator_id=None, indicator_ids=None, year=None, year_min=None, year_max=None,
+             years=None, country_ids=None, regions=None, non_null=True):
+        """Boolean row mask for the given filters (all optional, combined with AND)."""
+        m = np.ones(len(self.value), dtype=bool)
+        if indicator_id is not None:
+            indicator_ids = [indicator_id]
+        if indicator_ids is not None:
+            m &= np.isin(self.indicator, self._codes(self.indicator_ids, indicator_ids))
+        if year is not None:
+            m &= self.year == int(year)
+        if year_min is not None:
+            m &= self.year >= int(year_min)
+        if year_max is not None:
+            m &= self.year <= int(year_max)
+        if years is not None:
+            m &= np.isin(self.year, np.asarray([int(y) for y in years]))
+        if country_ids is not None:
+            m &= np.isin(self.country, self._codes(self.country_ids, country_ids))
+        if regions is not None:
+            wanted = set(regions)
+            codes = [i for i, r in enumerate(self.regions) if r in wanted]
+            m &= np.isin(self.country_region[self.country], codes)
+        if non_null:
+            m &= ~np.isnan(self.value)
+        return m
+
+    # ---------- aggregation ----------
+    def aggregate(self, by=("indicator", "year"), agg="mean", **filters):
+        """
+        Group the filtered rows by `by` dimensions (country, indicator, year,
+        region) and reduce their values with `agg` (mean, sum, min, max, count).
+        Returns {key: value}, key being a tuple of ids/years/region names in
+        `by` order (a plain value when grouping by a single dimension).
+        """
+        if agg not in _AGGREGATES:
+            raise ValueError(f"unknown aggregate: {agg}")
+        m = self.mask(**filters)
+        if not m.any():
+            return {}
+        values = self.value[m]
+        dims = [self._dimension(d) for d in by]
+        keys = np.stack([codes[m] for codes, _labels in dims], axis=1)
+        uniq, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        counts = np.bincount(inverse, minlength=len(uniq))
+        if agg == "count":
+            result = counts.astype(np.float64)
+        elif agg in ("sum", "mean"):
+            result = np.bincount(inverse, weights=values, minlength=len(uniq))
+            if agg == "mean":
+                result = result / counts
+        else:
+            order = np.argsort(inverse, kind="stable")
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            ufunc = np.minimum if agg == "min" else np.maximum
+            result = ufunc.reduceat(values[order], starts)
+
+        out = {}
+        for row, val in zip(uniq, result):
+            key = tuple(_decode(code, labels) for code, (_codes, labels) in zip(row, dims))
+            out[key if len(key) > 1 else key[0]] = val.item()
+        return out
+
+    def pivot(self, rows="country", cols="year", agg="mean", **filters):
+        """
+        Aggregate into a dense 2-D array. Returns (row_keys, col_keys, matrix)
+        with NaN where a (row, col) pair has no data.
+        """
+        cells = self.aggregate(by=(rows, cols), agg=agg, **filters)
+        row_keys = sorted({k[0] for k in cells}, key=lambda v: (v is None, v))
+        col_keys = sorted({k[1] for k in cells}, key=lambda v: (v is None, v))
+        row_pos = {k: i for i, k in enumerate(row_keys)}
+        col_pos = {k: i for i, k in enumerate(col_keys)}
+        matrix = np.full((len(row_keys), len(col_keys)), np.nan)
+        for (r, c), v in cells.items():
+            matrix[row_pos[r], col_pos[c]] = v
+        return row_keys, col_keys, matrix
+
+
+# ---------------------------------------------------------
+# Building / refreshing
+# ---------------------------------------------------------
+_stores = {}
+_building = set()
+_store_lock = threading.Lock()
+
+
+def _build(conn, domain, versions):
+    d = DOMAINS[domain]
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT country_id, region FROM countries ORDER BY country_id")
+        country_rows = cur.fetchall()
+        cur.execute(f"SELECT {d['indicator_pk']} FROM {d['detail_table']} ORDER BY {d['indicator_pk']}")
+        indicator_ids = np.array([r[0] for r in cur.fetchall()], dtype=np.int64)
+        cur.execute(f"SELECT country_id, {d['indicator_pk']}, year, indicator_value FROM {d['fact_table']}")
+        fact_rows = cur.fetchall()
+    finally:
+        cur.close()
+
+    country_ids = np.array([r[0] for r in country_rows], dtype=np.int64)
+    regions = sorted({r[1] for r in country_rows if r[1]})
+    region_code = {r: i for i, r in enumerate(regions)}
+    country_region = np.array([region_code.get(r[1], -1) for r in country_rows], dtype=np.int32)
+
+    n = len(fact_rows)
+    raw_country = np.fromiter((r[0] for r in fact_rows), dtype=np.int64, count=n)
+    raw_indicator = np.fromiter((r[1] for r in fact_rows), dtype=np.int64, count=n)
+    year = np.fromiter((r[2] for r in fact_rows), dtype=np.int32, count=n)
+    value = np.fromiter((float(r[3]) if r[3] is not None else np.nan for r in fact_rows),
+                        dtype=np.float64, count=n)
+
+    return FactColumns(
+        domain,
+        np.searchsorted(country_ids, raw_country).astype(np.int32),
+        np.searchsorted(indicator_ids, raw_indicator).astype(np.int32),
+        year,
+        value,
+        country_ids,
+        indicator_ids,
+        country_region,
+        regions,
+        versions,
+    )
+
+
+def _rebuild(domain, versions):
+    try:
+        pool = get_pool()
+        conn = pool.acquire()
+        try:
+            store = _build(conn, domain, versions)
+        finally:
+            pool.release(conn)
+        with _store_lock:
+            _stores[domain] = store
+    except Exception:
+        pass  # the next read starts another attempt; SQL serves meanwhile
+    finally:
+        with _store_lock:
+            _building.discard(domain)
+
+
+def _start_rebuild(domain, versions):
+    with _store_lock:
+        if domain in _building:
+            return
+        _building.add(domain)
+    threading.Thread(
+        target=_rebuild, args=(domain, versions), name=f"columnar-{domain}", daemon=True
+    ).start()
+
+
+def get_store(conn, domain):
+    """
+    Columnar snapshot of `domain`'s fact table, or None when NumPy is missing,
+    the store is disabled or no up-to-date snapshot is built yet (callers then
+    run their SQL as before). Stale snapshots are rebuilt in the background,
+    on a pooled connection rather than `conn`.
+    """
+    if not is_available() or domain not in DOMAINS:
+        return None
+    tables = (DOMAINS[domain]["fact_table"], "countries")
+    versions = get_cache().versions(tables)
+    store = _stores.get(domain)
+    current = store is not None and store.versions == versions
+    if current and time.monotonic() - store.built_at < COLUMNAR_CONFIG["ttl"]:
+        return store
+
+    _start_rebuild(domain, versions)
+    # an expired TTL only guards against writes made elsewhere: keep serving meanwhile
+    return store if current else None
+
+
+def invalidate(domain=None):
+    """Drop the cached store of `domain` (or all of them)."""
+    with _store_lock:
+        if domain is None:
+            _stores.clear()
+        else:
+            _stores.pop(domain, None)
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+
+from App.cache import get_cache
+from App.domains import DOMAINS
+from App.snapshots import SNAPSHOT_TABLES
+
+# ---------------------------------------------------------
+# Conditional GET (ETag / Last-Modified) from table change stamps
+# ---------------------------------------------------------
+# A read view declares the tables its response is built from. Its ETag is a
+# hash of those tables' versions in App/cache.py (bumped by every write
+# handler after committing, and by the loader) plus who is asking, since
+# pages differ by role. Last-Modified is the time of the latest bump.
+#
+# When the client's If-None-Match / If-Modified-Since still matches, the
+# view is not called at all: the 304 is answered before any connection is
+# taken from the pool.
+#
+# Without a shared cache backend (QUERY_CACHE_URL) every worker has its own
+# counters and does not see writes made by the others or by the loader, so
+# validators also roll over every CONDITIONAL_LOCAL_WINDOW seconds; that
+# bounds how long a stale page can be confirmed, like the query cache TTL.
+
+CONDITIONAL_CONFIG = {
+    "enabled": os.getenv("CONDITIONAL_GET", "1") not in ("0", "false", "no", ""),
+    # seconds; 0 = never roll over (single-process deployments)
+    "local_window": float(os.getenv("CONDITIONAL_LOCAL_WINDOW", "60")),
+}
+
+# every table a page across domains can read
+ALL_DATA_TABLES = ("countries", "country_data_coverage") + tuple(
+    t for d in DOMAINS.values() for t in (d["fact_table"], d["detail_table"])
+) + tuple(SNAPSHOT_TABLES.values())
+
+
+def domain_tables(domain):
+    """Tables read by a domain's list page: fact, detail, countries (and snapshot rankings)."""
+    d = DOMAINS[domain]
+    tables = (d["fact_table"], d["detail_table"], "countries")
+    if domain in SNAPSHOT_TABLES:
+        tables += (SNAPSHOT_TABLES[domain],)
+    return tables
+
+
+def change_stamp(tables):
+    """(etag, last_modified) for a response built from `tables` for the current user."""
+    cache = get_cache()
+    epoch, versions, changed_at = cache.stamps(tables)
+    window = CONDITIONAL_CONFIG["local_window"]
+    bucket = None
+    if cache.backend is None and window > 0:
+        bucket = int(time.time() // window)
+        changed_at = max(changed_at, bucket * window)
+
+    identity = (session.get("student_id"), session.get("team_no"))
+    raw = repr((request.endpoint, tuple(tables), epoch, versions, bucket, identity))
+    etag = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:32]
+    return etag, datetime.fromtimestamp(int(changed_at), tz=timezone.utc)
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    if since is not None:
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified <= since
+    return False
+
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    # the browser must revalidate every time; shared caches must not store it
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Cookie")
+    return response
+
+
+def conditional(*tables):
+    """
+    View decorator: send ETag/Last-Modified derived from `tables`, and answer
+    304 Not Modified without calling the view when the client copy is current.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not CONDITIONAL_CONFIG["enabled"] or request.method not in ("GET", "HEAD") \
+                    or session.get("_flashes"):
+                # pending flash messages are part of the page
+                return view(*args, **kwargs)
+
+            etag, last_modified = change_stamp(tables)
+            if _not_modified(etag, last_modified):
+                return _set_validators(current_app.response_class(status=304), etag, last_modified)
+
+            response = make_response(view(*args, **kwargs))
+            # a view that touched the session (e.g. showed a flash) is not repeatable
+            if response.status_code == 200 and not session.modified:
+                _set_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
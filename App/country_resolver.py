@@ -0,0 +1,381 @@
+import os
+import threading
+import time
+
+from App.cache import get_cache
+from App.search import fold
+
+# ---------------------------------------------------------
+# Country resolver (ISO2 / ISO3 / name -> country)
+# ---------------------------------------------------------
+# The world map and /countries/resolve/<iso2> address countries by ISO2,
+# the data by ISO3 (countries.country_code). countries.iso2 stores the
+# ISO2 code next to it (unique index, filled from ISO2_TO_ISO3 by
+# ensure_iso2_column(); until the loader has added it, ISO3_TO_ISO2 stands
+# in), and the whole table is held in memory as
+# dictionaries keyed by id, ISO2, ISO3 and folded name, so resolving a
+# country never runs a query.
+#
+# The maps are rebuilt when countries is bumped in App/cache.py or after
+# COUNTRY_RESOLVER_TTL seconds.
+
+RESOLVER_CONFIG = {
+    "ttl": float(os.getenv("COUNTRY_RESOLVER_TTL", "300")),
+}
+
+
+class CountryResolver:
+    """Immutable lookup maps over the countries table."""
+
+    def __init__(self, rows, versions):
+        self.versions = versions
+        self.built_at = time.monotonic()
+        self.by_id = {}
+        self.by_iso2 = {}
+        self.by_iso3 = {}
+        self.by_name = {}
+        for row in rows:
+            code = (row["country_code"] or "").upper()
+            country = {
+                "country_id": row["country_id"],
+                "country_name": row["country_name"],
+                "country_code": code,
+                "iso2": (row.get("iso2") or ISO3_TO_ISO2.get(code) or "").upper() or None,
+                "region": row["region"],
+            }
+            self.by_id[country["country_id"]] = country
+            if code:
+                self.by_iso3[code] = country
+            if country["iso2"]:
+                self.by_iso2[country["iso2"]] = country
+            if country["country_name"]:
+                self.by_name[fold(country["country_name"])] = country
+
+    def resolve(self, key):
+        """Country dict for an ISO2 code, ISO3 code or name (None when unknown)."""
+        key = (key or "").strip()
+        if not key:
+            return None
+        upper = key.upper()
+        if len(upper) == 2 and upper in self.by_iso2:
+            return self.by_iso2[upper]
+        if len(upper) == 3 and upper in self.by_iso3:
+            return self.by_iso3[upper]
+        return self.by_name.get(fold(key))
+
+
+def _load(conn, versions):
+    cur = conn.cursor(dictionary=True)
+    try:
+        try:
+            cur.execute("SELECT country_id, country_name, country_code, iso2, region FROM countries")
+        except Exception as e:
+            if getattr(e, "errno", None) != 1054:  # not "unknown column"
+                raise
+            # database from before countries.iso2 (ensure_iso2_column() not run
+            # yet): ISO2 codes come from ISO3_TO_ISO2
+            cur.execute("SELECT country_id, country_name, country_code, region FROM countries")
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+    return CountryResolver(rows, versions)
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver(conn):
+    """Current resolver (rebuilt when countries was bumped)."""
+    global _resolver
+    versions = get_cache().versions(("countries",))
+    resolver = _resolver
+    if resolver is not None and resolver.versions == versions \
+            and time.monotonic() - resolver.built_at < RESOLVER_CONFIG["ttl"]:
+        return resolver
+
+    with _resolver_lock:
+        resolver = _resolver
+        if resolver is None or resolver.versions != versions \
+                or time.monotonic() - resolver.built_at >= RESOLVER_CONFIG["ttl"]:
+            resolver = _load(conn, versions)
+            _resolver = resolver
+    return resolver
+
+
+def resolve_country(conn, key):
+    """Country dict (country_id, country_name, country_code, iso2, region) for `key`, or None."""
+    return get_resolver(conn).resolve(key)
+
+
+def ensure_iso2_column(conn):
+    """
+    Add countries.iso2 (with its unique index) to databases created before
+    it existed, and fill it from ISO2_TO_ISO3. Safe to run after every load.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'countries' AND COLUMN_NAME = 'iso2'
+        """)
+        if not cur.fetchone()[0]:
+            cur.execute("""
+                ALTER TABLE countries
+                    ADD COLUMN iso2 CHAR(2) NULL AFTER country_code,
+                    ADD UNIQUE INDEX uq_countries_iso2 (iso2)
+            """)
+        cur.executemany(
+            "UPDATE countries SET iso2 = %s WHERE country_code = %s AND NOT (iso2 <=> %s)",
+            [(iso2, iso3, iso2) for iso2, iso3 in ISO2_TO_ISO3.items()],
+        )
+        conn.commit()
+    finally:
+        cur.close()
+
+
+# ISO 3166-1 alpha-2 -> alpha-3
+ISO2_TO_ISO3 = {
+  "AF": "AFG",
+  "AL": "ALB",
+  "DZ": "DZA",
+  "AS": "ASM",
+  "AD": "AND",
+  "AO": "AGO",
+  "AI": "AIA",
+  "AQ": "ATA",
+  "AG": "ATG",
+  "AR": "ARG",
+  "AM": "ARM",
+  "AW": "ABW",
+  "AU": "AUS",
+  "AT": "AUT",
+  "AZ": "AZE",
+  "BS": "BHS",
+  "BH": "BHR",
+  "BD": "BGD",
+  "BB": "BRB",
+  "BY": "BLR",
+  "BE": "BEL",
+  "BZ": "BLZ",
+  "BJ": "BEN",
+  "BM": "BMU",
+  "BT": "BTN",
+  "BO": "BOL",
+  "BA": "BIH",
+  "BW": "BWA",
+  "BR": "BRA",
+  "IO": "IOT",
+  "BN": "BRN",
+  "BG": "BGR",
+  "BF": "BFA",
+  "BI": "BDI",
+  "KH": "KHM",
+  "CM": "CMR",
+  "CA": "CAN",
+  "CV": "CPV",
+  "KY": "CYM",
+  "CF": "CAF",
+  "TD": "TCD",
+  "CL": "CHL",
+  "CN": "CHN",
+  "CX": "CXR",
+  "CC": "CCK",
+  "CO": "COL",
+  "KM": "COM",
+  "CG": "COG",
+  "CD": "COD",
+  "CK": "COK",
+  "CR": "CRI",
+  "CI": "CIV",
+  "HR": "HRV",
+  "CU": "CUB",
+  "CY": "CYP",
+  "CZ": "CZE",
+  "DK": "DNK",
+  "DJ": "DJI",
+  "DM": "DMA",
+  "DO": "DOM",
+  "EC": "ECU",
+  "EG": "EGY",
+  "SV": "SLV",
+  "GQ": "GNQ",
+  "ER": "ERI",
+  "EE": "EST",
+  "SZ": "SWZ",
+  "ET": "ETH",
+  "FK": "FLK",
+  "FO": "FRO",
+  "FJ": "FJI",
+  "FI": "FIN",
+  "FR": "FRA",
+  "GF": "GUF",
+  "PF": "PYF",
+  "TF": "ATF",
+  "GA": "GAB",
+  "GM": "GMB",
+  "GE": "GEO",
+  "DE": "DEU",
+  "GH": "GHA",
+  "GI": "GIB",
+  "GR": "GRC",
+  "GL": "GRL",
+  "GD": "GRD",
+  "GP": "GLP",
+  "GU": "GUM",
+  "GT": "GTM",
+  "GG": "GGY",
+  "GN": "GIN",
+  "GW": "GNB",
+  "GY": "GUY",
+  "HT": "HTI",
+  "HN": "HND",
+  "HK": "HKG",
+  "HU": "HUN",
+  "IS": "ISL",
+  "IN": "IND",
+  "ID": "IDN",
+  "IR": "IRN",
+  "IQ": "IRQ",
+  "IE": "IRL",
+  "IM": "IMN",
+  "IL": "ISR",
+  "IT": "ITA",
+  "JM": "JAM",
+  "JP": "JPN",
+  "JE": "JEY",
+  "JO": "JOR",
+  "KZ": "KAZ",
+  "KE": "KEN",
+  "KI": "KIR",
+  "KP": "PRK",
+  "KR": "KOR",
+  "KW": "KWT",
+  "KG": "KGZ",
+  "LA": "LAO",
+  "LV": "LVA",
+  "LB": "LBN",
+  "LS": "LSO",
+  "LR": "LBR",
+  "LY": "LBY",
+  "LI": "LIE",
+  "LT": "LTU",
+  "LU": "LUX",
+  "MO": "MAC",
+  "MG": "MDG",
+  "MW": "MWI",
+  "MY": "MYS",
+  "MV": "MDV",
+  "ML": "MLI",
+  "MT": "MLT",
+  "MH": "MHL",
+  "MQ": "MTQ",
+  "MR": "MRT",
+  "MU": "MUS",
+  "YT": "MYT",
+  "MX": "MEX",
+  "FM": "FSM",
+  "MD": "MDA",
+  "MC": "MCO",
+  "MN": "MNG",
+  "ME": "MNE",
+  "MS": "MSR",
+  "MA": "MAR",
+  "MZ": "MOZ",
+  "MM": "MMR",
+  "NA": "NAM",
+  "NR": "NRU",
+  "NP": "NPL",
+  "NL": "NLD",
+  "NC": "NCL",
+  "NZ": "NZL",
+  "NI": "NIC",
+  "NE": "NER",
+  "NG": "NGA",
+  "NU": "NIU",
+  "NF": "NFK",
+  "MK": "MKD",
+  "MP": "MNP",
+  "NO": "NOR",
+  "OM": "OMN",
+  "PK": "PAK",
+  "PW": "PLW",
+  "PS": "PSE",
+  "PA": "PAN",
+  "PG": "PNG",
+  "PY": "PRY",
+  "PE": "PER",
+  "PH": "PHL",
+  "PN": "PCN",
+  "PL": "POL",
+  "PT": "PRT",
+  "PR": "PRI",
+  "QA": "QAT",
+  "RE": "REU",
+  "RO": "ROU",
+  "RU": "RUS",
+  "RW": "RWA",
+  "BL": "BLM",
+  "SH": "SHN",
+  "KN": "KNA",
+  "LC": "LCA",
+  "MF": "MAF",
+  "PM": "SPM",
+  "VC": "VCT",
+  "WS": "WSM",
+  "SM": "SMR",
+  "ST": "STP",
+  "SA": "SAU",
+  "SN": "SEN",
+  "RS": "SRB",
+  "SC": "SYC",
+  "SL": "SLE",
+  "SG": "SGP",
+  "SX": "SXM",
+  "SK": "SVK",
+  "SI": "SVN",
+  "SB": "SLB",
+  "SO": "SOM",
+  "ZA": "ZAF",
+  "GS": "SGS",
+  "SS": "SSD",
+  "ES": "ESP",
+  "LK": "LKA",
+  "SD": "SDN",
+  "SR": "SUR",
+  "SE": "SWE",
+  "CH": "CHE",
+  "SY": "SYR",
+  "TW": "TWN",
+  "TJ": "TJK",
+  "TZ": "TZA",
+  "TH": "THA",
+  "TL": "TLS",
+  "TG": "TGO",
+  "TK": "TKL",
+  "TO": "TON",
+  "TT": "TTO",
+  "TN": "TUN",
+  "TR": "TUR",
+  "TM": "TKM",
+  "TC": "TCA",
+  "TV": "TUV",
+  "UG": "UGA",
+  "UA": "UKR",
+  "AE": "ARE",
+  "GB": "GBR",
+  "US": "USA",
+  "UY": "URY",
+  "UZ": "UZB",
+  "VU": "VUT",
+  "VE": "VEN",
+  "VN": "VNM",
+  "VG": "VGB",
+  "VI": "VIR",
+  "YE": "YEM",
+  "ZM": "ZMB",
+  "ZW": "ZWE",
+  "XK": "XKX"
+}
+
+ISO3_TO_ISO2 = {v: k for k, v in ISO2_TO_ISO3.items()}
@@ -0,0 +1,179 @@
+from App.domains import DOMAINS
+
+# ---------------------------------------------------------
+# country_data_coverage / domain_coverage_stats maintenance
+# ---------------------------------------------------------
+# One row per (country, domain) with the number of fact rows and the year
+# range, for all rows and for rows with a non-null value. The loader rebuilds
+# the whole table; the add/edit/delete handlers refresh only the (country,
+# domain) pair they touched, which is a lookup on the
+# UNIQUE(country_id, <indicator>, year) key of the fact table.
+#
+# domain_coverage_stats holds the dashboard totals per domain. It is
+# re-aggregated from the domain's country_data_coverage rows (one per
+# country) after each refresh, so it never reads the fact table itself.
+
+_COVERAGE_COLUMNS = """
+    COUNT(*), MIN(year), MAX(year),
+    COUNT(indicator_value),
+    MIN(CASE WHEN indicator_value IS NOT NULL THEN year END),
+    MAX(CASE WHEN indicator_value IS NOT NULL THEN year END)
+"""
+
+
+def _refresh_domain_stats(cur, domain):
+    d = DOMAINS[domain]
+    cur.execute(
+        f"""
+        INSERT INTO domain_coverage_stats
+            (domain, indicator_count, record_count, country_count, min_year, max_year)
+        SELECT
+            %s,
+            (SELECT COUNT(*) FROM {d['detail_table']}),
+            COALESCE(SUM(value_count), 0),
+            COALESCE(SUM(value_count > 0), 0),
+            MIN(value_min_year),
+            MAX(value_max_year)
+        FROM country_data_coverage
+        WHERE domain = %s
+        ON DUPLICATE KEY UPDATE
+            indicator_count = VALUES(indicator_count),
+            record_count = VALUES(record_count),
+            country_count = VALUES(country_count),
+            min_year = VALUES(min_year),
+            max_year = VALUES(max_year)
+        """,
+        (domain, domain),
+    )
+
+
+def rebuild_country_coverage(conn):
+    """Recompute country_data_coverage and domain_coverage_stats from scratch (used after a bulk load)."""
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM country_data_coverage")
+        for domain, d in DOMAINS.items():
+            cur.execute(
+                f"""
+                INSERT INTO country_data_coverage
+                    (country_id, domain, row_count, min_year, max_year,
+                     value_count, value_min_year, value_max_year)
+                SELECT country_id, %s, {_COVERAGE_COLUMNS}
+                FROM {d['fact_table']}
+                GROUP BY country_id
+                """,
+                (domain,),
+            )
+            _refresh_domain_stats(cur, domain)
+        conn.commit()
+    finally:
+        cur.close()
+
+
+def refresh_country_coverage(conn, domain, country_id):
+    """
+    Recompute the coverage row of a single (country, domain) pair, then the
+    domain's dashboard totals.
+
+    Does not commit: call it inside the handler's transaction, right before
+    db.commit(), so the summary never drifts from the fact table.
+    """
+    if not country_id or domain not in DOMAINS:
+        return
+    d = DOMAINS[domain]
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            f"""
+            SELECT {_COVERAGE_COLUMNS}
+            FROM {d['fact_table']}
+            WHERE country_id = %s
+            """,
+            (country_id,),
+        )
+        row = cur.fetchone()
+        if row[0]:
+            cur.execute(
+                """
+                INSERT INTO country_data_coverage
+                    (country_id, domain, row_count, min_year, max_year,
+                     value_count, value_min_year, value_max_year)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    row_count = VALUES(row_count),
+                    min_year = VALUES(min_year),
+                    max_year = VALUES(max_year),
+                    value_count = VALUES(value_count),
+                    value_min_year = VALUES(value_min_year),
+                    value_max_year = VALUES(value_max_year)
+                """,
+                (country_id, domain) + tuple(row),
+            )
+        else:
+            cur.execute(
+                "DELETE FROM country_data_coverage WHERE country_id = %s AND domain = %s",
+                (country_id, domain),
+            )
+        _refresh_domain_stats(cur, domain)
+    finally:
+        cur.close()
+
+
+def get_record_country_id(conn, domain, record_id):
+    """Return the country_id of a fact row (needed before deleting it)."""
+    d = DOMAINS[domain]
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            f"SELECT country_id FROM {d['fact_table']} WHERE {d['pk']} = %s",
+            (record_id,),
+        )
+        row = cur.fetchone()
+    finally:
+        cur.close()
+    return row[0] if row else None
+
+
+def get_domain_coverage_stats(conn):
+    """
+    Dashboard totals in one read: {domain: {indicators, records, countries,
+    min_year, max_year}} plus the total number of countries.
+    """
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute(
+            """
+            SELECT
+                domain, indicator_count, record_count, country_count, min_year, max_year,
+                (SELECT COUNT(*) FROM countries) AS total_countries
+            FROM domain_coverage_stats
+            """
+        )
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+    stats = {
+        row["domain"]: {
+            "indicators": row["indicator_count"],
+            "records": row["record_count"],
+            "countries": row["country_count"],
+            "min_year": row["min_year"],
+            "max_year": row["max_year"],
+        }
+        for row in rows
+    }
+    return stats, (rows[0]["total_countries"] if rows else None)
+
+
+def get_country_data_count(conn, country_id):
+    """Total number of fact rows recorded for a country across all domains."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT COALESCE(SUM(row_count), 0) FROM country_data_coverage WHERE country_id = %s",
+            (country_id,),
+        )
+        row = cur.fetchone()
+    finally:
+        cur.close()
+    return int(row[0] or 0) if row else 0
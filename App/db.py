@@ -1,4 +1,6 @@
 import os
+import threading
+import time
 import mysql.connector
 from flask import g
 
@@ -11,22 +13,326 @@ DB_CONFIG = {
     "port": int(os.getenv("DB_PORT", "3306")),
 }
 
+# Connection pool configuration (all values can be overridden from .env)
+POOL_CONFIG = {
+    # connections kept open and reused between requests
+    "size": int(os.getenv("DB_POOL_SIZE", "5")),
+    # extra short-lived connections allowed when the pool is exhausted
+    "max_overflow": int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+    # seconds a request waits for a free connection before failing
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    # idle connections older than this are pinged before being handed out
+    "idle_timeout": float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300")),
+    # connections older than this are closed and replaced (0 disables)
+    "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+}
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no connection becomes available within the pool timeout."""
+
+
+class _PooledConnection:
+    """Bookkeeping wrapper around a raw MySQL connection owned by the pool."""
+
+    __slots__ = ("conn", "created_at", "last_used", "overflow")
+
+    def __init__(self, conn, overflow=False):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+        self.overflow = overflow
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of MySQL connections.
+
+    Up to `size` connections are kept open and reused; when all of them are
+    checked out, up to `max_overflow` additional connections are opened and
+    closed again on return. Connections are health-checked on checkout when
+    they have been idle for longer than `idle_timeout` and recycled once they
+    exceed `max_lifetime`.
+    """
+
+    def __init__(self, db_config, size=5, max_overflow=10, timeout=30.0,
+                 idle_timeout=300.0, max_lifetime=3600.0):
+        self._db_config = dict(db_config)
+        self.size = max(1, size)
+        self.max_overflow = max(0, max_overflow)
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+
+        self._idle = []
+        self._checked_out = {}
+        self._overflow_in_use = 0
+        # pooled connections being opened outside the lock
+        self._opening = 0
+        # set by dispose(): returned connections are closed instead of kept
+        self._disposed = False
+        self._cond = threading.Condition(threading.Lock())
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "failed_health_checks": 0,
+            "overflow_created": 0,
+        }
+
+    # ---------- internal helpers ----------
+    def _close_quietly(self, pooled):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+
+    def _is_expired(self, pooled, now):
+        return self.max_lifetime > 0 and (now - pooled.created_at) > self.max_lifetime
+
+    def _is_healthy(self, pooled, now):
+        if (now - pooled.last_used) <= self.idle_timeout:
+            return True
+        try:
+            pooled.conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _total_pooled(self):
+        pooled_out = sum(1 for p in self._checked_out.values() if not p.overflow)
+        return len(self._idle) + pooled_out + self._opening
+
+    def _reserve(self, waited, wait_started, deadline):
+        """
+        Under the lock: take an idle connection or reserve a slot for a new
+        one, waiting when there is neither. Returns (idle connection or None,
+        overflow, expired connections to close, waited, wait_started, deadline).
+        """
+        expired = []
+        while True:
+            now = time.monotonic()
+
+            # 1. reuse an idle connection (LIFO keeps the hottest ones warm)
+            while self._idle:
+                pooled = self._idle.pop()
+                if self._is_expired(pooled, now):
+                    self._stats["recycled"] += 1
+                    expired.append(pooled)
+                    continue
+                # counted as checked out while it is health-checked
+                self._checked_out[id(pooled.conn)] = pooled
+                return pooled, False, expired, waited, wait_started, deadline
+
+            # 2. open a new pooled connection if we are under `size`
+            if self._total_pooled() < self.size:
+                self._opening += 1
+                return None, False, expired, waited, wait_started, deadline
+
+            # 3. open an overflow connection if allowed
+            if self._overflow_in_use < self.max_overflow:
+                self._overflow_in_use += 1
+                return None, True, expired, waited, wait_started, deadline
+
+            # 4. wait for a connection to be released
+            if deadline is None:
+                deadline = now + self.timeout
+                wait_started = now
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+            remaining = deadline - now
+            if remaining <= 0:
+                self._stats["timeouts"] += 1
+                self._stats["wait_time"] += now - wait_started
+                raise PoolTimeoutError(
+                    f"No database connection available after {self.timeout:.1f}s "
+                    f"(size={self.size}, max_overflow={self.max_overflow})"
+                )
+            self._cond.wait(remaining)
+
+    # ---------- public API ----------
+    def acquire(self):
+        """Borrow a connection from the pool, waiting up to `timeout` seconds."""
+        deadline = None
+        waited = False
+        wait_started = None
+
+        # slots are reserved under the lock; connecting, pinging and closing
+        # happen outside it, so a slow server never blocks other threads
+        while True:
+            with self._cond:
+                pooled, overflow, expired, waited, wait_started, deadline = \
+                    self._reserve(waited, wait_started, deadline)
+            for old in expired:
+                self._close_quietly(old)
+
+            if pooled is not None:
+                if self._is_healthy(pooled, time.monotonic()):
+                    with self._cond:
+                        return self._checkout(pooled, waited, wait_started)
+                self._close_quietly(pooled)
+                with self._cond:
+                    del self._checked_out[id(pooled.conn)]
+                    self._stats["failed_health_checks"] += 1
+                    self._stats["recycled"] += 1
+                    self._cond.notify()
+                continue
+
+            try:
+                conn = mysql.connector.connect(**self._db_config)
+            except Exception:
+                with self._cond:
+                    if overflow:
+                        self._overflow_in_use -= 1
+                    else:
+                        self._opening -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                if not overflow:
+                    self._opening -= 1
+                self._stats["created"] += 1
+                if overflow:
+                    self._stats["overflow_created"] += 1
+                return self._checkout(_PooledConnection(conn, overflow=overflow), waited, wait_started)
+
+    def _checkout(self, pooled, waited, wait_started):
+        if waited and wait_started is not None:
+            self._stats["wait_time"] += time.monotonic() - wait_started
+        self._stats["checkouts"] += 1
+        self._checked_out[id(pooled.conn)] = pooled
+        return pooled.conn
+
+    def release(self, conn):
+        """Return a connection to the pool (or close it if it is overflow/expired)."""
+        with self._cond:
+            pooled = self._checked_out.get(id(conn))
+        if pooled is None:
+            # not ours; just close it
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return
+
+        # never hand out a connection with an open transaction (rolled back
+        # outside the lock; the connection stays counted as checked out)
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            healthy = False
+        now = time.monotonic()
+        expired = self._is_expired(pooled, now)
+        keep = healthy and not pooled.overflow and not expired and not self._disposed
+        if not keep:
+            self._close_quietly(pooled)
+
+        with self._cond:
+            self._checked_out.pop(id(conn), None)
+            if not healthy:
+                self._stats["failed_health_checks"] += 1
+            elif expired and not pooled.overflow:
+                self._stats["recycled"] += 1
+            if pooled.overflow:
+                self._overflow_in_use -= 1
+            if keep:
+                pooled.last_used = now
+                self._idle.append(pooled)
+            self._cond.notify()
+
+    def discard(self, conn):
+        """
+        Close a checked-out connection instead of returning it, e.g. when a
+        streaming read was abandoned with rows still unread on the wire.
+        """
+        with self._cond:
+            pooled = self._checked_out.get(id(conn))
+        if pooled is None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return
+        self._close_quietly(pooled)
+        with self._cond:
+            self._checked_out.pop(id(conn), None)
+            if pooled.overflow:
+                self._overflow_in_use -= 1
+            self._cond.notify()
+
+    def dispose(self):
+        """
+        Close every idle connection; checked-out ones are closed when they are
+        released, so the pool does not fill up again.
+        """
+        with self._cond:
+            self._disposed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled)
+
+    def stats(self):
+        """Snapshot of pool metrics, suitable for logging or a JSON endpoint."""
+        with self._cond:
+            data = dict(self._stats)
+            data["wait_time"] = round(data["wait_time"], 6)
+            data["avg_wait_time"] = round(data["wait_time"] / data["waits"], 6) if data["waits"] else 0.0
+            data["idle"] = len(self._idle)
+            data["checked_out"] = len(self._checked_out)
+            data["overflow_in_use"] = self._overflow_in_use
+            data["size"] = self.size
+            data["max_overflow"] = self.max_overflow
+            return data
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the process-wide connection pool, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+    return _pool
+
+
+def get_pool_stats():
+    """
+    Returns the current pool metrics (checkouts, waits, wait time, recycled...).
+    """
+    return get_pool().stats()
+
 
 def get_db():
     """
     Returns a single MySQL connection for the current Flask request context.
-    The connection is cached in flask.g to avoid reconnecting multiple times.
+    The connection is borrowed from the process-wide pool and cached in
+    flask.g so the request reuses it for all its queries.
     """
     if "db" not in g:
-        g.db = mysql.connector.connect(**DB_CONFIG)
+        g.db = get_pool().acquire()
     return g.db
 
 
 def close_db(e=None):
     """
-    Closes the MySQL connection at the end of the request, if it exists.
+    Returns the MySQL connection to the pool at the end of the request, if it exists.
     This function is meant to be registered with app.teardown_appcontext.
     """
     conn = g.pop("db", None)
     if conn is not None:
-        conn.close()
+        get_pool().release(conn)
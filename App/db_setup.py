@@ -23,6 +23,27 @@ def _exec_statements(cursor, sql_text: str):
         cursor.execute(cmd)
 
 
+def ensure_schema(conn):
+    """
+    Create any table of SQL/database.sql that does not exist yet, without
+    touching existing tables or data (used by the incremental loader).
+    """
+    with open(SQL_FILE_PATH, 'r', encoding='utf-8') as f:
+        sql_text = f.read()
+    sql_clean = re.sub(r'--.*\n', '\n', sql_text)
+    sql_clean = re.sub(r'/\*.*?\*/', '', sql_clean, flags=re.S)
+    cur = conn.cursor()
+    try:
+        cur.execute("SET FOREIGN_KEY_CHECKS = 0;")
+        for cmd in (c.strip() for c in sql_clean.split(';')):
+            if re.match(r'CREATE\s+TABLE\s', cmd, flags=re.I):
+                cur.execute(re.sub(r'^CREATE\s+TABLE\s+(?!IF\s)', 'CREATE TABLE IF NOT EXISTS ', cmd, flags=re.I))
+        cur.execute("SET FOREIGN_KEY_CHECKS = 1;")
+        conn.commit()
+    finally:
+        cur.close()
+
+
 def setup_nuclear():
     # connect as root (no database) to drop/create the database
     try:
@@ -0,0 +1,79 @@
+from flask import jsonify, request
+
+from App.cache import cached_query
+from App.domains import DOMAINS
+from App.trends import attach_trends
+
+# ---------------------------------------------------------
+# Lazy detail panels and form option lists (JSON)
+# ---------------------------------------------------------
+# The GHG and energy list pages show one summary row per (country, year).
+# The indicator values behind a row are fetched from /<domain>/api/details
+# when the row is expanded, and the option lists of the add/edit modal from
+# /<domain>/api/form-options when it is first opened, so the number of
+# queries a list page runs does not grow with the rows on it.
+
+
+def load_row_details(conn, domain, country_id, year, with_trends=False, order_by_name=True):
+    """
+    Every indicator value of one (country, year), as dicts with record_id,
+    indicator_id, indicator_name, indicator_value, unit and note (plus trend).
+    """
+    d = DOMAINS[domain]
+    fact, detail, ind_pk = d["fact_table"], d["detail_table"], d["indicator_pk"]
+    rows = cached_query(conn, f"""
+        SELECT
+            f.{d['pk']} AS record_id,
+            f.country_id,
+            f.year,
+            f.{ind_pk},
+            f.indicator_value,
+            f.{d['note_column']} AS note,
+            i.indicator_name,
+            i.{d['unit_column']} AS unit
+        FROM {fact} f
+        INNER JOIN {detail} i ON i.{ind_pk} = f.{ind_pk}
+        WHERE f.country_id = %s AND f.year = %s
+        ORDER BY {"i.indicator_name" if order_by_name else f"f.{ind_pk}"}
+    """, (country_id, year), tables=(fact, detail))
+
+    if with_trends:
+        cur = conn.cursor(dictionary=True)
+        try:
+            attach_trends(cur, domain, rows)
+        finally:
+            cur.close()
+    for row in rows:
+        row["indicator_id"] = row.pop(ind_pk)
+        if row["indicator_value"] is not None:
+            row["indicator_value"] = float(row["indicator_value"])
+    return rows
+
+
+def details_response(conn, domain, **kwargs):
+    """?country_id=1&year=2020 -> {"country_id", "year", "rows": [...]}"""
+    country_id = request.args.get("country_id", type=int)
+    year = request.args.get("year", type=int)
+    if country_id is None or year is None:
+        return jsonify({"error": "country_id and year are required integers"}), 400
+    rows = load_row_details(conn, domain, country_id, year, **kwargs)
+    return jsonify({"country_id": country_id, "year": year, "rows": rows})
+
+
+def form_options_response(conn, domain):
+    """Countries, the domain's indicators and the audit users for the add/edit modal."""
+    d = DOMAINS[domain]
+    countries = cached_query(
+        conn, "SELECT country_id, country_name, country_code FROM countries ORDER BY country_name",
+        tables=("countries",),
+    )
+    indicators = cached_query(conn, f"""
+        SELECT {d['indicator_pk']} AS indicator_id, indicator_name, {d['unit_column']} AS unit
+        FROM {d['detail_table']}
+        ORDER BY indicator_name
+    """, tables=(d["detail_table"],))
+    students = cached_query(
+        conn, "SELECT student_id, student_number, full_name FROM students ORDER BY student_number",
+        tables=("students",),
+    )
+    return jsonify({"countries": countries, "indicators": indicators, "students": students})
@@ -0,0 +1,50 @@
+# Shared description of the five indicator domains.
+# Every fact table follows the same shape (country_id, <indicator fk>, year,
+# indicator_value) so helpers that work across domains read their table and
+# column names from here instead of hard-coding them.
+
+DOMAINS = {
+    "health": {
+        "fact_table": "health_system",
+        "pk": "row_id",
+        "detail_table": "health_indicator_details",
+        "indicator_pk": "health_indicator_id",
+        "unit_column": "unit_symbol",
+        "note_column": "source_notes",
+    },
+    "energy": {
+        "fact_table": "energy_data",
+        "pk": "data_id",
+        "detail_table": "energy_indicator_details",
+        "indicator_pk": "energy_indicator_id",
+        "unit_column": "measurement_unit",
+        "note_column": "data_source",
+    },
+    "freshwater": {
+        "fact_table": "freshwater_data",
+        "pk": "data_id",
+        "detail_table": "freshwater_indicator_details",
+        "indicator_pk": "freshwater_indicator_id",
+        "unit_column": "unit_of_measure",
+        "note_column": "source_notes",
+    },
+    "ghg": {
+        "fact_table": "greenhouse_emissions",
+        "pk": "row_id",
+        "detail_table": "ghg_indicator_details",
+        "indicator_pk": "ghg_indicator_id",
+        "unit_column": "unit_symbol",
+        "note_column": "source_notes",
+    },
+    "sustainability": {
+        "fact_table": "sustainability_data",
+        "pk": "data_id",
+        "detail_table": "sustainability_indicator_details",
+        "indicator_pk": "sus_indicator_id",
+        "unit_column": "unit_symbol",
+        "note_column": "source_note",
+    },
+}
+
+# fact table name -> domain key (e.g. "energy_data" -> "energy")
+DOMAIN_BY_TABLE = {d["fact_table"]: name for name, d in DOMAINS.items()}
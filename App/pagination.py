@@ -0,0 +1,194 @@
+import base64
+import json
+import os
+import threading
+import time
+from decimal import Decimal
+
+# ---------------------------------------------------------
+# Keyset (seek) pagination + cached total counts
+# ---------------------------------------------------------
+# OFFSET pagination makes MySQL read and throw away every row before the
+# requested page, so deep pages get slower and slower. In keyset mode the
+# page is located with a WHERE on the sort key of the last row already shown
+# (encoded in an opaque `cursor` query parameter), which costs the same on
+# page 1000 as on page 1.
+#
+# A key is a tuple (sql_expr, row_field, nullable):
+#   sql_expr  - expression used in WHERE / ORDER BY (e.g. "hs.year")
+#   row_field - key of the fetched row dict holding its value, or a callable
+#               computing it from the row
+#   nullable  - whether the expression can be NULL (MySQL sorts NULL first)
+# The last keys must make the order unique (primary key, or country + year).
+
+COUNT_CACHE_TTL = float(os.getenv("LIST_COUNT_TTL", "60"))
+
+
+def _json_value(v):
+    if isinstance(v, Decimal):
+        return str(v)
+    return v
+
+
+def encode_cursor(values, direction, signature):
+    payload = {"k": [_json_value(v) for v in values], "d": direction, "s": signature}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, n_keys, signature):
+    """Return (values, direction) or None when the cursor is missing/invalid/stale."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = payload["k"]
+        direction = payload["d"]
+    except Exception:
+        return None
+    if not isinstance(values, list) or len(values) != n_keys:
+        return None
+    if direction not in ("next", "prev") or payload.get("s") != signature:
+        return None
+    return values, direction
+
+
+class KeysetPager:
+    """
+    Builds the WHERE / ORDER BY / LIMIT pieces for one list page and the
+    cursors for the neighbouring pages.
+
+    Without a valid cursor the pager falls back to OFFSET pagination, using
+    the same ORDER BY (with the tie-breaking keys) so both modes agree.
+    """
+
+    def __init__(self, keys, descending, token, per_page, signature=""):
+        self.keys = keys
+        self.descending = descending
+        self.per_page = per_page
+        self.signature = signature
+        decoded = decode_cursor(token, len(keys), signature)
+        self.active = decoded is not None
+        self.values, self.direction = decoded if decoded else (None, "next")
+        self.next_cursor = None
+        self.prev_cursor = None
+
+    # ---------- SQL pieces ----------
+    def _scan_descending(self):
+        # walking backwards ("prev") flips the scan direction
+        return self.descending != (self.direction == "prev")
+
+    def where(self):
+        """(sql, params) restricting rows to those after/before the cursor."""
+        if not self.active:
+            return "", []
+        desc = self._scan_descending()
+        alternatives = []
+        params = []
+        for i, (expr, _field, nullable) in enumerate(self.keys):
+            parts = []
+            part_params = []
+            for j, (prev_expr, _f, _n) in enumerate(self.keys[:i]):
+                prev_value = self.values[j]
+                if prev_value is None:
+                    parts.append(f"{prev_expr} IS NULL")
+                else:
+                    parts.append(f"{prev_expr} = %s")
+                    part_params.append(prev_value)
+
+            value = self.values[i]
+            if desc:
+                # rows strictly "smaller"; NULL is the smallest value in MySQL
+                if value is None:
+                    continue
+                if nullable:
+                    parts.append(f"({expr} < %s OR {expr} IS NULL)")
+                else:
+                    parts.append(f"{expr} < %s")
+                part_params.append(value)
+            else:
+                if value is None:
+                    parts.append(f"{expr} IS NOT NULL")
+                else:
+                    parts.append(f"{expr} > %s")
+                    part_params.append(value)
+
+            alternatives.append("(" + " AND ".join(parts) + ")")
+            params.extend(part_params)
+
+        if not alternatives:
+            return "1=0", []
+        return "(" + " OR ".join(alternatives) + ")", params
+
+    def order_by(self):
+        direction = "DESC" if self._scan_descending() else "ASC"
+        return ", ".join(f"{expr} {direction}" for expr, _f, _n in self.keys)
+
+    def limit_sql(self, page):
+        """LIMIT clause: one extra row in keyset mode tells us if more rows follow."""
+        if self.active:
+            return f"LIMIT {self.per_page + 1}"
+        offset = (max(page, 1) - 1) * self.per_page
+        return f"LIMIT {self.per_page} OFFSET {offset}"
+
+    # ---------- results ----------
+    def _row_key(self, row):
+        values = []
+        for _expr, field, _n in self.keys:
+            values.append(field(row) if callable(field) else row.get(field))
+        return values
+
+    def finish(self, rows, page, total_pages):
+        """Trim/reorder fetched rows and compute next_cursor / prev_cursor."""
+        rows = list(rows)
+        if self.active:
+            has_more = len(rows) > self.per_page
+            rows = rows[: self.per_page]
+            if self.direction == "prev":
+                rows.reverse()
+                has_prev, has_next = has_more, True
+            else:
+                has_prev, has_next = page > 1, has_more
+        else:
+            has_prev, has_next = page > 1, page < total_pages
+
+        if rows and has_next:
+            self.next_cursor = encode_cursor(self._row_key(rows[-1]), "next", self.signature)
+        if rows and has_prev:
+            self.prev_cursor = encode_cursor(self._row_key(rows[0]), "prev", self.signature)
+        return rows
+
+
+# ---------------------------------------------------------
+# Cached total counts
+# ---------------------------------------------------------
+_count_cache = {}
+_count_lock = threading.Lock()
+
+
+def cached_count(cur, sql, params, ttl=None):
+    """
+    Run a COUNT query at most once per `ttl` seconds for the same SQL+params.
+    The count only drives the page-number links, so a slightly stale value is fine.
+    """
+    ttl = COUNT_CACHE_TTL if ttl is None else ttl
+    key = (sql, tuple(params))
+    now = time.monotonic()
+    with _count_lock:
+        hit = _count_cache.get(key)
+        if hit and hit[1] > now:
+            return hit[0]
+
+    cur.execute(sql, params)
+    row = cur.fetchone()
+    if isinstance(row, dict):
+        total = int(next(iter(row.values())) or 0)
+    else:
+        total = int(row[0] or 0) if row else 0
+
+    with _count_lock:
+        if len(_count_cache) > 1024:
+            _count_cache.clear()
+        _count_cache[key] = (total, now + ttl)
+    return total
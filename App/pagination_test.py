@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from App.pagination import KeysetPager
+
+# SQLite orders NULL like MySQL: first ascending, last descending
+VALUES = [5, None, 3, 5, None, 1, 3, None, 8, 2, 5, None, 7]
+KEYS = [("value", "value", True), ("id", "id", False)]
+PER_PAGE = 3
+
+
+def _db():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, value INTEGER)")
+    conn.executemany("INSERT INTO t (id, value) VALUES (?, ?)", list(enumerate(VALUES, start=1)))
+    return conn
+
+
+def _fetch(conn, descending, token, page):
+    pager = KeysetPager(KEYS, descending, token, PER_PAGE, signature="t")
+    seek_sql, seek_params = pager.where()
+    sql = "SELECT id, value FROM t"
+    if seek_sql:
+        sql += f" WHERE {seek_sql}"
+    sql += f" ORDER BY {pager.order_by()} {pager.limit_sql(page)}"
+    rows = [dict(r) for r in conn.execute(sql.replace("%s", "?"), seek_params)]
+    total_pages = (len(VALUES) + PER_PAGE - 1) // PER_PAGE
+    return [r["id"] for r in pager.finish(rows, page, total_pages)], pager
+
+
+def _expected(conn, descending):
+    direction = "DESC" if descending else "ASC"
+    return [r["id"] for r in conn.execute(f"SELECT id FROM t ORDER BY value {direction}, id {direction}")]
+
+
+def _walk(descending):
+    conn = _db()
+    expected = _expected(conn, descending)
+
+    # forward from the first (OFFSET) page through the next cursors
+    pages = []
+    ids, pager = _fetch(conn, descending, None, 1)
+    pages.append(ids)
+    while pager.next_cursor:
+        ids, pager = _fetch(conn, descending, pager.next_cursor, len(pages) + 1)
+        pages.append(ids)
+    assert [i for p in pages for i in p] == expected, (descending, pages)
+    assert all(len(p) == PER_PAGE for p in pages[:-1])
+
+    # and back again from the last page through the prev cursors
+    back = []
+    page = len(pages)
+    while pager.prev_cursor:
+        page -= 1
+        ids, pager = _fetch(conn, descending, pager.prev_cursor, page)
+        back.append(ids)
+    assert back == pages[-2::-1], (descending, back)
+
+
+def test_keyset_pages_with_nulls_ascending():
+    _walk(descending=False)
+
+
+def test_keyset_pages_with_nulls_descending():
+    _walk(descending=True)
+
+
+def test_stale_cursor_falls_back_to_offset():
+    conn = _db()
+    _ids, pager = _fetch(conn, False, None, 1)
+    other = KeysetPager(KEYS, False, pager.next_cursor, PER_PAGE, signature="other filters")
+    assert not other.active
+    assert other.where() == ("", [])
+
+
+if __name__ == "__main__":
+    test_keyset_pages_with_nulls_ascending()
+    test_keyset_pages_with_nulls_descending()
+    test_stale_cursor_falls_back_to_offset()
+    print("SUCCESS: keyset pages match the full ordering in both directions.")
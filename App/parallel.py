@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+from App.db import get_pool
+
+# ---------------------------------------------------------
+# Concurrent fan-out of independent read queries
+# ---------------------------------------------------------
+# Profile pages run several queries that do not depend on each other (one
+# per domain). run_parallel() runs one of them on the request's own
+# connection and sends the others, each on its own pooled connection, to a
+# shared thread pool, so the page costs about as much as its slowest query
+# instead of the sum.
+#
+# Every fan-out thread holds a pooled connection next to the request
+# connections, so the thread pool is capped at DB_POOL_SIZE +
+# DB_POOL_MAX_OVERFLOW - 1: the fan-out alone can never exhaust the pool.
+#
+# Each query is bounded twice by the request timeout: on the server via
+# max_execution_time, so a connection never stays busy after the page gave
+# up, and when joining the results, which raises QueryTimeoutError. A
+# query still waiting for a thread or a connection when the page gives up
+# is not run at all.
+
+PARALLEL_CONFIG = {
+    # threads shared by all requests (0 runs the queries one after another)
+    "workers": int(os.getenv("PARALLEL_QUERY_WORKERS", "8")),
+    # seconds a page waits for all of its queries
+    "timeout": float(os.getenv("PARALLEL_QUERY_TIMEOUT", "10")),
+}
+
+
+class QueryTimeoutError(RuntimeError):
+    """Raised when the queries of one fan-out do not finish within the timeout."""
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                pool = get_pool()
+                workers = min(PARALLEL_CONFIG["workers"], pool.size + pool.max_overflow - 1)
+                _executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="fanout")
+    return _executor
+
+
+def _fetch(conn, sql, params, timeout_ms=None):
+    cur = conn.cursor(dictionary=True)
+    try:
+        if timeout_ms:
+            try:
+                cur.execute("SET SESSION max_execution_time = %s", (timeout_ms,))
+            except Exception:
+                timeout_ms = None  # server without the variable (e.g. MariaDB)
+        try:
+            cur.execute(sql, params or ())
+            return cur.fetchall()
+        except Exception as e:
+            if timeout_ms and getattr(e, "errno", None) == 3024:  # max_execution_time exceeded
+                raise QueryTimeoutError(f"query aborted by the server after {timeout_ms} ms") from e
+            raise
+        finally:
+            if timeout_ms:
+                cur.execute("SET SESSION max_execution_time = DEFAULT")
+    finally:
+        cur.close()
+
+
+def _fetch_pooled(sql, params, timeout_ms, deadline=None):
+    if deadline is not None and time.monotonic() >= deadline:
+        raise QueryTimeoutError("the page gave up before the query started")
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        return _fetch(conn, sql, params, timeout_ms)
+    finally:
+        pool.release(conn)
+
+
+def run_parallel(queries, conn=None, timeout=None):
+    """
+    Run independent SELECTs concurrently and return {name: rows}.
+
+    `queries` maps a name to (sql, params). Rows are dicts. One query runs
+    on `conn` (when given) meanwhile. With the worker pool disabled
+    (PARALLEL_QUERY_WORKERS=0) they run one after another on `conn`.
+    Raises QueryTimeoutError when they take longer than `timeout`.
+    """
+    timeout = PARALLEL_CONFIG["timeout"] if timeout is None else timeout
+    if PARALLEL_CONFIG["workers"] <= 0 or len(queries) < 2:
+        if conn is None:
+            return {name: _fetch_pooled(sql, params, None) for name, (sql, params) in queries.items()}
+        return {name: _fetch(conn, sql, params) for name, (sql, params) in queries.items()}
+
+    timeout_ms = int(timeout * 1000) if timeout else None
+    executor = _get_executor()
+    deadline = time.monotonic() + timeout if timeout else None
+    queries = list(queries.items())
+    # the request's connection takes one query instead of idling meanwhile
+    local, queries = (queries[:1], queries[1:]) if conn is not None else ([], queries)
+    futures = {
+        executor.submit(_fetch_pooled, sql, params, timeout_ms, deadline): name
+        for name, (sql, params) in queries
+    }
+    results = {}
+    try:
+        for name, (sql, params) in local:
+            results[name] = _fetch(conn, sql, params, timeout_ms)
+    except BaseException:
+        for f in futures:
+            f.cancel()
+        raise
+    done, pending = wait(
+        futures,
+        timeout=max(0.0, deadline - time.monotonic()) if deadline else None,
+        return_when=FIRST_EXCEPTION,
+    )
+    if pending:
+        for f in pending:
+            f.cancel()
+        failed = [f for f in done if f.exception() is not None]
+        if failed:
+            raise failed[0].exception()
+        raise QueryTimeoutError(
+            f"{len(pending)} of {len(futures) + len(local)} queries did not finish within {timeout:.1f}s: "
+            + ", ".join(sorted(futures[f] for f in pending))
+        )
+    results.update((futures[f], f.result()) for f in done)
+    return results
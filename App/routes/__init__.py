@@ -33,6 +33,8 @@ def create_app():
     from App.routes.ghg import ghg_bp
     from App.routes.energy import energy_bp
     from App.routes.countries import countries_bp
+    from App.routes.typeahead import typeahead_bp
+    from App.routes.audit import audit_bp
 
     app.register_blueprint(countries_bp)
     app.register_blueprint(about_bp)
@@ -43,6 +45,12 @@ def create_app():
     app.register_blueprint(freshwater_bp)
     app.register_blueprint(ghg_bp)
     app.register_blueprint(energy_bp)
+    app.register_blueprint(typeahead_bp)
+    app.register_blueprint(audit_bp)
+
+    # ---------- TYPEAHEAD INDEX (loaded in the background) ----------
+    from App.typeahead import warm_typeahead
+    warm_typeahead()
 
     # ---------- GLOBAL TEMPLATE CONTEXT ----------
     @app.context_processor
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, render_template, request
+
+from App.db import get_db
+from App.cache import cached_query
+from App.domains import DOMAINS
+from App.pagination import KeysetPager
+from App.routes.login import admin_required
+
+audit_bp = Blueprint("audit", __name__, url_prefix="/audit")
+
+AUDIT_ACTIONS = ("CREATE", "UPDATE", "DELETE")
+AUDIT_TABLES = tuple(d["fact_table"] for d in DOMAINS.values())
+PER_PAGE = 50
+
+# newest first; log_id breaks ties between records of the same second
+_KEYS = [
+    ("a.action_timestamp", lambda r: r["action_timestamp"].strftime("%Y-%m-%d %H:%M:%S"), False),
+    ("a.log_id", "log_id", False),
+]
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d") if value else None
+    except ValueError:
+        return None
+
+
+def _audit_filters():
+    """WHERE clause (alias a) and params for the viewer filters in request.args."""
+    table = request.args.get("table", "")
+    record_id = request.args.get("record_id", type=int)
+    student_id = request.args.get("student_id", type=int)
+    action = request.args.get("action", "")
+    date_from = _parse_date(request.args.get("date_from", ""))
+    date_to = _parse_date(request.args.get("date_to", ""))
+
+    where_clauses = []
+    params = []
+
+    # (table_name, record_id, action_timestamp) index: history of one record
+    if table in AUDIT_TABLES:
+        where_clauses.append("a.table_name = %s")
+        params.append(table)
+    if record_id is not None:
+        where_clauses.append("a.record_id = %s")
+        params.append(record_id)
+    # (student_id, action_timestamp) index: one user's actions in a time range
+    if student_id is not None:
+        where_clauses.append("a.student_id = %s")
+        params.append(student_id)
+    if action in AUDIT_ACTIONS:
+        where_clauses.append("a.action_type = %s")
+        params.append(action)
+    # time bounds also prune the monthly partitions
+    if date_from:
+        where_clauses.append("a.action_timestamp >= %s")
+        params.append(date_from)
+    if date_to:
+        where_clauses.append("a.action_timestamp < %s")
+        params.append(date_to + timedelta(days=1))
+
+    return where_clauses, params
+
+
+# ---------------------------------------------------------
+# Audit log viewer (admin)
+# ---------------------------------------------------------
+@audit_bp.route("/", methods=["GET"])
+@admin_required
+def list_audit():
+    where_clauses, params = _audit_filters()
+    filters = {
+        k: request.args.get(k, "")
+        for k in ("table", "record_id", "student_id", "action", "date_from", "date_to")
+    }
+
+    # no page numbers: counting a large audit log would cost more than the page
+    pager = KeysetPager(
+        _KEYS, True, request.args.get("cursor"), PER_PAGE,
+        signature=repr(sorted(filters.items())),
+    )
+    seek_sql, seek_params = pager.where()
+    if seek_sql:
+        where_clauses.append(seek_sql)
+    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute(f"""
+            SELECT
+                a.log_id,
+                a.student_id,
+                s.full_name,
+                s.student_number,
+                a.action_type,
+                a.table_name,
+                a.record_id,
+                a.action_timestamp
+            FROM audit_logs a
+            LEFT JOIN students s ON s.student_id = a.student_id
+            WHERE {where_sql}
+            ORDER BY {pager.order_by()}
+            LIMIT {PER_PAGE + 1}
+        """, params + seek_params)
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+
+    if pager.active:
+        rows = pager.finish(rows, page=2, total_pages=2)
+    else:
+        # first page: the extra row only tells whether a next page exists
+        has_more = len(rows) > PER_PAGE
+        rows = pager.finish(rows[:PER_PAGE], page=1, total_pages=2 if has_more else 1)
+
+    students = cached_query(
+        conn, "SELECT student_id, student_number, full_name FROM students ORDER BY student_number",
+        tables=("students",),
+    )
+
+    return render_template(
+        "audit_list.html",
+        rows=rows,
+        filters=filters,
+        tables=AUDIT_TABLES,
+        actions=AUDIT_ACTIONS,
+        students=students,
+        next_cursor=pager.next_cursor,
+        prev_cursor=pager.prev_cursor,
+    )
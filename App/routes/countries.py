@@ -1,5 +1,11 @@
 from flask import Blueprint, render_template, request, jsonify, abort,redirect,url_for
 from App.db import get_db
+from App.coverage import get_country_data_count
+from App.cache import cached_query
+from App.country_resolver import get_resolver
+from App.parallel import run_parallel, QueryTimeoutError
+from App.conditional import conditional, ALL_DATA_TABLES
+from App.search import match_ids, id_condition
 
 countries_bp = Blueprint("countries", __name__, url_prefix="/countries")
 
@@ -7,6 +13,7 @@ countries_bp = Blueprint("countries", __name__, url_prefix="/countries")
 # 1. LIST COUNTRIES 
 # =========================================================
 @countries_bp.route("/", methods=["GET"])
+@conditional("countries", "country_data_coverage")
 def list_countries():
     """
     Common page: list all countries (name, code, region),
@@ -26,44 +33,30 @@ def list_countries():
             c.country_name,
             c.country_code,
             COALESCE(c.region, '-') AS region,
-            (
-                COALESCE((
-                    SELECT COUNT(*) FROM health_system hs
-                    WHERE hs.country_id = c.country_id
-                ), 0) +
-                COALESCE((
-                    SELECT COUNT(*) FROM energy_data ed
-                    WHERE ed.country_id = c.country_id
-                ), 0) +
-                COALESCE((
-                    SELECT COUNT(*) FROM freshwater_data fd
-                    WHERE fd.country_id = c.country_id
-                ), 0) +
-                COALESCE((
-                    SELECT COUNT(*) FROM greenhouse_emissions ge
-                    WHERE ge.country_id = c.country_id
-                ), 0) +
-                COALESCE((
-                    SELECT COUNT(*) FROM sustainability_data sd
-                    WHERE sd.country_id = c.country_id
-                ), 0)
-            ) AS data_count
+            COALESCE(cov.data_count, 0) AS data_count
         FROM countries c
+        LEFT JOIN (
+            SELECT country_id, SUM(row_count) AS data_count
+            FROM country_data_coverage
+            GROUP BY country_id
+        ) cov ON cov.country_id = c.country_id
     """
 
+    conn = get_db()
     where_clauses = []
     if search:
-        # simple case-insensitive like: matches name OR code
-        where_clauses.append("(LOWER(c.country_name) LIKE %s OR LOWER(c.country_code) LIKE %s)")
-        pattern = f"%{search.lower()}%"
-        params.extend([pattern, pattern])
+        # case-insensitive substring of name OR code, resolved through the search index
+        search_sql, search_params = id_condition(
+            "c.country_id", match_ids(conn, "countries", search, ("country_name", "country_code"))
+        )
+        where_clauses.append(search_sql)
+        params.extend(search_params)
 
     if where_clauses:
         base_sql += " WHERE " + " AND ".join(where_clauses)
 
     base_sql += " ORDER BY c.country_id ASC"
 
-    conn = get_db()
     cur = conn.cursor(dictionary=True)
     region_map = {}
     region_name_map = {}
@@ -72,58 +65,50 @@ def list_countries():
 
     try:
         total_count_sql = "SELECT COUNT(*) as cnt FROM countries"
-        cur.execute(total_count_sql)
-        total_count = cur.fetchone().get('cnt', 0)
+        total_count = cached_query(conn, total_count_sql, tables=("countries",), one=True).get('cnt', 0)
 
         cur.execute(base_sql, params)
         rows = cur.fetchall()
         colnames = [d[0] for d in cur.description]
 
         # country_code -> region map (full set)
-        cur.execute(
+        code_rows = cached_query(
+            conn,
             """
             SELECT country_code, region, country_name
             FROM countries
             WHERE region IS NOT NULL AND region != ''
-            """
+            """,
+            tables=("countries",),
         )
-        code_rows = cur.fetchall()
         region_map = {(r.get("country_code") or "").upper(): r.get("region") for r in code_rows}
 
         # country_name -> region map (full set)
         region_name_map = { (r.get('country_name') or ''): r.get('region') for r in code_rows if r.get('region') }
 
         # distinct region list
-        cur.execute(
+        region_rows = cached_query(
+            conn,
             """
             SELECT DISTINCT region
             FROM countries
             WHERE region IS NOT NULL AND region != ''
             ORDER BY region
-            """
+            """,
+            tables=("countries",),
         )
-        regions = [r["region"] for r in cur.fetchall()]
+        regions = [r["region"] for r in region_rows]
 
         # Build ISO2 -> has_data map for the frontend map widget.
-        # Query full country dataset to determine availability for the map
-        cur.execute("""
-            SELECT c.country_code,
-                (
-                    COALESCE((SELECT COUNT(*) FROM health_system hs WHERE hs.country_id = c.country_id),0) +
-                    COALESCE((SELECT COUNT(*) FROM energy_data ed WHERE ed.country_id = c.country_id),0) +
-                    COALESCE((SELECT COUNT(*) FROM freshwater_data fd WHERE fd.country_id = c.country_id),0) +
-                    COALESCE((SELECT COUNT(*) FROM greenhouse_emissions ge WHERE ge.country_id = c.country_id),0) +
-                    COALESCE((SELECT COUNT(*) FROM sustainability_data sd WHERE sd.country_id = c.country_id),0)
-                ) as data_count
-            FROM countries c
-        """)
-        iso3_to_iso2 = {v: k for k, v in ISO2_TO_ISO3.items()}
-        for r in cur.fetchall():
-            iso3 = (r.get('country_code') or '').upper()
-            iso2 = iso3_to_iso2.get(iso3)
-            if not iso2:
-                continue
-            has_data_by_iso2[iso2] = (r.get('data_count') or 0) > 0
+        # Availability comes from the precomputed country_data_coverage summary.
+        coverage_rows = cached_query(conn, """
+            SELECT country_id, SUM(row_count) AS data_count
+            FROM country_data_coverage
+            GROUP BY country_id
+        """, tables=("country_data_coverage",))
+        data_count_by_id = {r["country_id"]: r.get("data_count") or 0 for r in coverage_rows}
+        for country in get_resolver(conn).by_iso2.values():
+            has_data_by_iso2[country["iso2"]] = data_count_by_id.get(country["country_id"], 0) > 0
     finally:
         cur.close()
 
@@ -143,6 +128,7 @@ def list_countries():
 # 2. WIDGET API 
 # =========================================================
 @countries_bp.route("/api/stats", methods=["GET"])
+@conditional("countries", "health_system")
 def get_global_stats():
     """
     Navbar'daki widget için genel istatistikleri JSON olarak döner.
@@ -174,6 +160,7 @@ def get_global_stats():
 
 
 @countries_bp.route("/api/region-stats", methods=["GET"])
+@conditional(*ALL_DATA_TABLES)
 def get_region_stats():
     """Return aggregated stats for a given region, grouped by indicator type."""
     region = request.args.get("region")
@@ -267,6 +254,7 @@ def get_region_stats():
     return jsonify(stats)
 
 @countries_bp.route("/api/has-data/<string:iso2>", methods=["GET"])
+@conditional("countries", "country_data_coverage")
 def api_has_data(iso2: str):
     """
     Lightweight API used by the Countries tab & world map to determine
@@ -276,48 +264,15 @@ def api_has_data(iso2: str):
     of redirecting or rendering a template.
     """
     iso2 = iso2.upper()
-    iso3 = ISO2_TO_ISO3.get(iso2)
-    if not iso3:
-        return jsonify({"iso2": iso2, "has_data": False, "country_id": None})
-
     db = get_db()
-    cur = db.cursor(dictionary=True)
 
-    # Find country row by ISO3 code stored in DB
-    cur.execute(
-        """
-        SELECT country_id
-        FROM countries
-        WHERE UPPER(country_code) = %s
-        LIMIT 1
-        """,
-        (iso3,),
-    )
-    row = cur.fetchone()
-    if not row:
-        cur.close()
+    country = get_resolver(db).by_iso2.get(iso2)
+    if not country:
         return jsonify({"iso2": iso2, "has_data": False, "country_id": None})
 
-    country_id = row["country_id"]
+    country_id = country["country_id"]
 
-    total = 0
-    try:
-        for tbl in (
-            "health_system",
-            "energy_data",
-            "freshwater_data",
-            "greenhouse_emissions",
-            "sustainability_data",
-        ):
-            try:
-                cur.execute(f"SELECT COUNT(*) AS cnt FROM {tbl} WHERE country_id = %s", (country_id,))
-                cnt = cur.fetchone().get("cnt", 0)
-                total += int(cnt or 0)
-            except Exception:
-                # ignore missing tables or other issues and continue
-                continue
-    finally:
-        cur.close()
+    total = get_country_data_count(db, country_id)
 
     return jsonify(
         {
@@ -328,28 +283,10 @@ def api_has_data(iso2: str):
     )
 
 
-@countries_bp.route("/profile/<int:country_id>", methods=["GET"])
-def country_profile(country_id: int):
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    # Country header
-    cur.execute("""
-        SELECT country_id, country_name, country_code, region
-        FROM countries
-        WHERE country_id = %s
-        LIMIT 1
-    """, (country_id,))
-    country = cur.fetchone()
-    if not country:
-        cur.close()
-        return render_template(
-            "country_no_data.html",
-            message="Country not found."
-        )
-
+# Per-domain queries of the country profile (parameter: country_id)
+_PROFILE_QUERIES = {
     # HEALTH
-    cur.execute("""
+    "health": """
         SELECT
             hs.row_id AS id,
             hs.year,
@@ -363,11 +300,9 @@ def country_profile(country_id: int):
         WHERE hs.country_id = %s
         ORDER BY hs.year DESC, hid.indicator_name
         LIMIT 500
-    """, (country_id,))
-    health = cur.fetchall()
-
+    """,
     # ENERGY
-    cur.execute("""
+    "energy": """
         SELECT
             ed.data_id AS id,
             ed.year,
@@ -381,11 +316,9 @@ def country_profile(country_id: int):
         WHERE ed.country_id = %s
         ORDER BY ed.year DESC, eid.indicator_name
         LIMIT 500
-    """, (country_id,))
-    energy = cur.fetchall()
-
+    """,
     # FRESHWATER
-    cur.execute("""
+    "freshwater": """
         SELECT
             fd.data_id AS id,
             fd.year,
@@ -399,11 +332,9 @@ def country_profile(country_id: int):
         WHERE fd.country_id = %s
         ORDER BY fd.year DESC, fid.indicator_name
         LIMIT 500
-    """, (country_id,))
-    freshwater = cur.fetchall()
-
+    """,
     # GHG
-    cur.execute("""
+    "ghg": """
         SELECT
             ge.row_id AS id,
             ge.year,
@@ -417,11 +348,9 @@ def country_profile(country_id: int):
         WHERE ge.country_id = %s
         ORDER BY ge.year DESC, gid.indicator_name
         LIMIT 500
-    """, (country_id,))
-    ghg = cur.fetchall()
-
+    """,
     # SUSTAINABILITY
-    cur.execute("""
+    "sustainability": """
         SELECT
             sd.data_id AS id,
             sd.year,
@@ -435,45 +364,14 @@ def country_profile(country_id: int):
         WHERE sd.country_id = %s
         ORDER BY sd.year DESC, sid.indicator_name
         LIMIT 500
-    """, (country_id,))
-    sustainability = cur.fetchall()
+    """,
+}
 
-    return render_template(
-        "country_profile.html",
-        country=country,
-        health=health,
-        energy=energy,
-        freshwater=freshwater,
-        ghg=ghg,
-        sustainability=sustainability,
-    )
 
-@countries_bp.route("/region/<string:region_name>", methods=["GET"])
-def region_profile(region_name: str):
-    """Region profile page with aggregated data across all domains.
-    Region information is derived exclusively from countries.region column."""
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-    
-    # Verify region exists in countries table
-    cur.execute("""
-        SELECT DISTINCT region
-        FROM countries
-        WHERE region = %s
-        LIMIT 1
-    """, (region_name,))
-    region_check = cur.fetchone()
-    if not region_check:
-        cur.close()
-        return render_template(
-            "country_no_data.html",
-            message=f"Region not found: {region_name}"
-        )
-    
-    region = {"region": region_name}
-    
+# Queries of the region profile (parameter: region name)
+_REGION_QUERIES = {
     # Get countries in this region for the listing table
-    cur.execute("""
+    "region_countries": """
         SELECT 
             country_id,
             country_name,
@@ -481,11 +379,9 @@ def region_profile(region_name: str):
         FROM countries
         WHERE region = %s
         ORDER BY country_name
-    """, (region_name,))
-    region_countries = cur.fetchall()
-    
+    """,
     # HEALTH - Region-level aggregation
-    cur.execute("""
+    "health": """
         SELECT
             hid.indicator_name AS indicator,
             hid.unit_symbol AS unit,
@@ -501,11 +397,9 @@ def region_profile(region_name: str):
         GROUP BY hid.indicator_name, hid.unit_symbol, hs.year
         ORDER BY hs.year DESC, hid.indicator_name
         LIMIT 500
-    """, (region_name,))
-    health = cur.fetchall()
-    
+    """,
     # ENERGY - Region-level aggregation
-    cur.execute("""
+    "energy": """
         SELECT
             eid.indicator_name AS indicator,
             eid.measurement_unit AS unit,
@@ -521,11 +415,9 @@ def region_profile(region_name: str):
         GROUP BY eid.indicator_name, eid.measurement_unit, ed.year
         ORDER BY ed.year DESC, eid.indicator_name
         LIMIT 500
-    """, (region_name,))
-    energy = cur.fetchall()
-    
+    """,
     # FRESHWATER - Region-level aggregation
-    cur.execute("""
+    "freshwater": """
         SELECT
             fid.indicator_name AS indicator,
             fid.unit_of_measure AS unit,
@@ -541,11 +433,9 @@ def region_profile(region_name: str):
         GROUP BY fid.indicator_name, fid.unit_of_measure, fd.year
         ORDER BY fd.year DESC, fid.indicator_name
         LIMIT 500
-    """, (region_name,))
-    freshwater = cur.fetchall()
-    
+    """,
     # GHG - Region-level aggregation
-    cur.execute("""
+    "ghg": """
         SELECT
             gid.indicator_name AS indicator,
             gid.unit_symbol AS unit,
@@ -561,11 +451,9 @@ def region_profile(region_name: str):
         GROUP BY gid.indicator_name, gid.unit_symbol, ge.year
         ORDER BY ge.year DESC, gid.indicator_name
         LIMIT 500
-    """, (region_name,))
-    ghg = cur.fetchall()
-    
+    """,
     # SUSTAINABILITY - Region-level aggregation
-    cur.execute("""
+    "sustainability": """
         SELECT
             sid.indicator_name AS indicator,
             NULL AS unit,
@@ -581,12 +469,10 @@ def region_profile(region_name: str):
         GROUP BY sid.indicator_name, sd.year
         ORDER BY sd.year DESC, sid.indicator_name
         LIMIT 500
-    """, (region_name,))
-    sustainability = cur.fetchall()
-    
-    # Countries with missing data are placed at the bottom 
+    """,
+    # Countries with missing data are placed at the bottom
     # This will be used to sort countries in the region listing
-    cur.execute("""
+    "countries_with_metrics": """
         SELECT
             c.country_id,
             c.country_name,
@@ -598,95 +484,119 @@ def region_profile(region_name: str):
         GROUP BY c.country_id, c.country_name, c.country_code
         ORDER BY 
             CASE WHEN AVG(CASE WHEN ge.ghg_indicator_id = 6 THEN ge.indicator_value END) IS NULL THEN 1 ELSE 0 END,
-            AVG(CASE WHEN ge.ghg_indicator_id = 6 THEN ge.indicator_value END) DESC NULLS LAST,
+            AVG(CASE WHEN ge.ghg_indicator_id = 6 THEN ge.indicator_value END) DESC,
             c.country_name
+    """,
+}
+
+
+@countries_bp.route("/profile/<int:country_id>", methods=["GET"])
+@conditional(*ALL_DATA_TABLES)
+def country_profile(country_id: int):
+    db = get_db()
+    cur = db.cursor(dictionary=True)
+
+    # Country header
+    cur.execute("""
+        SELECT country_id, country_name, country_code, region
+        FROM countries
+        WHERE country_id = %s
+        LIMIT 1
+    """, (country_id,))
+    country = cur.fetchone()
+    if not country:
+        cur.close()
+        return render_template(
+            "country_no_data.html",
+            message="Country not found."
+        )
+
+    cur.close()
+
+    # the domain queries are independent: run them concurrently
+    try:
+        results = run_parallel(
+            {name: (sql, (country_id,)) for name, sql in _PROFILE_QUERIES.items()}, conn=db
+        )
+    except QueryTimeoutError:
+        abort(504)
+
+    return render_template(
+        "country_profile.html",
+        country=country,
+        health=results["health"],
+        energy=results["energy"],
+        freshwater=results["freshwater"],
+        ghg=results["ghg"],
+        sustainability=results["sustainability"],
+    )
+
+@countries_bp.route("/region/<string:region_name>", methods=["GET"])
+@conditional(*ALL_DATA_TABLES)
+def region_profile(region_name: str):
+    """Region profile page with aggregated data across all domains.
+    Region information is derived exclusively from countries.region column."""
+    db = get_db()
+    cur = db.cursor(dictionary=True)
+    
+    # Verify region exists in countries table
+    cur.execute("""
+        SELECT DISTINCT region
+        FROM countries
+        WHERE region = %s
+        LIMIT 1
     """, (region_name,))
-    countries_with_metrics = cur.fetchall()
+    region_check = cur.fetchone()
+    if not region_check:
+        cur.close()
+        return render_template(
+            "country_no_data.html",
+            message=f"Region not found: {region_name}"
+        )
     
     cur.close()
+    region = {"region": region_name}
+    
+    # listing, per-domain aggregates and the ranking are independent queries
+    try:
+        results = run_parallel(
+            {name: (sql, (region_name,)) for name, sql in _REGION_QUERIES.items()}, conn=db
+        )
+    except QueryTimeoutError:
+        abort(504)
     
     return render_template(
         "region_profile.html",
         region=region,
-        health=health,
-        energy=energy,
-        freshwater=freshwater,
-        ghg=ghg,
-        sustainability=sustainability,
-        countries=countries_with_metrics,
-        region_countries=region_countries
+        health=results["health"],
+        energy=results["energy"],
+        freshwater=results["freshwater"],
+        ghg=results["ghg"],
+        sustainability=results["sustainability"],
+        countries=results["countries_with_metrics"],
+        region_countries=results["region_countries"]
     )
 
 
 @countries_bp.route("/resolve/<string:iso2>", methods=["GET"])
 def resolve_country(iso2):
     iso2 = iso2.upper()
-    iso3 = ISO2_TO_ISO3.get(iso2)
-    if not iso3:
-        # show friendly no-data page instead of 404 for unmapped codes
-        return render_template(
-            "country_no_data.html",
-            message=f"Country code not mapped: {iso2}"
-        )
-
     db = get_db()
-    cur = db.cursor(dictionary=True)
-
-   
-    cur.execute("""
-        SELECT country_id
-        FROM countries
-        WHERE UPPER(country_code) = %s
-        LIMIT 1
-    """, (iso3,))
 
-    row = cur.fetchone()
-    if not row:
-        cur.close()
+    country = get_resolver(db).by_iso2.get(iso2)
+    if not country:
+        # show friendly no-data page instead of 404 for unmapped codes
         return render_template(
             "country_no_data.html",
-            message=f"Country not found for ISO3: {iso3}"
+            message=f"Country code not mapped: {iso2}"
         )
 
-    country_id = row["country_id"]
+    country_id = country["country_id"]
 
     # Check whether this country has any recorded data across main data tables
-    total = 0
-    try:
-        for tbl in (
-            'health_system',
-            'energy_data',
-            'freshwater_data',
-            'greenhouse_emissions',
-            'sustainability_data',
-        ):
-            try:
-                cur.execute(f"SELECT COUNT(*) AS cnt FROM {tbl} WHERE country_id = %s", (country_id,))
-                cnt = cur.fetchone().get('cnt', 0)
-                total += int(cnt or 0)
-            except Exception:
-                # ignore missing tables or other issues and continue
-                continue
-    finally:
-        cur.close()
+    total = get_country_data_count(db, country_id)
 
     if total == 0:
-        db2 = get_db()
-        cur2 = db2.cursor(dictionary=True)
-        try:
-            cur2.execute(
-                """
-                SELECT country_id, country_name, country_code, region
-                FROM countries
-                WHERE country_id = %s
-                LIMIT 1
-                """,
-                (country_id,)
-            )
-            country = cur2.fetchone()
-        finally:
-            cur2.close()
-
         return render_template(
             "country_no_data.html",
             country=country,
@@ -694,246 +604,3 @@ def resolve_country(iso2):
         )
 
     return redirect(url_for("countries.country_profile", country_id=country_id))
-
-ISO2_TO_ISO3 ={
-  "AF": "AFG",
-  "AL": "ALB",
-  "DZ": "DZA",
-  "AS": "ASM",
-  "AD": "AND",
-  "AO": "AGO",
-  "AI": "AIA",
-  "AQ": "ATA",
-  "AG": "ATG",
-  "AR": "ARG",
-  "AM": "ARM",
-  "AW": "ABW",
-  "AU": "AUS",
-  "AT": "AUT",
-  "AZ": "AZE",
-  "BS": "BHS",
-  "BH": "BHR",
-  "BD": "BGD",
-  "BB": "BRB",
-  "BY": "BLR",
-  "BE": "BEL",
-  "BZ": "BLZ",
-  "BJ": "BEN",
-  "BM": "BMU",
-  "BT": "BTN",
-  "BO": "BOL",
-  "BA": "BIH",
-  "BW": "BWA",
-  "BR": "BRA",
-  "IO": "IOT",
-  "BN": "BRN",
-  "BG": "BGR",
-  "BF": "BFA",
-  "BI": "BDI",
-  "KH": "KHM",
-  "CM": "CMR",
-  "CA": "CAN",
-  "CV": "CPV",
-  "KY": "CYM",
-  "CF": "CAF",
-  "TD": "TCD",
-  "CL": "CHL",
-  "CN": "CHN",
-  "CX": "CXR",
-  "CC": "CCK",
-  "CO": "COL",
-  "KM": "COM",
-  "CG": "COG",
-  "CD": "COD",
-  "CK": "COK",
-  "CR": "CRI",
-  "CI": "CIV",
-  "HR": "HRV",
-  "CU": "CUB",
-  "CY": "CYP",
-  "CZ": "CZE",
-  "DK": "DNK",
-  "DJ": "DJI",
-  "DM": "DMA",
-  "DO": "DOM",
-  "EC": "ECU",
-  "EG": "EGY",
-  "SV": "SLV",
-  "GQ": "GNQ",
-  "ER": "ERI",
-  "EE": "EST",
-  "SZ": "SWZ",
-  "ET": "ETH",
-  "FK": "FLK",
-  "FO": "FRO",
-  "FJ": "FJI",
-  "FI": "FIN",
-  "FR": "FRA",
-  "GF": "GUF",
-  "PF": "PYF",
-  "TF": "ATF",
-  "GA": "GAB",
-  "GM": "GMB",
-  "GE": "GEO",
-  "DE": "DEU",
-  "GH": "GHA",
-  "GI": "GIB",
-  "GR": "GRC",
-  "GL": "GRL",
-  "GD": "GRD",
-  "GP": "GLP",
-  "GU": "GUM",
-  "GT": "GTM",
-  "GG": "GGY",
-  "GN": "GIN",
-  "GW": "GNB",
-  "GY": "GUY",
-  "HT": "HTI",
-  "HN": "HND",
-  "HK": "HKG",
-  "HU": "HUN",
-  "IS": "ISL",
-  "IN": "IND",
-  "ID": "IDN",
-  "IR": "IRN",
-  "IQ": "IRQ",
-  "IE": "IRL",
-  "IM": "IMN",
-  "IL": "ISR",
-  "IT": "ITA",
-  "JM": "JAM",
-  "JP": "JPN",
-  "JE": "JEY",
-  "JO": "JOR",
-  "KZ": "KAZ",
-  "KE": "KEN",
-  "KI": "KIR",
-  "KP": "PRK",
-  "KR": "KOR",
-  "KW": "KWT",
-  "KG": "KGZ",
-  "LA": "LAO",
-  "LV": "LVA",
-  "LB": "LBN",
-  "LS": "LSO",
-  "LR": "LBR",
-  "LY": "LBY",
-  "LI": "LIE",
-  "LT": "LTU",
-  "LU": "LUX",
-  "MO": "MAC",
-  "MG": "MDG",
-  "MW": "MWI",
-  "MY": "MYS",
-  "MV": "MDV",
-  "ML": "MLI",
-  "MT": "MLT",
-  "MH": "MHL",
-  "MQ": "MTQ",
-  "MR": "MRT",
-  "MU": "MUS",
-  "YT": "MYT",
-  "MX": "MEX",
-  "FM": "FSM",
-  "MD": "MDA",
-  "MC": "MCO",
-  "MN": "MNG",
-  "ME": "MNE",
-  "MS": "MSR",
-  "MA": "MAR",
-  "MZ": "MOZ",
-  "MM": "MMR",
-  "NA": "NAM",
-  "NR": "NRU",
-  "NP": "NPL",
-  "NL": "NLD",
-  "NC": "NCL",
-  "NZ": "NZL",
-  "NI": "NIC",
-  "NE": "NER",
-  "NG": "NGA",
-  "NU": "NIU",
-  "NF": "NFK",
-  "MK": "MKD",
-  "MP": "MNP",
-  "NO": "NOR",
-  "OM": "OMN",
-  "PK": "PAK",
-  "PW": "PLW",
-  "PS": "PSE",
-  "PA": "PAN",
-  "PG": "PNG",
-  "PY": "PRY",
-  "PE": "PER",
-  "PH": "PHL",
-  "PN": "PCN",
-  "PL": "POL",
-  "PT": "PRT",
-  "PR": "PRI",
-  "QA": "QAT",
-  "RE": "REU",
-  "RO": "ROU",
-  "RU": "RUS",
-  "RW": "RWA",
-  "BL": "BLM",
-  "SH": "SHN",
-  "KN": "KNA",
-  "LC": "LCA",
-  "MF": "MAF",
-  "PM": "SPM",
-  "VC": "VCT",
-  "WS": "WSM",
-  "SM": "SMR",
-  "ST": "STP",
-  "SA": "SAU",
-  "SN": "SEN",
-  "RS": "SRB",
-  "SC": "SYC",
-  "SL": "SLE",
-  "SG": "SGP",
-  "SX": "SXM",
-  "SK": "SVK",
-  "SI": "SVN",
-  "SB": "SLB",
-  "SO": "SOM",
-  "ZA": "ZAF",
-  "GS": "SGS",
-  "SS": "SSD",
-  "ES": "ESP",
-  "LK": "LKA",
-  "SD": "SDN",
-  "SR": "SUR",
-  "SE": "SWE",
-  "CH": "CHE",
-  "SY": "SYR",
-  "TW": "TWN",
-  "TJ": "TJK",
-  "TZ": "TZA",
-  "TH": "THA",
-  "TL": "TLS",
-  "TG": "TGO",
-  "TK": "TKL",
-  "TO": "TON",
-  "TT": "TTO",
-  "TN": "TUN",
-  "TR": "TUR",
-  "TM": "TKM",
-  "TC": "TCA",
-  "TV": "TUV",
-  "UG": "UGA",
-  "UA": "UKR",
-  "AE": "ARE",
-  "GB": "GBR",
-  "US": "USA",
-  "UY": "URY",
-  "UZ": "UZB",
-  "VU": "VUT",
-  "VE": "VEN",
-  "VN": "VNM",
-  "VG": "VGB",
-  "VI": "VIR",
-  "YE": "YEM",
-  "ZM": "ZMB",
-  "ZW": "ZWE",
-  "XK": "XKX"
-}
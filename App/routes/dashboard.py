@@ -1,153 +1,93 @@
-from flask import Blueprint, render_template, session
-from App.db import get_db
+from flask import Blueprint, render_template, session, jsonify
+from App.db import get_db, get_pool_stats
+from App.cache import cached_query, get_cache_stats
+from App.coverage import get_domain_coverage_stats
+from App.domains import DOMAINS
+from App.statements import get_statement_stats
+from App.audit import get_audit_stats
+from App.conditional import conditional
+from App.routes.login import admin_required
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
 
 @dashboard_bp.route("/dashboard")
+@conditional("countries", "country_data_coverage", "domain_coverage_stats")
 def dashboard():
     is_admin = session.get("team_no") == 1
 
     db = get_db()
-    cur = db.cursor(dictionary=True)
 
     coverage = {
         "countries": 0,
         "global_min_year": None,
         "global_max_year": None,
         "completeness_pct": None,
-        "indicators": {
-            "ghg": 0,
-            "health": 0,
-            "energy": 0,
-            "freshwater": 0,
-            "sustainability": 0,
-        },
+        "indicators": {name: 0 for name in DOMAINS},
         "domains": {},
     }
 
+    # Everything below comes from domain_coverage_stats, kept up to date by
+    # the loader and the add/edit/delete handlers (see App/coverage.py).
     try:
-        # Total country count
-        cur.execute("SELECT COUNT(*) AS cnt FROM countries")
-        row = cur.fetchone()
-        coverage["countries"] = row["cnt"] if row and row.get("cnt") is not None else 0
-
-        domains = [
-            {
-                "name": "health",
-                "fact_table": "health_system",
-                "detail_table": "health_indicator_details",
-                "indicator_pk": "health_indicator_id",
-                "value_column": "indicator_value",
-            },
-            {
-                "name": "energy",
-                "fact_table": "energy_data",
-                "detail_table": "energy_indicator_details",
-                "indicator_pk": "energy_indicator_id",
-                "value_column": "indicator_value",
-            },
-            {
-                "name": "freshwater",
-                "fact_table": "freshwater_data",
-                "detail_table": "freshwater_indicator_details",
-                "indicator_pk": "freshwater_indicator_id",
-                "value_column": "indicator_value",
-            },
-            {
-                "name": "ghg",
-                "fact_table": "greenhouse_emissions",
-                "detail_table": "ghg_indicator_details",
-                "indicator_pk": "ghg_indicator_id",
-                "value_column": "indicator_value",
-            },
-            {
-                "name": "sustainability",
-                "fact_table": "sustainability_data",
-                "detail_table": "sustainability_indicator_details",
-                "indicator_pk": "sus_indicator_id",
-                "value_column": "indicator_value",
-            },
-        ]
-
-        global_min_year = None
-        global_max_year = None
-        total_expected = 0
-        total_actual = 0
-        countries_count = coverage["countries"] or 0
-
-        for d in domains:
-            # Indicator count per domain
-            try:
-                cur.execute(
-                    f"SELECT COUNT(*) AS cnt FROM {d['detail_table']}"
-                )
-                row = cur.fetchone()
-                ind_cnt = row["cnt"] if row and row.get("cnt") is not None else 0
-            except Exception:
-                ind_cnt = 0
-            coverage["indicators"][d["name"]] = ind_cnt
-
-            # Year range, country coverage and actual record count (non-null values)
-            try:
-                cur.execute(
-                    f"""
-                    SELECT
-                        MIN(year) AS min_year,
-                        MAX(year) AS max_year,
-                        COUNT(*) AS records,
-                        COUNT(DISTINCT country_id) AS countries_with_data
-                    FROM {d['fact_table']}
-                    WHERE {d['value_column']} IS NOT NULL
-                    """
-                )
-                stats = cur.fetchone() or {}
-            except Exception:
-                stats = {}
-
-            min_year = stats.get("min_year")
-            max_year = stats.get("max_year")
-            records = stats.get("records") or 0
-            domain_countries = stats.get("countries_with_data") or 0
-
-            domain_coverage_pct = None
-            if countries_count > 0 and domain_countries >= 0:
-                domain_coverage_pct = round(
-                    (float(domain_countries) / float(countries_count)) * 100.0, 1
-                )
-
-            coverage["domains"][d["name"]] = {
-                "indicators": ind_cnt,
-                "min_year": min_year,
-                "max_year": max_year,
-                "country_coverage_pct": domain_coverage_pct,
-            }
-
-            if min_year is None or max_year is None or ind_cnt == 0 or countries_count == 0:
-                continue
-
-            if global_min_year is None or (min_year is not None and min_year < global_min_year):
-                global_min_year = min_year
-            if global_max_year is None or (max_year is not None and max_year > global_max_year):
-                global_max_year = max_year
-
-            year_span = max_year - min_year + 1
-            if year_span <= 0:
-                continue
-
-            expected = countries_count * year_span * ind_cnt
-            total_expected += expected
-            total_actual += records
-
-        coverage["global_min_year"] = global_min_year
-        coverage["global_max_year"] = global_max_year
-
-        if total_expected > 0 and total_actual >= 0:
-            coverage["completeness_pct"] = round(
-                (float(total_actual) / float(total_expected)) * 100.0, 1
+        stats_by_domain, countries_count = get_domain_coverage_stats(db)
+    except Exception:
+        stats_by_domain, countries_count = {}, None
+    if countries_count is None:
+        row = cached_query(db, "SELECT COUNT(*) AS cnt FROM countries", tables=("countries",), one=True)
+        countries_count = row["cnt"] if row and row.get("cnt") is not None else 0
+    coverage["countries"] = countries_count
+
+    global_min_year = None
+    global_max_year = None
+    total_expected = 0
+    total_actual = 0
+
+    for name in DOMAINS:
+        stats = stats_by_domain.get(name) or {}
+        ind_cnt = stats.get("indicators") or 0
+        min_year = stats.get("min_year")
+        max_year = stats.get("max_year")
+        records = stats.get("records") or 0
+        domain_countries = stats.get("countries") or 0
+        coverage["indicators"][name] = ind_cnt
+
+        domain_coverage_pct = None
+        if countries_count > 0:
+            domain_coverage_pct = round(
+                (float(domain_countries) / float(countries_count)) * 100.0, 1
             )
-    finally:
-        cur.close()
+
+        coverage["domains"][name] = {
+            "indicators": ind_cnt,
+            "min_year": min_year,
+            "max_year": max_year,
+            "country_coverage_pct": domain_coverage_pct,
+        }
+
+        if min_year is None or max_year is None or ind_cnt == 0 or countries_count == 0:
+            continue
+
+        if global_min_year is None or min_year < global_min_year:
+            global_min_year = min_year
+        if global_max_year is None or max_year > global_max_year:
+            global_max_year = max_year
+
+        year_span = max_year - min_year + 1
+        if year_span <= 0:
+            continue
+
+        expected = countries_count * year_span * ind_cnt
+        total_expected += expected
+        total_actual += records
+
+    coverage["global_min_year"] = global_min_year
+    coverage["global_max_year"] = global_max_year
+
+    if total_expected > 0 and total_actual >= 0:
+        coverage["completeness_pct"] = round(
+            (float(total_actual) / float(total_expected)) * 100.0, 1
+        )
 
     # Domain shortcuts for hero section (single source of truth, navbar order)
     domains = [
@@ -220,3 +160,39 @@ def dashboard():
         coverage=coverage,
         domain_shortcuts=domains_meta,
     )
+
+
+@dashboard_bp.route("/dashboard/api/pool-stats")
+@admin_required
+def pool_stats():
+    """
+    Connection pool metrics (checkouts, waits, wait time, recycled connections).
+    """
+    return jsonify(get_pool_stats())
+
+
+@dashboard_bp.route("/dashboard/api/cache-stats")
+@admin_required
+def cache_stats():
+    """
+    Query cache metrics (hits, misses, evictions, table versions).
+    """
+    return jsonify(get_cache_stats())
+
+
+@dashboard_bp.route("/dashboard/api/statement-stats")
+@admin_required
+def statement_stats():
+    """
+    Prepared-statement cache metrics (prepared, reused, registered statements).
+    """
+    return jsonify(get_statement_stats())
+
+
+@dashboard_bp.route("/dashboard/api/audit-stats")
+@admin_required
+def audit_stats():
+    """
+    Audit writer metrics (queued, written, batches, spilled to / replayed from the fallback file).
+    """
+    return jsonify(get_audit_stats())
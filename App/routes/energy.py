@@ -3,6 +3,16 @@ from flask import (
     Blueprint, render_template, request, redirect, url_for, flash, session, abort
 )
 from App.db import get_db
+from App.pagination import KeysetPager, cached_count
+from App.cache import cached_query, bump_table_versions
+from App.timeseries import build_global_averages, timeseries_response
+from App.trends import trends_response
+from App.details import details_response
+from App.audit import record_audit
+from App.export import export_response
+from App.conditional import conditional, domain_tables
+from App.search import text_condition
+from App.coverage import refresh_country_coverage, get_record_country_id
 from App.routes.login import admin_required, editor_required
 
 energy_bp = Blueprint("energy", __name__, url_prefix="/energy")
@@ -10,43 +20,36 @@ energy_bp = Blueprint("energy", __name__, url_prefix="/energy")
 # --- HELPER: Load Lists for Dropdowns ---
 def _load_countries_and_indicators():
     db = get_db()
-    cur = db.cursor(dictionary=True)
     
     # 1. Get Countries
-    cur.execute("SELECT country_id, country_name FROM countries ORDER BY country_name")
-    countries = cur.fetchall()
+    countries = cached_query(
+        db, "SELECT country_id, country_name FROM countries ORDER BY country_name", tables=("countries",)
+    )
     
     # 2. Get Energy Indicators 
-    cur.execute("""
+    indicators = cached_query(db, """
         SELECT energy_indicator_id, indicator_name, measurement_unit 
         FROM energy_indicator_details 
         ORDER BY indicator_name
-    """)
-    indicators = cur.fetchall()
+    """, tables=("energy_indicator_details",))
     
     return countries, indicators
 
-# --- 1. READ (LIST + FILTER) ---
-@energy_bp.route("/", methods=["GET"])
-def list_energy():
+# --- HELPER: WHERE clause for the list filters (aliases c, e) ---
+def _list_filters():
     country_name = request.args.get("country", type=str)
     year_min = request.args.get("year_min", type=int)
     year_max = request.args.get("year_max", type=int)
-    sort_by = request.args.get("sort", default="country", type=str)
-    sort_order = request.args.get("order", default="asc", type=str)
-    page = request.args.get("page", default=1, type=int)
-    per_page = 50
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    # Build WHERE clause
     where_clauses = []
     params = []
 
     if country_name:
-        where_clauses.append("c.country_name LIKE %s")
-        params.append(f"%{country_name}%")
+        name_sql, name_params = text_condition(
+            get_db(), country_name, ("e.country_id", "countries", ("country_name",))
+        )
+        where_clauses.append(name_sql)
+        params.extend(name_params)
 
     if year_min:
         where_clauses.append("e.year >= %s")
@@ -57,6 +60,24 @@ def list_energy():
         params.append(year_max)
 
     where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+    return where_sql, params
+
+# --- 1. READ (LIST + FILTER) ---
+@energy_bp.route("/", methods=["GET"])
+@conditional(*domain_tables("energy"))
+def list_energy():
+    country_name = request.args.get("country", type=str)
+    year_min = request.args.get("year_min", type=int)
+    year_max = request.args.get("year_max", type=int)
+    sort_by = request.args.get("sort", default="country", type=str)
+    sort_order = request.args.get("order", default="asc", type=str)
+    page = request.args.get("page", default=1, type=int)
+    per_page = 50
+
+    db = get_db()
+    cur = db.cursor(dictionary=True)
+
+    where_sql, params = _list_filters()
 
     # Get summary rows grouped by (country, year)
     query = f"""
@@ -71,15 +92,16 @@ def list_energy():
         WHERE {where_sql}
     """
 
-    # Sorting
+    # Sorting (country_id + year break ties so keyset cursors are unique)
     sort_map = {
-        "country": "country_name",
-        "year": "year",
-        "region": "region"
+        "country": ("c.country_name", "country_name", False),
+        "year": ("e.year", "year", False),
+        "region": ("c.region", "region", True),
     }
-    sort_column = sort_map.get(sort_by, "country_name")
-    order = "ASC" if sort_order == "asc" else "DESC"
-    query += f" ORDER BY {sort_column} {order}"
+    sort_key = sort_map.get(sort_by, sort_map["country"])
+    keys = [sort_key] + [
+        k for k in (("c.country_id", "country_id", False), ("e.year", "year", False)) if k[0] != sort_key[0]
+    ]
 
     # Get total count for pagination
     count_query = f"""
@@ -88,162 +110,48 @@ def list_energy():
         INNER JOIN energy_data e ON c.country_id = e.country_id
         WHERE {where_sql}
     """
-    cur.execute(count_query, params)
-    total_count = cur.fetchone()['total']
+    total_count = cached_count(cur, count_query, params)
     total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 1
 
-    # Apply pagination
-    offset = (page - 1) * per_page
-    query += f" LIMIT {per_page} OFFSET {offset}"
+    # Apply pagination (keyset when a cursor is given, OFFSET otherwise)
+    pager = KeysetPager(
+        keys, sort_order != "asc", request.args.get("cursor", type=str), per_page,
+        signature=f"{sort_key[0]}:{sort_order}",
+    )
+    seek_sql, seek_params = pager.where()
+    if seek_sql:
+        query += f" AND {seek_sql}"
+    query += f" ORDER BY {pager.order_by()} {pager.limit_sql(page)}"
 
-    cur.execute(query, params)
-    summary_rows = cur.fetchall()
+    cur.execute(query, params + seek_params)
+    summary_rows = pager.finish(cur.fetchall(), page, total_pages)
 
-    # Get detailed data for each country-year pair
-    detailed_data = {}
-    time_series_data = {}  # For chart visualization
-    
-    # Get unique country IDs from summary rows
-    country_ids = list(set(row['country_id'] for row in summary_rows))
-    
-    # Prepare time_series_data for all countries (same structure as GHG)
-    for country_id in country_ids:
-        # Get all available indicators from database
-        cur.execute("""
-            SELECT energy_indicator_id, indicator_name, measurement_unit
-            FROM energy_indicator_details
-            ORDER BY energy_indicator_id
-        """)
-        all_indicators = cur.fetchall()
-        indicator_map = {row['energy_indicator_id']: {'name': row['indicator_name'], 'unit': row['measurement_unit'] or ''} for row in all_indicators}
-        
-        # Get all years for this country
-        cur.execute("""
-            SELECT DISTINCT year
-            FROM energy_data
-            WHERE country_id = %s
-            ORDER BY year ASC
-        """, (country_id,))
-        all_years = [row['year'] for row in cur.fetchall()]
-        
-        # Build time-series data for each indicator dynamically
-        country_ts_by_indicator = {}
-        for indicator_id, indicator_info in indicator_map.items():
-            cur.execute("""
-                SELECT year, indicator_value
-                FROM energy_data
-                WHERE country_id = %s AND energy_indicator_id = %s AND indicator_value IS NOT NULL
-                ORDER BY year ASC
-            """, (country_id, indicator_id))
-            indicator_data = {row['year']: float(row['indicator_value']) for row in cur.fetchall()}
-            
-            # Build complete time-series with all years (null for missing years)
-            country_ts_by_indicator[indicator_id] = [
-                {
-                    'year': year,
-                    'value': indicator_data.get(year)
-                }
-                for year in all_years
-            ]
-        
-        # Get region for region average calculation
-        cur.execute("SELECT region FROM countries WHERE country_id = %s", (country_id,))
-        region_result = cur.fetchone()
-        region_name = region_result['region'] if region_result else None
-        
-        # Get region average time-series for all indicators if region exists
-        region_avg_by_indicator = {}
-        if region_name:
-            for indicator_id in indicator_map.keys():
-                cur.execute("""
-                    SELECT year, AVG(indicator_value) as avg_value
-                    FROM energy_data e
-                    INNER JOIN countries c ON c.country_id = e.country_id
-                    WHERE c.region = %s AND e.energy_indicator_id = %s AND e.indicator_value IS NOT NULL
-                    GROUP BY year
-                    ORDER BY year ASC
-                """, (region_name, indicator_id))
-                region_data = {row['year']: float(row['avg_value']) for row in cur.fetchall()}
-                
-                region_avg_by_indicator[indicator_id] = [
-                    {
-                        'year': year,
-                        'value': region_data.get(year)
-                    }
-                    for year in all_years
-                ]
-        
-        time_series_data[country_id] = {
-            'indicators': indicator_map,
-            'country_data': country_ts_by_indicator,
-            'region_avg': region_avg_by_indicator,
-            'region': region_name,
-            'years': all_years
-        }
-    
-    # Get detailed data for each country-year pair
-    for row in summary_rows:
-        country_id = row['country_id']
-        year = row['year']
-        key = f"{country_id}-{year}"
-
-        # Get all indicators for this country-year pair
-        detail_query = """
-            SELECT 
-                e.data_id,
-                e.energy_indicator_id,
-                e.indicator_value,
-                e.data_source,
-                ind.indicator_name,
-                ind.measurement_unit
-            FROM energy_data e
-            INNER JOIN energy_indicator_details ind ON e.energy_indicator_id = ind.energy_indicator_id
-            WHERE e.country_id = %s AND e.year = %s
-            ORDER BY ind.indicator_name
-        """
-        cur.execute(detail_query, (country_id, year))
-        detailed_data[key] = cur.fetchall()
+    # Indicator details of a row are loaded when it is expanded (/energy/api/details)
 
     # Get countries and indicators for dropdowns
-    cur.execute("SELECT country_id, country_name, country_code FROM countries ORDER BY country_name")
-    countries = cur.fetchall()
-
-    cur.execute("""
-        SELECT energy_indicator_id, indicator_name, measurement_unit 
-        FROM energy_indicator_details 
+    countries = cached_query(
+        db,
+        "SELECT country_id, country_name, country_code FROM countries ORDER BY country_name",
+        tables=("countries",),
+    )
+    indicators = cached_query(
+        db,
+        """
+        SELECT energy_indicator_id, indicator_name, measurement_unit
+        FROM energy_indicator_details
         ORDER BY indicator_name
-    """)
-    indicators = cur.fetchall()
+        """,
+        tables=("energy_indicator_details",),
+    )
 
     # Calculate global average by year for all indicators (for Trend Explorer)
-    global_avg_by_year = {}
-    for indicator in indicators:
-        indicator_id = indicator['energy_indicator_id']
-        cur.execute("""
-            SELECT 
-                year,
-                AVG(indicator_value) as avg_value,
-                COUNT(DISTINCT country_id) as country_count
-            FROM energy_data
-            WHERE energy_indicator_id = %s 
-            AND indicator_value IS NOT NULL
-            GROUP BY year
-            ORDER BY year ASC
-        """, (indicator_id,))
-        global_avg_by_year[indicator_id] = [
-            {
-                'year': row['year'],
-                'avg_value': float(row['avg_value']),
-                'country_count': row['country_count']
-            }
-            for row in cur.fetchall()
-        ]
+    global_avg_by_year = build_global_averages(
+        cur, "energy", [indicator['energy_indicator_id'] for indicator in indicators], conn=db
+    )
 
     return render_template(
         "energy_list.html",
         summary_rows=summary_rows,
-        detailed_data=detailed_data,
-        time_series_data=time_series_data,
         global_avg_by_year=global_avg_by_year,
         current_country=country_name,
         current_year_min=year_min,
@@ -253,10 +161,51 @@ def list_energy():
         page=page,
         total_pages=total_pages,
         per_page=per_page,
+        next_cursor=pager.next_cursor,
+        prev_cursor=pager.prev_cursor,
         countries=countries,
         indicators=indicators
     )
 
+
+# --- 1b. TRENDS (JSON) ---
+@energy_bp.route("/api/trends", methods=["GET"])
+@conditional(*domain_tables("energy"))
+def api_trends():
+    return trends_response(get_db(), "energy")
+
+
+# --- 1c. TIME SERIES (JSON, fetched by the charts on demand) ---
+@energy_bp.route("/api/timeseries", methods=["GET"])
+@conditional(*domain_tables("energy"))
+def api_timeseries():
+    return timeseries_response(get_db(), "energy")
+
+
+# --- 1d. ROW DETAILS (JSON, fetched when a summary row is expanded) ---
+@energy_bp.route("/api/details", methods=["GET"])
+@conditional(*domain_tables("energy"))
+def api_details():
+    return details_response(get_db(), "energy", with_trends=True)
+
+
+# --- 1e. EXPORT (streamed CSV / NDJSON, same filters as the list) ---
+@energy_bp.route("/export.<any(csv, ndjson):fmt>", methods=["GET"])
+def export_energy(fmt):
+    where_sql, params = _list_filters()
+    sql = f"""
+        SELECT e.data_id, e.country_id, c.country_name, c.country_code, c.region,
+               e.energy_indicator_id, ind.indicator_name, ind.indicator_code, ind.measurement_unit,
+               e.year, e.indicator_value, e.data_source
+        FROM energy_data e
+        JOIN countries c ON e.country_id = c.country_id
+        JOIN energy_indicator_details ind ON e.energy_indicator_id = ind.energy_indicator_id
+        WHERE {where_sql}
+        ORDER BY e.data_id
+    """
+    return export_response("energy", sql, params, fmt)
+
+
 # --- 2. CREATE (ADD) ---
 @energy_bp.route("/add", methods=["GET", "POST"])
 @editor_required
@@ -281,17 +230,15 @@ def add_energy():
             """
             cur.execute(insert_sql, (c_id, i_id, val, year, note))
             new_id = cur.lastrowid # Get the ID of the row we just created
-            
+
+            refresh_country_coverage(db, "energy", c_id)
+            db.commit()
+            bump_table_versions("energy_data", "country_data_coverage")
+
             # --- AUDIT LOG ---
             current_student_id = session.get("student_id")
             if current_student_id:
-                audit_sql = """
-                    INSERT INTO audit_logs (student_id, action_type, table_name, record_id)
-                    VALUES (%s, %s, %s, %s)
-                """
-                cur.execute(audit_sql, (current_student_id, "CREATE", "energy_data", new_id))
-            
-            db.commit()
+                record_audit(current_student_id, "CREATE", "energy_data", new_id)
             flash("Record added successfully.", "success")
             return redirect(url_for("energy.list_energy"))
 
@@ -348,16 +295,14 @@ def edit_energy(id):
             cur = db.cursor() # reset cursor without dictionary for standard execution
             cur.execute(update_sql, (val, year, note, id))
 
+            refresh_country_coverage(db, "energy", record["country_id"])
+            db.commit()
+            bump_table_versions("energy_data", "country_data_coverage")
+
             # --- AUDIT LOG ---
             current_student_id = session.get("student_id")
             if current_student_id:
-                audit_sql = """
-                    INSERT INTO audit_logs (student_id, action_type, table_name, record_id)
-                    VALUES (%s, %s, %s, %s)
-                """
-                cur.execute(audit_sql, (current_student_id, "UPDATE", "energy_data", id))
-            
-            db.commit()
+                record_audit(current_student_id, "UPDATE", "energy_data", id)
             flash("Record updated successfully.", "success")
             return redirect(url_for("energy.list_energy"))
 
@@ -383,18 +328,18 @@ def delete_energy(id):
     cur = db.cursor()
 
     try:
-        # --- AUDIT LOG (Before Delete) ---
-        current_student_id = session.get("student_id")
-        if current_student_id:
-            audit_sql = """
-                INSERT INTO audit_logs (student_id, action_type, table_name, record_id)
-                VALUES (%s, %s, %s, %s)
-            """
-            cur.execute(audit_sql, (current_student_id, "DELETE", "energy_data", id))
+        country_id = get_record_country_id(db, "energy", id)
 
         # Perform Delete
         cur.execute("DELETE FROM energy_data WHERE data_id = %s", (id,))
+        refresh_country_coverage(db, "energy", country_id)
         db.commit()
+        bump_table_versions("energy_data", "country_data_coverage")
+
+        # --- AUDIT LOG ---
+        current_student_id = session.get("student_id")
+        if current_student_id:
+            record_audit(current_student_id, "DELETE", "energy_data", id)
         
         flash("Record deleted successfully.", "success")
     except Exception as e:
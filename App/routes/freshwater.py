@@ -5,6 +5,17 @@ from urllib.parse import urlencode
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
 from App.db import get_db
+from App.pagination import KeysetPager, cached_count
+from App.cache import cached_query, bump_table_versions
+from App.coverage import refresh_country_coverage, get_record_country_id
+from App.snapshots import refresh_snapshot_rankings, get_record_snapshot_key, get_snapshot_rows
+from App.trends import attach_trends, trends_response
+from App.timeseries import timeseries_response
+from App.statements import STATEMENTS
+from App.audit import record_audit
+from App.export import export_response
+from App.conditional import conditional, domain_tables
+from App.search import text_condition
 from App.routes.login import admin_required, editor_required
 
 freshwater_bp = Blueprint("freshwater", __name__, url_prefix="/freshwater")
@@ -14,67 +25,54 @@ freshwater_bp = Blueprint("freshwater", __name__, url_prefix="/freshwater")
 # Helper queries for dropdowns
 # ---------------------------------------------------------
 def _get_countries():
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute(
+    return cached_query(
+        get_db(),
         """
         SELECT country_id, country_name, country_code, region
         FROM countries
         ORDER BY country_name
-        """
+        """,
+        tables=("countries",),
     )
-    rows = cur.fetchall()
-    cur.close()
-    return rows
 
 
 def _get_indicators():
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute(
+    return cached_query(
+        get_db(),
         """
         SELECT freshwater_indicator_id, indicator_name, unit_of_measure
         FROM freshwater_indicator_details
         ORDER BY indicator_name
-        """
+        """,
+        tables=("freshwater_indicator_details",),
     )
-    rows = cur.fetchall()
-    cur.close()
-    return rows
 
 
 def _get_students():
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute(
+    return cached_query(
+        get_db(),
         """
         SELECT student_id, student_number, full_name, team_no
         FROM students
         ORDER BY student_number
-        """
+        """,
+        tables=("students",),
     )
-    rows = cur.fetchall()
-    cur.close()
-    return rows
 
 
 def _get_max_year_for_indicator(conn, indicator_id: str):
     if not indicator_id:
         return None
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT MAX(year)
-        FROM freshwater_data
-        WHERE freshwater_indicator_id = %s
-        """,
+    row = cached_query(
+        conn,
+        STATEMENTS["freshwater.max_year"],
         (indicator_id,),
+        tables=("freshwater_data",),
+        one=True,
+        dictionary=False,
+        prepared=True,
     )
-    row = cur.fetchone()
-    cur.close()
-    if not row:
-        return None
-    return row[0]
+    return row[0] if row else None
 
 
 def _safe_float(x):
@@ -127,123 +125,12 @@ def _build_snapshot(conn, indicators, countries, snap_indicator_id: str, snap_ye
     if not snap_year:
         return snapshot
 
-    ranked_rows = []
+    # precomputed by App/snapshots.py, one read on the ranking table
     try:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
-            """
-            WITH base AS (
-                SELECT
-                    fd.country_id,
-                    fd.freshwater_indicator_id,
-                    fd.year,
-                    fd.indicator_value,
-                    c.country_name,
-                    c.country_code,
-                    c.region,
-                    fi.indicator_name,
-                    fi.unit_of_measure
-                FROM freshwater_data fd
-                JOIN countries c ON c.country_id = fd.country_id
-                JOIN freshwater_indicator_details fi
-                    ON fi.freshwater_indicator_id = fd.freshwater_indicator_id
-                WHERE fd.freshwater_indicator_id = %s
-                  AND fd.year = %s
-                  AND fd.indicator_value IS NOT NULL
-            ),
-            ranked AS (
-                SELECT
-                    *,
-                    RANK() OVER (ORDER BY indicator_value DESC) AS global_rank,
-                    RANK() OVER (PARTITION BY region ORDER BY indicator_value DESC) AS region_rank,
-                    AVG(indicator_value) OVER () AS global_avg,
-                    AVG(indicator_value) OVER (PARTITION BY region) AS region_avg
-                FROM base
-            )
-            SELECT *
-            FROM ranked
-            ORDER BY indicator_value DESC;
-            """,
-            (snap_indicator_id, snap_year),
-        )
-        ranked_rows = cur.fetchall()
-        cur.close()
+        ranked_rows = get_snapshot_rows(conn, "freshwater", snap_indicator_id, snap_year)
     except Exception:
         ranked_rows = []
 
-    if not ranked_rows:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
-            """
-            SELECT
-                fd.country_id,
-                fd.freshwater_indicator_id,
-                fd.year,
-                fd.indicator_value,
-                c.country_name,
-                c.country_code,
-                c.region,
-                fi.indicator_name,
-                fi.unit_of_measure
-            FROM freshwater_data fd
-            JOIN countries c ON c.country_id = fd.country_id
-            JOIN freshwater_indicator_details fi
-                ON fi.freshwater_indicator_id = fd.freshwater_indicator_id
-            WHERE fd.freshwater_indicator_id = %s
-              AND fd.year = %s
-              AND fd.indicator_value IS NOT NULL
-            """,
-            (snap_indicator_id, snap_year),
-        )
-        base_rows = cur.fetchall()
-        cur.close()
-
-        base_rows = [r for r in base_rows if _safe_float(r.get("indicator_value")) is not None]
-        base_rows.sort(key=lambda r: _safe_float(r.get("indicator_value")), reverse=True)
-
-        if base_rows:
-            total = sum(_safe_float(r.get("indicator_value")) for r in base_rows)
-            n = len(base_rows)
-            global_avg = total / n if n else None
-
-            region_sum = {}
-            region_count = {}
-            for r in base_rows:
-                reg = r.get("region") or "Unknown"
-                v = _safe_float(r.get("indicator_value"))
-                region_sum[reg] = region_sum.get(reg, 0.0) + (v if v is not None else 0.0)
-                region_count[reg] = region_count.get(reg, 0) + 1
-
-            last_val = None
-            last_rank = 0
-            for idx, r in enumerate(base_rows):
-                v = _safe_float(r.get("indicator_value"))
-                if last_val is None or v != last_val:
-                    last_rank = idx + 1
-                    last_val = v
-                r["global_rank"] = last_rank
-                r["global_avg"] = global_avg
-
-            by_region = {}
-            for r in base_rows:
-                reg = r.get("region") or "Unknown"
-                by_region.setdefault(reg, []).append(r)
-
-            for reg, items in by_region.items():
-                items.sort(key=lambda rr: _safe_float(rr.get("indicator_value")), reverse=True)
-                last_val_r = None
-                last_rank_r = 0
-                reg_avg = (region_sum.get(reg, 0.0) / region_count.get(reg, 1)) if region_count.get(reg, 0) else None
-                for idx, rr in enumerate(items):
-                    vv = _safe_float(rr.get("indicator_value"))
-                    if last_val_r is None or vv != last_val_r:
-                        last_rank_r = idx + 1
-                        last_val_r = vv
-                    rr["region_rank"] = last_rank_r
-                    rr["region_avg"] = reg_avg
-
-            ranked_rows = base_rows
-
     if not ranked_rows:
         return snapshot
 
@@ -290,10 +177,45 @@ def _build_snapshot(conn, indicators, countries, snap_indicator_id: str, snap_ye
     return snapshot
 
 
+def _list_filters():
+    """WHERE clause (aliases fd, c, fi) and params for the list filters in request.args."""
+    country_id = request.args.get("country_id", "").strip()
+    indicator_id = request.args.get("indicator_id", "").strip()
+    year = request.args.get("year", "").strip()
+    q = request.args.get("q", "").strip()
+
+    where_sql = "WHERE 1=1"
+    params = []
+
+    if country_id:
+        where_sql += " AND fd.country_id = %s"
+        params.append(country_id)
+
+    if indicator_id:
+        where_sql += " AND fd.freshwater_indicator_id = %s"
+        params.append(indicator_id)
+
+    if year:
+        where_sql += " AND fd.year = %s"
+        params.append(year)
+
+    if q:
+        q_sql, q_params = text_condition(
+            get_db(), q,
+            ("fd.country_id", "countries", ("country_name", "country_code")),
+            ("fd.freshwater_indicator_id", "freshwater_indicator_details", ("indicator_name",)),
+        )
+        where_sql += f" AND {q_sql}"
+        params.extend(q_params)
+
+    return where_sql, params
+
+
 # ---------------------------------------------------------
 # LIST PAGE (with filters/search + pagination)
 # ---------------------------------------------------------
 @freshwater_bp.route("/", methods=["GET"])
+@conditional(*domain_tables("freshwater"))
 def list_freshwater():
     country_id = request.args.get("country_id", "").strip()
     indicator_id = request.args.get("indicator_id", "").strip()
@@ -325,25 +247,7 @@ def list_freshwater():
 
     snapshot = _build_snapshot(conn, indicators, countries, snap_indicator_id, snap_year, snap_country_id)
 
-    where_sql = "WHERE 1=1"
-    params = []
-
-    if country_id:
-        where_sql += " AND fd.country_id = %s"
-        params.append(country_id)
-
-    if indicator_id:
-        where_sql += " AND fd.freshwater_indicator_id = %s"
-        params.append(indicator_id)
-
-    if year:
-        where_sql += " AND fd.year = %s"
-        params.append(year)
-
-    if q:
-        where_sql += " AND (c.country_name LIKE %s OR c.country_code LIKE %s OR fi.indicator_name LIKE %s)"
-        like = f"%{q}%"
-        params.extend([like, like, like])
+    where_sql, params = _list_filters()
 
     count_sql = f"""
         SELECT COUNT(*) AS total
@@ -355,8 +259,7 @@ def list_freshwater():
     """
 
     cur = conn.cursor(dictionary=True)
-    cur.execute(count_sql, params)
-    total_count = int(cur.fetchone()["total"])
+    total_count = cached_count(cur, count_sql, params)
     cur.close()
 
     total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 1
@@ -364,20 +267,29 @@ def list_freshwater():
         page = total_pages
 
     allowed_sort_columns = {
-        "data_id": "fd.data_id",
-        "country": "c.country_name",
-        "region": "c.region",
-        "code": "c.country_code",
-        "indicator": "fi.indicator_name",
-        "unit": "fi.unit_of_measure",
-        "year": "fd.year",
-        "value": "fd.indicator_value",
+        "data_id": ("fd.data_id", "data_id", False),
+        "country": ("c.country_name", "country_name", False),
+        "region": ("c.region", "region", True),
+        "code": ("c.country_code", "country_code", False),
+        "indicator": ("fi.indicator_name", "indicator_name", False),
+        "unit": ("fi.unit_of_measure", "unit_of_measure", True),
+        "year": ("fd.year", "year", False),
+        "value": ("fd.indicator_value", "indicator_value", True),
     }
 
-    sort_col_sql = allowed_sort_columns.get(sort_by, "fd.data_id")
-    sort_dir_sql = "DESC" if order == "desc" else "ASC"
+    sort_key = allowed_sort_columns.get(sort_by, allowed_sort_columns["data_id"])
+    keys = [sort_key] if sort_key[0] == "fd.data_id" else [sort_key, allowed_sort_columns["data_id"]]
+    pager = KeysetPager(
+        keys,
+        order == "desc",
+        request.args.get("cursor", "").strip(),
+        per_page,
+        signature=f"{sort_key[0]}:{order}",
+    )
 
-    offset = (page - 1) * per_page
+    seek_sql, seek_params = pager.where()
+    if seek_sql:
+        where_sql += f" AND {seek_sql}"
 
     data_sql = f"""
         SELECT
@@ -397,13 +309,14 @@ def list_freshwater():
         JOIN freshwater_indicator_details AS fi
             ON fd.freshwater_indicator_id = fi.freshwater_indicator_id
         {where_sql}
-        ORDER BY {sort_col_sql} {sort_dir_sql}
-        LIMIT {per_page} OFFSET {offset}
+        ORDER BY {pager.order_by()}
+        {pager.limit_sql(page)}
     """
 
     cur = conn.cursor(dictionary=True)
-    cur.execute(data_sql, params)
-    rows = cur.fetchall()
+    cur.execute(data_sql, params + seek_params)
+    rows = pager.finish(cur.fetchall(), page, total_pages)
+    attach_trends(cur, "freshwater", rows)
     cur.close()
 
     list_reset_url = url_for(
@@ -467,9 +380,48 @@ def list_freshwater():
         total_pages=total_pages,
         total_count=total_count,
         base_qs=base_qs,
+        next_cursor=pager.next_cursor,
+        prev_cursor=pager.prev_cursor,
     )
 
 
+# ---------------------------------------------------------
+# EXPORT (streamed CSV / NDJSON, same filters as the list)
+# ---------------------------------------------------------
+@freshwater_bp.route("/export.<any(csv, ndjson):fmt>", methods=["GET"])
+def export_freshwater(fmt):
+    where_sql, params = _list_filters()
+    sql = f"""
+        SELECT fd.data_id, fd.country_id, c.country_name, c.country_code, c.region,
+               fd.freshwater_indicator_id, fi.indicator_name, fi.unit_of_measure,
+               fd.year, fd.indicator_value, fd.source_notes
+        FROM freshwater_data fd
+        JOIN countries c ON fd.country_id = c.country_id
+        JOIN freshwater_indicator_details fi ON fd.freshwater_indicator_id = fi.freshwater_indicator_id
+        {where_sql}
+        ORDER BY fd.data_id
+    """
+    return export_response("freshwater", sql, params, fmt)
+
+
+# ---------------------------------------------------------
+# TIME SERIES (JSON)
+# ---------------------------------------------------------
+@freshwater_bp.route("/api/timeseries", methods=["GET"])
+@conditional(*domain_tables("freshwater"))
+def api_timeseries():
+    return timeseries_response(get_db(), "freshwater")
+
+
+# ---------------------------------------------------------
+# TRENDS (JSON)
+# ---------------------------------------------------------
+@freshwater_bp.route("/api/trends", methods=["GET"])
+@conditional(*domain_tables("freshwater"))
+def api_trends():
+    return trends_response(get_db(), "freshwater")
+
+
 # ---------------------------------------------------------
 # CREATE PAGE
 # ---------------------------------------------------------
@@ -497,14 +449,13 @@ def add_freshwater():
             cur.execute(insert_sql, (c_id, i_id, year, val, note))
             new_id = cur.lastrowid
 
-            if student_id:
-                audit_sql = """
-                    INSERT INTO audit_logs (student_id, action_type, table_name, record_id)
-                    VALUES (%s, %s, %s, %s)
-                """
-                cur.execute(audit_sql, (student_id, "CREATE", "freshwater_data", new_id))
-
+            refresh_country_coverage(conn, "freshwater", c_id)
+            refresh_snapshot_rankings(conn, "freshwater", i_id, year)
             conn.commit()
+            bump_table_versions("freshwater_data", "country_data_coverage", "freshwater_snapshot_rankings")
+
+            if student_id:
+                record_audit(student_id, "CREATE", "freshwater_data", new_id)
             cur.close()
 
             flash("Record added successfully.", "success")
@@ -571,14 +522,13 @@ def edit_freshwater(id):
             """
             cur.execute(update_sql, (indicator_value, year, source_notes, id))
 
-            if student_id:
-                audit_sql = """
-                    INSERT INTO audit_logs (student_id, action_type, table_name, record_id)
-                    VALUES (%s, %s, %s, %s)
-                """
-                cur.execute(audit_sql, (student_id, "UPDATE", "freshwater_data", id))
-
+            refresh_country_coverage(conn, "freshwater", record["country_id"])
+            refresh_snapshot_rankings(conn, "freshwater", record["freshwater_indicator_id"], record["year"], year)
             conn.commit()
+            bump_table_versions("freshwater_data", "country_data_coverage", "freshwater_snapshot_rankings")
+
+            if student_id:
+                record_audit(student_id, "UPDATE", "freshwater_data", id)
             cur.close()
 
             flash("Record updated successfully.", "success")
@@ -607,18 +557,20 @@ def delete_freshwater(id):
     conn = get_db()
 
     try:
+        country_id = get_record_country_id(conn, "freshwater", id)
+        snap_indicator_id, snap_year = get_record_snapshot_key(conn, "freshwater", id)
         cur = conn.cursor()
         cur.execute("DELETE FROM freshwater_data WHERE data_id = %s", (id,))
 
         student_id = request.form.get("student_id") or None
-        if student_id:
-            audit_sql = """
-                INSERT INTO audit_logs (student_id, action_type, table_name, record_id)
-                VALUES (%s, %s, %s, %s)
-            """
-            cur.execute(audit_sql, (student_id, "DELETE", "freshwater_data", id))
 
+        refresh_country_coverage(conn, "freshwater", country_id)
+        refresh_snapshot_rankings(conn, "freshwater", snap_indicator_id, snap_year)
         conn.commit()
+        bump_table_versions("freshwater_data", "country_data_coverage", "freshwater_snapshot_rankings")
+
+        if student_id:
+            record_audit(student_id, "DELETE", "freshwater_data", id)
 
         if cur.rowcount == 0:
             flash("Record not found.", "warning")
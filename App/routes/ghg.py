@@ -4,6 +4,18 @@ from mysql.connector.errors import IntegrityError
 from types import SimpleNamespace
 
 from App.db import get_db
+from App.pagination import KeysetPager, cached_count
+from App.cache import cached_query, bump_table_versions
+from App.columnar import get_store
+from App.coverage import refresh_country_coverage, get_record_country_id
+from App.timeseries import build_global_averages, timeseries_response
+from App.trends import compute_trends, trends_response
+from App.details import details_response, form_options_response
+from App.audit import record_audit
+from App.export import export_response
+from App.conditional import conditional, domain_tables
+from App.search import text_condition
+from App.typeahead import TYPEAHEAD_TABLES, suggest
 from App.routes.login import admin_required, editor_required
 
 ghg_bp = Blueprint("ghg", __name__, url_prefix="/ghg")
@@ -21,8 +33,49 @@ def _row_to_obj(cursor, row):
     return SimpleNamespace(**dict(zip(columns, row)))
 
 
+def _list_filters():
+    """Build the WHERE clause (aliases c, g) and params for the list filters in request.args."""
+    country_name = request.args.get("country", type=str)
+    year_min = request.args.get("year_min", type=int)
+    year_max = request.args.get("year_max", type=int)
+    latest_year_only = request.args.get("latest_year_only", type=str) == "true"
+
+    where_clauses = []
+    params = []
+
+    if country_name:
+        name_sql, name_params = text_condition(
+            get_db(), country_name, ("g.country_id", "countries", ("country_name",))
+        )
+        where_clauses.append(name_sql)
+        params.extend(name_params)
+
+    if year_min:
+        where_clauses.append("g.year >= %s")
+        params.append(year_min)
+
+    if year_max:
+        where_clauses.append("g.year <= %s")
+        params.append(year_max)
+
+    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+
+    if latest_year_only:
+        latest_year_condition = """
+            AND g.year = (
+                SELECT MAX(g2.year)
+                FROM greenhouse_emissions g2
+                WHERE g2.country_id = g.country_id
+            )
+        """
+        where_sql = f"{where_sql} {latest_year_condition}"
+
+    return where_sql, params
+
+
 # ---------- LIST (Summary View) ----------
 @ghg_bp.route("/", methods=["GET"])
+@conditional(*domain_tables("ghg"))
 def list_ghg():
     country_name = request.args.get("country", type=str)
     year_min = request.args.get("year_min", type=int)
@@ -40,34 +93,9 @@ def list_ghg():
     indicators = []
 
     try:
-        # Build WHERE clause
-        where_clauses = []
-        params = []
-
-        if country_name:
-            where_clauses.append("c.country_name LIKE %s")
-            params.append(f"%{country_name}%")
-
-        if year_min:
-            where_clauses.append("g.year >= %s")
-            params.append(year_min)
-
-        if year_max:
-            where_clauses.append("g.year <= %s")
-            params.append(year_max)
-
-        where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-
-        if latest_year_only:
-            latest_year_condition = """
-                AND g.year = (
-                    SELECT MAX(g2.year)
-                    FROM greenhouse_emissions g2
-                    WHERE g2.country_id = g.country_id
-                )
-            """
-            where_sql = f"{where_sql} {latest_year_condition}"
+        where_sql, params = _list_filters()
 
+        # Stage 1: one pivot query for the page (one row per country-year)
         query = f"""
             SELECT 
                 country_id,
@@ -77,7 +105,8 @@ def list_ghg():
                 year,
                 CAST(MAX(CASE WHEN ghg_indicator_id = 1 THEN indicator_value END) AS UNSIGNED) AS total_ghg,
                 CAST(MAX(CASE WHEN ghg_indicator_id = 5 THEN indicator_value END) AS UNSIGNED) AS co2_total,
-                CAST(MAX(CASE WHEN ghg_indicator_id = 6 THEN indicator_value END) AS DECIMAL(10,2)) AS co2_per_capita
+                CAST(MAX(CASE WHEN ghg_indicator_id = 6 THEN indicator_value END) AS DECIMAL(10,2)) AS co2_per_capita,
+                COUNT(DISTINCT CASE WHEN indicator_value IS NOT NULL THEN ghg_indicator_id END) AS reported_indicators
             FROM (
                 SELECT DISTINCT
                     c.country_id,
@@ -93,31 +122,26 @@ def list_ghg():
             ) AS emission_data
             GROUP BY country_id, country_name, country_code, region, year
         """
-        
 
-        sort_map = {
-            "country": "country_name",
-            "year": "year",
-            "region": "region",
-            "total_ghg": "total_ghg",
-            "co2_total": "co2_total",
-            "co2_per_capita": "co2_per_capita",
-            "trend": "trend_value"
-        }
-        
-        if sort_by in ["total_ghg", "co2_total", "co2_per_capita"]:
-            sort_column = sort_map.get(sort_by)
-            order = "ASC" if sort_order == "asc" else "DESC"
-            query += f" ORDER BY {sort_column} IS NULL, {sort_column} {order}"
+        # Sort keys; country_id + year break ties so keyset cursors are unique.
+        # NULLs always go last, hence the leading (col IS NULL) / (col IS NOT NULL) key.
+        def _nulls_last(column):
+            if sort_order == "asc":
+                return (f"({column} IS NULL)", lambda r: int(r.get(column) is None), False)
+            return (f"({column} IS NOT NULL)", lambda r: int(r.get(column) is not None), False)
+
+        tie_breakers = [("country_id", "country_id", False), ("year", "year", False)]
+        descending = sort_order != "asc"
+        if sort_by in ["total_ghg", "co2_total", "co2_per_capita", "region", "country"]:
+            sort_column = {"country": "country_name"}.get(sort_by, sort_by)
+            keys = [_nulls_last(sort_column), (sort_column, sort_column, True)] + tie_breakers
         elif sort_by == "trend":
-            query += " ORDER BY country_name ASC"
+            keys = [("country_name", "country_name", False)] + tie_breakers
+            descending = False
+        elif sort_by == "year":
+            keys = [("year", "year", False), ("country_id", "country_id", False)]
         else:
-            sort_column = sort_map.get(sort_by, "country_name")
-            order = "ASC" if sort_order == "asc" else "DESC"
-            if sort_by in ["region", "country"]:
-                query += f" ORDER BY {sort_column} IS NULL, {sort_column} {order}"
-            else:
-                query += f" ORDER BY {sort_column} {order}"
+            keys = [("country_name", "country_name", False)] + tie_breakers
 
         count_query = f"""
             SELECT COUNT(*) as total
@@ -131,15 +155,23 @@ def list_ghg():
                 GROUP BY c.country_id, g.year
             ) as unique_pairs
         """
-        cursor.execute(count_query, params)
-        total_count = cursor.fetchone()['total']
+        total_count = cached_count(cursor, count_query, params)
         total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 1
 
-        offset = (page - 1) * per_page
-        query += f" LIMIT {per_page} OFFSET {offset}"
+        pager = KeysetPager(
+            keys, descending, request.args.get("cursor", type=str), per_page,
+            signature=f"{sort_by}:{sort_order}",
+        )
+        seek_sql, seek_params = pager.where()
+        query = f"""
+            SELECT * FROM ({query}) AS pivot_rows
+            WHERE {seek_sql or "1=1"}
+            ORDER BY {pager.order_by()}
+            {pager.limit_sql(page)}
+        """
 
-        cursor.execute(query, params)
-        raw_rows = cursor.fetchall()
+        cursor.execute(query, params + seek_params)
+        raw_rows = pager.finish(cursor.fetchall(), page, total_pages)
 
         unique_summary_dict = {}
         for row in raw_rows:
@@ -156,10 +188,14 @@ def list_ghg():
                     existing['co2_per_capita'] = row['co2_per_capita']
         
         summary_rows = list(unique_summary_dict.values())
-        
+
         country_ids = list(set(row['country_id'] for row in summary_rows))
-        
-        full_data_map = {}
+        country_names = {row['country_id']: row['country_name'] for row in summary_rows}
+
+        # Stage 2: CO2 per capita series for every country on the page, kept as
+        # per-country year-sorted arrays for the trend engine
+        series_years = {}
+        series_values = {}
         if country_ids:
             placeholders = ','.join(['%s'] * len(country_ids))
             cursor.execute(f"""
@@ -169,9 +205,9 @@ def list_ghg():
                 ORDER BY country_id, year ASC
             """, country_ids)
             for data_row in cursor.fetchall():
-                key = (data_row['country_id'], data_row['year'])
-                full_data_map[key] = float(data_row['indicator_value'])
-        
+                series_years.setdefault(data_row['country_id'], []).append(data_row['year'])
+                series_values.setdefault(data_row['country_id'], []).append(float(data_row['indicator_value']))
+
         country_latest_years_full = {}
         country_earliest_years_full = {}
         if country_ids:
@@ -185,80 +221,59 @@ def list_ghg():
             for data_row in cursor.fetchall():
                 country_latest_years_full[data_row['country_id']] = data_row['max_year']
                 country_earliest_years_full[data_row['country_id']] = data_row['min_year']
-        
+
+        # Stage 3: trends from the previous available year (or the next one
+        # when the row is the earliest year with data), all series in one pass
+        co2_trends = compute_trends(
+            {cid: (series_years[cid], series_values[cid]) for cid in series_years}
+        )
         for row in summary_rows:
             country_id = row['country_id']
             year = row['year']
             trends = {}
             show_trend = False
-            
-            current_value_raw = row.get('co2_per_capita')
-            current_value = float(current_value_raw) if current_value_raw is not None else None
-            
-            if current_value is not None:
-                prev_year = None
-                prev_value = None
-                available_years = sorted([y for (c, y) in full_data_map.keys() if c == country_id], reverse=True)
-                for y in available_years:
-                    if y < year:
-                        prev_year = y
-                        prev_value = full_data_map.get((country_id, y))
-                        break
-                
-                next_year = None
-                next_value = None
-                if prev_year is None:
-                    available_years_asc = sorted([y for (c, y) in full_data_map.keys() if c == country_id])
-                    for y in available_years_asc:
-                        if y > year:
-                            next_year = y
-                            next_value = full_data_map.get((country_id, y))
-                            break
-                
-                if prev_year is not None and prev_value is not None:
-                    change = current_value - prev_value
-                    percent = ((change / prev_value) * 100) if prev_value != 0 else None
+
+            trends['co2_per_capita'] = None
+            point = co2_trends.get(country_id, {}).get(year)
+            if row.get('co2_per_capita') is not None and point is not None:
+                if point['prev_year'] is not None:
                     trends['co2_per_capita'] = {
-                        'change': change,
-                        'percent': percent,
-                        'comparison_year': prev_year,
+                        'change': point['change'],
+                        'percent': point['percent'],
+                        'comparison_year': point['prev_year'],
                         'comparison_type': 'previous',
-                        'comparison_value': prev_value
+                        'comparison_value': point['prev_value']
                     }
                     show_trend = True
-                elif next_year is not None and next_value is not None:
-                    change = next_value - current_value
-                    percent = ((change / current_value) * 100) if current_value != 0 else None
+                elif point['next_year'] is not None:
+                    current_value = point['value']
+                    change = point['next_value'] - current_value
                     trends['co2_per_capita'] = {
                         'change': change,
-                        'percent': percent,
-                        'comparison_year': next_year,
+                        'percent': ((change / current_value) * 100) if current_value != 0 else None,
+                        'comparison_year': point['next_year'],
                         'comparison_type': 'next',
-                        'comparison_value': next_value
+                        'comparison_value': point['next_value']
                     }
                     show_trend = True
-                else:
-                    trends['co2_per_capita'] = None
-            else:
-                trends['co2_per_capita'] = None
-            
+
             row['trends'] = trends
             row['show_trend'] = show_trend
             row['is_latest_year'] = country_latest_years_full.get(country_id) == year
             row['is_earliest_year'] = country_earliest_years_full.get(country_id) == year
-            
+
             if trends.get('co2_per_capita') is not None:
                 row['trend_value'] = trends['co2_per_capita'].get('change', 0)
             else:
                 row['trend_value'] = None
-        
-        cursor.execute("""
+
+        unit_rows = cached_query(db_conn, """
             SELECT ghg_indicator_id, unit_symbol
             FROM ghg_indicator_details
             WHERE ghg_indicator_id IN (1, 5, 6)
-        """)
-        unit_symbols = {row['ghg_indicator_id']: row['unit_symbol'] for row in cursor.fetchall()}
-        
+        """, tables=("ghg_indicator_details",))
+        unit_symbols = {row['ghg_indicator_id']: row['unit_symbol'] for row in unit_rows}
+
         countries_grouped = {}
         for row in summary_rows:
             country_id = row['country_id']
@@ -271,84 +286,77 @@ def list_ghg():
                     'years': []
                 }
             countries_grouped[country_id]['years'].append(row)
-        
+
         for country_id in countries_grouped:
             countries_grouped[country_id]['years'].sort(key=lambda x: x['year'])
-        
+
+        # Stage 4: CO2 per capita regional averages for every region on the page
         region_avg_by_year = {}
         if summary_rows:
             regions = list(set(row['region'] for row in summary_rows if row['region']))
             years = list(set(row['year'] for row in summary_rows))
-            
-            if regions and years:
+
+            store = get_store(db_conn, "ghg")
+            if regions and years and store is not None:
+                region_avg_by_year = {region: {} for region in regions}
+                averages = store.aggregate(
+                    ("region", "year"), "mean", indicator_id=6, regions=regions, years=years
+                )
+                for (region, year), avg_value in averages.items():
+                    region_avg_by_year[region][year] = avg_value
+            elif regions and years:
+                placeholders_regions = ','.join(['%s'] * len(regions))
                 placeholders_years = ','.join(['%s'] * len(years))
-                for region in regions:
-                    cursor.execute(f"""
-                        SELECT year, AVG(indicator_value) as avg_value
-                        FROM greenhouse_emissions g
-                        INNER JOIN countries c ON c.country_id = g.country_id
-                        WHERE c.region = %s 
-                        AND g.ghg_indicator_id = 6 
-                        AND g.indicator_value IS NOT NULL
-                        AND g.year IN ({placeholders_years})
-                        GROUP BY year
-                    """, [region] + years)
-                    region_avg_by_year[region] = {row['year']: float(row['avg_value']) for row in cursor.fetchall()}
-        
-        global_avg_by_year = {}
-        cursor.execute("SELECT ghg_indicator_id FROM ghg_indicator_details ORDER BY ghg_indicator_id")
-        all_indicators = cursor.fetchall()
-        
-        for indicator_row in all_indicators:
-            indicator_id = indicator_row['ghg_indicator_id']
-            cursor.execute("""
-                SELECT 
-                    year,
-                    AVG(indicator_value) as avg_value,
-                    COUNT(DISTINCT country_id) as country_count
-                FROM greenhouse_emissions
-                WHERE ghg_indicator_id = %s 
-                AND indicator_value IS NOT NULL
-                GROUP BY year
-                ORDER BY year ASC
-            """, (indicator_id,))
-            global_avg_by_year[indicator_id] = [
-                {
-                    'year': row['year'],
-                    'avg_value': float(row['avg_value']),
-                    'country_count': row['country_count']
-                }
-                for row in cursor.fetchall()
-            ]
-        
+                cursor.execute(f"""
+                    SELECT c.region, g.year, AVG(g.indicator_value) as avg_value
+                    FROM greenhouse_emissions g
+                    INNER JOIN countries c ON c.country_id = g.country_id
+                    WHERE c.region IN ({placeholders_regions})
+                    AND g.ghg_indicator_id = 6
+                    AND g.indicator_value IS NOT NULL
+                    AND g.year IN ({placeholders_years})
+                    GROUP BY c.region, g.year
+                """, regions + years)
+                region_avg_by_year = {region: {} for region in regions}
+                for avg_row in cursor.fetchall():
+                    region_avg_by_year[avg_row['region']][avg_row['year']] = float(avg_row['avg_value'])
+
+        all_indicators = cached_query(
+            db_conn, "SELECT ghg_indicator_id FROM ghg_indicator_details ORDER BY ghg_indicator_id",
+            tables=("ghg_indicator_details",),
+        )
+        global_avg_by_year = build_global_averages(
+            cursor, "ghg", [indicator_row['ghg_indicator_id'] for indicator_row in all_indicators], conn=db_conn
+        )
+
+        # Stage 5: risers/decliners straight from the per-country arrays
         top_risers = []
         top_decliners = []
-        if country_ids and full_data_map:
+        if country_ids and series_years:
             risers_decliners = []
             for country_id in country_ids:
-                country_years = sorted([y for (c, y) in full_data_map.keys() if c == country_id])
+                country_years = series_years.get(country_id, [])
                 if len(country_years) >= 2:
                     earliest_year = country_years[0]
                     latest_year = country_years[-1]
-                    earliest_value = full_data_map.get((country_id, earliest_year))
-                    latest_value = full_data_map.get((country_id, latest_year))
-                    
-                    if earliest_value is not None and latest_value is not None and earliest_value != 0:
+                    earliest_value = series_values[country_id][0]
+                    latest_value = series_values[country_id][-1]
+
+                    if earliest_value != 0:
                         percent_change = ((latest_value - earliest_value) / earliest_value * 100)
-                        country_name = next((row['country_name'] for row in summary_rows if row['country_id'] == country_id), 'Unknown')
                         risers_decliners.append({
                             'country_id': country_id,
-                            'country_name': country_name,
+                            'country_name': country_names.get(country_id, 'Unknown'),
                             'percent_change': percent_change,
                             'earliest_year': earliest_year,
                             'latest_year': latest_year
                         })
-            
+
             if risers_decliners:
                 risers_decliners.sort(key=lambda x: x['percent_change'], reverse=True)
                 top_risers = risers_decliners[:5]
                 top_decliners = sorted(risers_decliners[-5:], key=lambda x: x['percent_change'])
-        
+
         country_coverage = {}
         for country_id in countries_grouped:
             years_list = countries_grouped[country_id]['years']
@@ -399,115 +407,19 @@ def list_ghg():
                 reverse=(sort_order == "desc")
             )
 
-        detailed_data = {}
-        time_series_data = {}
-        
-        cursor.execute("SELECT COUNT(*) as total FROM ghg_indicator_details")
-        total_indicators = cursor.fetchone()['total']
-        
+        # Stage 6: coverage badge from the pivot; the indicator details of a row
+        # are loaded when it is expanded (/ghg/api/details)
+        total_indicators = len(all_indicators)
         for row in summary_rows:
-            country_id = row['country_id']
-            year = row['year']
-            key = f"{country_id}-{year}"
-
-            detail_query = """
-                SELECT 
-                    g.row_id,
-                    g.ghg_indicator_id,
-                    g.indicator_value,
-                    g.share_of_total_pct,
-                    g.uncertainty_pct,
-                    g.source_notes,
-                    i.indicator_name,
-                    i.unit_symbol
-                FROM greenhouse_emissions g
-                INNER JOIN ghg_indicator_details i ON g.ghg_indicator_id = i.ghg_indicator_id
-                WHERE g.country_id = %s AND g.year = %s
-                ORDER BY g.ghg_indicator_id
-            """
-            cursor.execute(detail_query, (country_id, year))
-            detailed_data[key] = cursor.fetchall()
-            
-            coverage_count = sum(1 for detail in detailed_data[key] if detail['indicator_value'] is not None)
             row['data_coverage'] = {
-                'reported': coverage_count,
+                'reported': row.pop('reported_indicators'),
                 'total': total_indicators
             }
-            
-            if country_id not in time_series_data:
-                cursor.execute("""
-                    SELECT ghg_indicator_id, indicator_name, unit_symbol
-                    FROM ghg_indicator_details
-                    ORDER BY ghg_indicator_id
-                """)
-                all_indicators = cursor.fetchall()
-                indicator_map = {row['ghg_indicator_id']: {'name': row['indicator_name'], 'unit': row['unit_symbol']} for row in all_indicators}
-                
-                cursor.execute("""
-                    SELECT DISTINCT year
-                    FROM greenhouse_emissions
-                    WHERE country_id = %s
-                    ORDER BY year ASC
-                """, (country_id,))
-                all_years = [row['year'] for row in cursor.fetchall()]
-                
-                country_ts_by_indicator = {}
-                for indicator_id, indicator_info in indicator_map.items():
-                    cursor.execute("""
-                        SELECT year, indicator_value
-                        FROM greenhouse_emissions
-                        WHERE country_id = %s AND ghg_indicator_id = %s AND indicator_value IS NOT NULL
-                        ORDER BY year ASC
-                    """, (country_id, indicator_id))
-                    indicator_data = {row['year']: row['indicator_value'] for row in cursor.fetchall()}
-                    
-                    country_ts_by_indicator[indicator_id] = [
-                        {
-                            'year': year,
-                            'value': indicator_data.get(year)
-                        }
-                        for year in all_years
-                    ]
-                
-                cursor.execute("SELECT region FROM countries WHERE country_id = %s", (country_id,))
-                region_result = cursor.fetchone()
-                region_name = region_result['region'] if region_result else None
-                
-                region_avg_by_indicator = {}
-                if region_name:
-                    for indicator_id in indicator_map.keys():
-                        cursor.execute("""
-                            SELECT year, AVG(indicator_value) as avg_value
-                            FROM greenhouse_emissions g
-                            INNER JOIN countries c ON c.country_id = g.country_id
-                            WHERE c.region = %s AND g.ghg_indicator_id = %s AND g.indicator_value IS NOT NULL
-                            GROUP BY year
-                            ORDER BY year ASC
-                        """, (region_name, indicator_id))
-                        region_data = {row['year']: row['avg_value'] for row in cursor.fetchall()}
-                        
-                        region_avg_by_indicator[indicator_id] = [
-                            {
-                                'year': year,
-                                'value': region_data.get(year)
-                            }
-                            for year in all_years
-                        ]
-                
-                time_series_data[country_id] = {
-                    'indicators': indicator_map,
-                    'country_data': country_ts_by_indicator,
-                    'region_avg': region_avg_by_indicator,
-                    'region': region_name,
-                    'years': all_years
-                }
 
     except MySQLError as e:
         flash(f"Database error: {e}", "danger")
         summary_rows = []
         countries_list = []
-        detailed_data = {}
-        time_series_data = {}
         unit_symbols = {1: 'kt CO₂-eq', 5: 'kt', 6: 't'}
         region_avg_by_year = {}
         global_avg_by_year = []
@@ -515,26 +427,24 @@ def list_ghg():
         top_decliners = []
         country_coverage = {}
         total_pages = 0
+        pager = None
     
-    students = []
+    # Trend Explorer selects; the modal loads its option lists from /ghg/api/form-options
     if not countries or not indicators:
         try:
-            modal_cursor = db_conn.cursor(dictionary=True)
-            modal_cursor.execute("SELECT country_id, country_name, country_code FROM countries ORDER BY country_name")
-            countries = modal_cursor.fetchall()
+            countries = cached_query(
+                db_conn, "SELECT country_id, country_name, country_code FROM countries ORDER BY country_name",
+                tables=("countries",),
+            )
 
-            modal_cursor.execute(
-                "SELECT ghg_indicator_id, indicator_name, unit_symbol FROM ghg_indicator_details ORDER BY indicator_name"
+            indicators = cached_query(
+                db_conn,
+                "SELECT ghg_indicator_id, indicator_name, unit_symbol FROM ghg_indicator_details ORDER BY indicator_name",
+                tables=("ghg_indicator_details",),
             )
-            indicators = modal_cursor.fetchall()
-            
-            modal_cursor.execute("SELECT student_id, student_number, full_name FROM students ORDER BY student_number")
-            students = modal_cursor.fetchall()
-            modal_cursor.close()
         except MySQLError:
             countries = []
             indicators = []
-            students = []
     
     if 'cursor' in locals() and cursor:
         try:
@@ -546,8 +456,6 @@ def list_ghg():
         "ghg_list.html",
         countries_grouped=countries_list,
         summary_rows=summary_rows,
-        detailed_data=detailed_data,
-        time_series_data=time_series_data,
         unit_symbols=unit_symbols,
         region_avg_by_year=region_avg_by_year,
         global_avg_by_year=global_avg_by_year,
@@ -563,40 +471,82 @@ def list_ghg():
         page=page,
         total_pages=total_pages,
         per_page=per_page,
+        next_cursor=pager.next_cursor if pager else None,
+        prev_cursor=pager.prev_cursor if pager else None,
         countries=countries,
         indicators=indicators,
-        students=students,
     )
 
 
 # ---------- AUTOCOMPLETE ENDPOINT ----------
 @ghg_bp.route("/api/countries", methods=["GET"])
+@conditional(*TYPEAHEAD_TABLES)
 def autocomplete_countries():
-    """Return countries for autocomplete"""
+    """Return countries for autocomplete (served by the shared typeahead index)"""
     query = request.args.get("q", "", type=str)
-    db_conn = get_db()
-    cursor = db_conn.cursor(dictionary=True)
-
-    try:
-        cursor.execute(
-            """
-            SELECT DISTINCT country_name, country_code, region
-            FROM countries
-            WHERE country_name LIKE %s
-            ORDER BY country_name
-            LIMIT 20
-            """,
-            (f"%{query}%",)
-        )
-        countries = cursor.fetchall()
-    except MySQLError:
-        countries = []
-    finally:
-        cursor.close()
+    countries = []
+    if query.strip():
+        try:
+            countries = [
+                {"country_name": c["label"], "country_code": c["code"], "region": c["region"]}
+                for c in suggest(get_db(), query, kinds=("country",), limit=20)
+            ]
+        except MySQLError:
+            countries = []
 
     return {"countries": countries}
 
 
+# ---------- TRENDS ENDPOINT ----------
+@ghg_bp.route("/api/trends", methods=["GET"])
+@conditional(*domain_tables("ghg"))
+def api_trends():
+    """Trend metrics (change, YoY, CAGR, rolling mean) per country/indicator series"""
+    return trends_response(get_db(), "ghg")
+
+
+# ---------- TIME SERIES ENDPOINT ----------
+@ghg_bp.route("/api/timeseries", methods=["GET"])
+@conditional(*domain_tables("ghg"))
+def api_timeseries():
+    """Chart series (sparklines, Trend Explorer) for the given countries, loaded on demand"""
+    return timeseries_response(get_db(), "ghg")
+
+
+# ---------- ROW DETAILS / MODAL OPTIONS (loaded on demand) ----------
+@ghg_bp.route("/api/details", methods=["GET"])
+@conditional(*domain_tables("ghg"))
+def api_details():
+    """Indicator values of one (country, year) summary row, fetched when it is expanded"""
+    return details_response(get_db(), "ghg", order_by_name=False)
+
+
+@ghg_bp.route("/api/form-options", methods=["GET"])
+@editor_required
+@conditional("countries", "ghg_indicator_details", "students")
+def api_form_options():
+    """Country, indicator and audit-user lists for the add/edit modal"""
+    return form_options_response(get_db(), "ghg")
+
+
+# ---------- EXPORT (streamed CSV / NDJSON) ----------
+@ghg_bp.route("/export.<any(csv, ndjson):fmt>", methods=["GET"])
+def export_ghg(fmt):
+    """Every emission row matching the list filters, one line per row"""
+    where_sql, params = _list_filters()
+    sql = f"""
+        SELECT g.row_id, g.country_id, c.country_name, c.country_code, c.region,
+               g.ghg_indicator_id, ghg.indicator_name, ghg.unit_symbol,
+               g.year, g.indicator_value, g.share_of_total_pct, g.uncertainty_pct, g.source_notes
+        FROM greenhouse_emissions g
+        JOIN countries c ON g.country_id = c.country_id
+        JOIN ghg_indicator_details ghg ON g.ghg_indicator_id = ghg.ghg_indicator_id
+        WHERE {where_sql}
+        ORDER BY g.row_id
+    """
+    return export_response("ghg", sql, params, fmt)
+
+
 # ---------- CREATE ----------
 @ghg_bp.route("/add", methods=["GET", "POST"])
 @editor_required
@@ -640,18 +590,12 @@ def add_ghg():
             )
             new_row_id = cursor.lastrowid
 
-            if student_id:
-                audit_query = """
-                    INSERT INTO audit_logs 
-                    (student_id, action_type, table_name, record_id)
-                    VALUES (%s, %s, %s, %s)
-                """
-                cursor.execute(
-                    audit_query,
-                    (student_id, "CREATE", "greenhouse_emissions", new_row_id),
-                )
-
+            refresh_country_coverage(db_conn, "ghg", c_id)
             db_conn.commit()
+            bump_table_versions("greenhouse_emissions", "country_data_coverage")
+
+            if student_id:
+                record_audit(student_id, "CREATE", "greenhouse_emissions", new_row_id)
             flash("Record added successfully.", "success")
             return redirect(url_for("ghg.list_ghg"))
 
@@ -669,17 +613,20 @@ def add_ghg():
             cursor.close()
 
     try:
-        cursor.execute("SELECT country_id, country_name, country_code FROM countries ORDER BY country_name")
-        countries_data = cursor.fetchall()
+        countries_data = cached_query(
+            db_conn, "SELECT country_id, country_name, country_code FROM countries ORDER BY country_name",
+            tables=("countries",), dictionary=False,
+        )
         countries = [
             SimpleNamespace(country_id=row[0], country_name=row[1], country_code=row[2])
             for row in countries_data
         ]
 
-        cursor.execute(
-            "SELECT ghg_indicator_id, indicator_name, unit_symbol FROM ghg_indicator_details ORDER BY indicator_name"
+        indicators_data = cached_query(
+            db_conn,
+            "SELECT ghg_indicator_id, indicator_name, unit_symbol FROM ghg_indicator_details ORDER BY indicator_name",
+            tables=("ghg_indicator_details",), dictionary=False,
         )
-        indicators_data = cursor.fetchall()
         indicators = [
             SimpleNamespace(
                 ghg_indicator_id=row[0], indicator_name=row[1], unit_symbol=row[2]
@@ -687,8 +634,10 @@ def add_ghg():
             for row in indicators_data
         ]
 
-        cursor.execute("SELECT student_id, student_number, full_name FROM students ORDER BY student_number")
-        students_data = cursor.fetchall()
+        students_data = cached_query(
+            db_conn, "SELECT student_id, student_number, full_name FROM students ORDER BY student_number",
+            tables=("students",), dictionary=False,
+        )
         students = [
             SimpleNamespace(
                 student_id=row[0], student_number=row[1], full_name=row[2]
@@ -746,18 +695,12 @@ def edit_ghg(id):
                 (indicator_value, share_of_total_pct, uncertainty_pct, year, source_notes, id),
             )
 
-            if student_id:
-                audit_query = """
-                    INSERT INTO audit_logs 
-                    (student_id, action_type, table_name, record_id)
-                    VALUES (%s, %s, %s, %s)
-                """
-                cursor.execute(
-                    audit_query,
-                    (student_id, "UPDATE", "greenhouse_emissions", id),
-                )
-
+            refresh_country_coverage(db_conn, "ghg", get_record_country_id(db_conn, "ghg", id))
             db_conn.commit()
+            bump_table_versions("greenhouse_emissions", "country_data_coverage")
+
+            if student_id:
+                record_audit(student_id, "UPDATE", "greenhouse_emissions", id)
             flash("Record updated successfully.", "success")
             return redirect(url_for("ghg.list_ghg"))
 
@@ -795,17 +738,20 @@ def edit_ghg(id):
             source_notes=record_data[7],
         )
 
-        cursor.execute("SELECT country_id, country_name, country_code FROM countries ORDER BY country_name")
-        countries_data = cursor.fetchall()
+        countries_data = cached_query(
+            db_conn, "SELECT country_id, country_name, country_code FROM countries ORDER BY country_name",
+            tables=("countries",), dictionary=False,
+        )
         countries = [
             SimpleNamespace(country_id=row[0], country_name=row[1], country_code=row[2])
             for row in countries_data
         ]
 
-        cursor.execute(
-            "SELECT ghg_indicator_id, indicator_name, unit_symbol FROM ghg_indicator_details ORDER BY indicator_name"
+        indicators_data = cached_query(
+            db_conn,
+            "SELECT ghg_indicator_id, indicator_name, unit_symbol FROM ghg_indicator_details ORDER BY indicator_name",
+            tables=("ghg_indicator_details",), dictionary=False,
         )
-        indicators_data = cursor.fetchall()
         indicators = [
             SimpleNamespace(
                 ghg_indicator_id=row[0], indicator_name=row[1], unit_symbol=row[2]
@@ -813,8 +759,10 @@ def edit_ghg(id):
             for row in indicators_data
         ]
 
-        cursor.execute("SELECT student_id, student_number, full_name FROM students ORDER BY student_number")
-        students_data = cursor.fetchall()
+        students_data = cached_query(
+            db_conn, "SELECT student_id, student_number, full_name FROM students ORDER BY student_number",
+            tables=("students",), dictionary=False,
+        )
         students = [
             SimpleNamespace(
                 student_id=row[0], student_number=row[1], full_name=row[2]
@@ -846,12 +794,15 @@ def delete_ghg(id):
     cursor = db_conn.cursor(dictionary=False)
 
     try:
-        cursor.execute("SELECT row_id FROM greenhouse_emissions WHERE row_id = %s", (id,))
-        if not cursor.fetchone():
+        cursor.execute("SELECT row_id, country_id FROM greenhouse_emissions WHERE row_id = %s", (id,))
+        existing = cursor.fetchone()
+        if not existing:
             abort(404)
 
         cursor.execute("DELETE FROM greenhouse_emissions WHERE row_id = %s", (id,))
+        refresh_country_coverage(db_conn, "ghg", existing[1])
         db_conn.commit()
+        bump_table_versions("greenhouse_emissions", "country_data_coverage")
         flash("Record deleted successfully.", "success")
 
     except MySQLError as e:
@@ -904,16 +855,6 @@ def api_add_ghg():
         )
         new_row_id = cursor.lastrowid
 
-        if audit_user_id:
-            try:
-                cursor.execute("""
-                    INSERT INTO audit_logs 
-                    (student_id, action_type, table_name, record_id)
-                    VALUES (%s, %s, %s, %s)
-                """, (audit_user_id, "CREATE", "greenhouse_emissions", new_row_id))
-            except MySQLError:
-                pass
-
         cursor.execute("""
             SELECT g.row_id, g.country_id, g.ghg_indicator_id, g.year, g.indicator_value,
                    g.share_of_total_pct, g.uncertainty_pct, g.source_notes,
@@ -926,7 +867,11 @@ def api_add_ghg():
         """, (new_row_id,))
         record = cursor.fetchone()
 
+        refresh_country_coverage(db_conn, "ghg", c_id)
         db_conn.commit()
+        bump_table_versions("greenhouse_emissions", "country_data_coverage")
+        if audit_user_id:
+            record_audit(audit_user_id, "CREATE", "greenhouse_emissions", new_row_id)
         return jsonify({"success": True, "record": record}), 201
 
     except IntegrityError as e:
@@ -977,16 +922,6 @@ def api_edit_ghg(id):
             (indicator_value, share_of_total_pct, uncertainty_pct, year, source_notes, id),
         )
 
-        if audit_user_id:
-            try:
-                cursor.execute("""
-                    INSERT INTO audit_logs 
-                    (student_id, action_type, table_name, record_id)
-                    VALUES (%s, %s, %s, %s)
-                """, (audit_user_id, "UPDATE", "greenhouse_emissions", id))
-            except MySQLError:
-                pass
-
         cursor.execute("""
             SELECT g.row_id, g.country_id, g.ghg_indicator_id, g.year, g.indicator_value,
                    g.share_of_total_pct, g.uncertainty_pct, g.source_notes,
@@ -1002,7 +937,11 @@ def api_edit_ghg(id):
         if not record:
             return jsonify({"success": False, "error": "Record not found"}), 404
 
+        refresh_country_coverage(db_conn, "ghg", record["country_id"])
         db_conn.commit()
+        bump_table_versions("greenhouse_emissions", "country_data_coverage")
+        if audit_user_id:
+            record_audit(audit_user_id, "UPDATE", "greenhouse_emissions", id)
         return jsonify({"success": True, "record": record}), 200
 
     except MySQLError as e:
@@ -1020,8 +959,9 @@ def api_delete_ghg(id):
     cursor = db_conn.cursor(dictionary=True)
 
     try:
-        cursor.execute("SELECT row_id FROM greenhouse_emissions WHERE row_id = %s", (id,))
-        if not cursor.fetchone():
+        cursor.execute("SELECT row_id, country_id FROM greenhouse_emissions WHERE row_id = %s", (id,))
+        existing = cursor.fetchone()
+        if not existing:
             return jsonify({"success": False, "error": "Record not found"}), 404
 
         data = request.get_json() or {}
@@ -1031,17 +971,11 @@ def api_delete_ghg(id):
 
         cursor.execute("DELETE FROM greenhouse_emissions WHERE row_id = %s", (id,))
 
-        if audit_user_id:
-            try:
-                cursor.execute("""
-                    INSERT INTO audit_logs 
-                    (student_id, action_type, table_name, record_id)
-                    VALUES (%s, %s, %s, %s)
-                """, (audit_user_id, "DELETE", "greenhouse_emissions", id))
-            except MySQLError:
-                pass
-
+        refresh_country_coverage(db_conn, "ghg", existing["country_id"])
         db_conn.commit()
+        bump_table_versions("greenhouse_emissions", "country_data_coverage")
+        if audit_user_id:
+            record_audit(audit_user_id, "DELETE", "greenhouse_emissions", id)
         return jsonify({"success": True}), 200
 
     except MySQLError as e:
@@ -1084,22 +1018,29 @@ def api_get_ghg(id):
 
 # ---------- MAP VISUALIZATION ----------
 @ghg_bp.route("/map", methods=["GET"])
+@conditional(*domain_tables("ghg"))
 def map_ghg():
     """Display map visualization for GHG data with Country Mode and Region Mode."""
     db = get_db()
     cursor = db.cursor(dictionary=True)
     
     try:
-        cursor.execute("SELECT DISTINCT year FROM greenhouse_emissions ORDER BY year DESC")
-        years = [row['year'] for row in cursor.fetchall()]
+        year_rows = cached_query(
+            db, "SELECT DISTINCT year FROM greenhouse_emissions ORDER BY year DESC", tables=("greenhouse_emissions",)
+        )
+        years = [row['year'] for row in year_rows]
         
-        cursor.execute("SELECT ghg_indicator_id, indicator_name FROM ghg_indicator_details ORDER BY ghg_indicator_id")
-        indicators = cursor.fetchall()
+        indicators = cached_query(
+            db, "SELECT ghg_indicator_id, indicator_name FROM ghg_indicator_details ORDER BY ghg_indicator_id",
+            tables=("ghg_indicator_details",),
+        )
         
-        cursor.execute("SELECT DISTINCT region FROM countries WHERE region IS NOT NULL ORDER BY region")
-        regions = [row['region'] for row in cursor.fetchall()]
+        region_rows = cached_query(
+            db, "SELECT DISTINCT region FROM countries WHERE region IS NOT NULL ORDER BY region", tables=("countries",)
+        )
+        regions = [row['region'] for row in region_rows]
         
-        cursor.execute("""
+        code_rows = cached_query(db, """
             SELECT 
                 country_code,
                 region,
@@ -1107,9 +1048,9 @@ def map_ghg():
             FROM countries
             WHERE country_code IS NOT NULL AND region IS NOT NULL
             ORDER BY country_code
-        """)
-        country_region_map = {row['country_code'].upper(): row['region'] for row in cursor.fetchall()}
-        country_names_map = {row['country_code'].upper(): row['country_name'] for row in cursor.fetchall()}
+        """, tables=("countries",))
+        country_region_map = {row['country_code'].upper(): row['region'] for row in code_rows}
+        country_names_map = {row['country_code'].upper(): row['country_name'] for row in code_rows}
         
     except MySQLError as e:
         flash(f"Database error: {e}", "danger")
@@ -1132,6 +1073,7 @@ def map_ghg():
 
 
 @ghg_bp.route("/api/region-stats", methods=["GET"])
+@conditional(*domain_tables("ghg"))
 def get_region_ghg_stats():
     """Return aggregated GHG stats for a given region, year, and indicator."""
     region = request.args.get("region", type=str)
@@ -10,6 +10,17 @@ from flask import (
     abort,
 )
 from App.db import get_db
+from App.pagination import KeysetPager, cached_count
+from App.cache import cached_query, bump_table_versions
+from App.coverage import refresh_country_coverage, get_record_country_id
+from App.snapshots import refresh_snapshot_rankings, get_record_snapshot_key, get_snapshot_rows
+from App.trends import attach_trends, trends_response
+from App.timeseries import timeseries_response
+from App.statements import STATEMENTS
+from App.audit import record_audit
+from App.export import export_response
+from App.conditional import conditional, domain_tables
+from App.search import text_condition
 from App.routes.login import admin_required, editor_required
 
 health_bp = Blueprint("health", __name__, url_prefix="/health")
@@ -18,27 +29,23 @@ health_bp = Blueprint("health", __name__, url_prefix="/health")
 # helper funcs
 # ---------------------------------------------------------
 def _get_countries():
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT country_id, country_name, country_code, region FROM countries ORDER BY country_name")
-    rows = cur.fetchall()
-    cur.close()
-    return rows
+    return cached_query(
+        get_db(),
+        "SELECT country_id, country_name, country_code, region FROM countries ORDER BY country_name",
+        tables=("countries",),
+    )
 
 def _get_indicators():
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT health_indicator_id, indicator_name, unit_symbol FROM health_indicator_details ORDER BY indicator_name")
-    rows = cur.fetchall()
-    cur.close()
-    return rows
+    return cached_query(
+        get_db(),
+        "SELECT health_indicator_id, indicator_name, unit_symbol FROM health_indicator_details ORDER BY indicator_name",
+        tables=("health_indicator_details",),
+    )
 
 def _get_max_year_for_indicator(conn, indicator_id):
     if not indicator_id: return None
-    cur = conn.cursor()
-    cur.execute("SELECT MAX(year) FROM health_system WHERE health_indicator_id = %s", (indicator_id,))
-    row = cur.fetchone()
-    cur.close()
+    row = cached_query(conn, STATEMENTS["health.max_year"], (indicator_id,),
+                       tables=("health_system",), one=True, dictionary=False, prepared=True)
     return row[0] if row else None
 
 def _safe_float(x):
@@ -84,31 +91,9 @@ def _build_snapshot(conn, indicators, countries, snap_indicator_id, snap_year, s
 
     if not snap_year: return snapshot
 
+    # precomputed by App/snapshots.py, one read on the ranking table
     try:
-        cur = conn.cursor(dictionary=True)
-        cur.execute("""
-            WITH base AS (
-                SELECT
-                    hs.country_id, hs.health_indicator_id, hs.year, hs.indicator_value,
-                    c.country_name, c.country_code, c.region,
-                    hi.indicator_name, hi.unit_symbol
-                FROM health_system hs
-                JOIN countries c ON c.country_id = hs.country_id
-                JOIN health_indicator_details hi ON hi.health_indicator_id = hs.health_indicator_id
-                WHERE hs.health_indicator_id = %s AND hs.year = %s AND hs.indicator_value IS NOT NULL
-            ),
-            ranked AS (
-                SELECT *,
-                    RANK() OVER (ORDER BY indicator_value DESC) AS global_rank,
-                    RANK() OVER (PARTITION BY region ORDER BY indicator_value DESC) AS region_rank,
-                    AVG(indicator_value) OVER () AS global_avg,
-                    AVG(indicator_value) OVER (PARTITION BY region) AS region_avg
-                FROM base
-            )
-            SELECT * FROM ranked ORDER BY indicator_value DESC;
-        """, (snap_indicator_id, snap_year))
-        ranked_rows = cur.fetchall()
-        cur.close()
+        ranked_rows = get_snapshot_rows(conn, "health", snap_indicator_id, snap_year)
     except Exception:
         ranked_rows = []
 
@@ -139,10 +124,40 @@ def _build_snapshot(conn, indicators, countries, snap_indicator_id, snap_year, s
 
     return snapshot
 
+def _list_filters():
+    """WHERE clause (aliases hs, c, hi) and params for the list filters in request.args."""
+    country_id = request.args.get("country_id", "")
+    indicator_id = request.args.get("indicator_id", "")
+    year = request.args.get("year", "")
+    q = request.args.get("q", "").strip()
+
+    where_sql = "WHERE 1=1"
+    params = []
+
+    if country_id:
+        where_sql += " AND hs.country_id = %s"
+        params.append(country_id)
+    if indicator_id:
+        where_sql += " AND hs.health_indicator_id = %s"
+        params.append(indicator_id)
+    if year:
+        where_sql += " AND hs.year = %s"
+        params.append(year)
+    if q:
+        q_sql, q_params = text_condition(
+            get_db(), q,
+            ("hs.country_id", "countries", ("country_name", "country_code")),
+            ("hs.health_indicator_id", "health_indicator_details", ("indicator_name",)),
+        )
+        where_sql += f" AND {q_sql}"
+        params.extend(q_params)
+    return where_sql, params
+
 # ---------------------------------------------------------
 # 1. List
 # ---------------------------------------------------------
 @health_bp.route("/", methods=["GET"])
+@conditional(*domain_tables("health"))
 def list_health():
     country_id = request.args.get("country_id", "")
     indicator_id = request.args.get("indicator_id", "")
@@ -167,22 +182,7 @@ def list_health():
     
     snapshot = _build_snapshot(conn, indicators, countries, snap_indicator_id, snap_year, snap_country_id)
 
-    where_sql = "WHERE 1=1"
-    params = []
-
-    if country_id:
-        where_sql += " AND hs.country_id = %s"
-        params.append(country_id)
-    if indicator_id:
-        where_sql += " AND hs.health_indicator_id = %s"
-        params.append(indicator_id)
-    if year:
-        where_sql += " AND hs.year = %s"
-        params.append(year)
-    if q:
-        where_sql += " AND (c.country_name LIKE %s OR c.country_code LIKE %s OR hi.indicator_name LIKE %s)"
-        lq = f"%{q}%"
-        params.extend([lq, lq, lq])
+    where_sql, params = _list_filters()
 
     cur = conn.cursor(dictionary=True)
     count_sql = f"""
@@ -191,13 +191,23 @@ def list_health():
         JOIN health_indicator_details hi ON hs.health_indicator_id = hi.health_indicator_id
         {where_sql}
     """
-    cur.execute(count_sql, params)
-    total_count = int(cur.fetchone()["total"])
+    total_count = cached_count(cur, count_sql, params)
     total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 1
-    
-    offset = (page - 1) * per_page
-    sort_map = {"row_id": "hs.row_id", "country": "c.country_name", "value": "hs.indicator_value", "year": "hs.year"}
-    sort_col = sort_map.get(sort_by, "hs.row_id")
+    page = max(1, min(page, total_pages))
+
+    sort_map = {
+        "row_id": ("hs.row_id", "row_id", False),
+        "country": ("c.country_name", "country_name", False),
+        "value": ("hs.indicator_value", "indicator_value", True),
+        "year": ("hs.year", "year", False),
+    }
+    sort_key = sort_map.get(sort_by, sort_map["row_id"])
+    keys = [sort_key] if sort_key[0] == "hs.row_id" else [sort_key, sort_map["row_id"]]
+    pager = KeysetPager(keys, order == "desc", request.args.get("cursor"), per_page, signature=f"{sort_key[0]}:{order}")
+
+    seek_sql, seek_params = pager.where()
+    if seek_sql:
+        where_sql += f" AND {seek_sql}"
 
     data_sql = f"""
         SELECT hs.*, c.country_name, c.country_code, c.region, hi.indicator_name, hi.unit_symbol
@@ -205,14 +215,15 @@ def list_health():
         JOIN countries c ON hs.country_id = c.country_id
         JOIN health_indicator_details hi ON hs.health_indicator_id = hi.health_indicator_id
         {where_sql}
-        ORDER BY {sort_col} {'DESC' if order == 'desc' else 'ASC'}
-        LIMIT {per_page} OFFSET {offset}
+        ORDER BY {pager.order_by()}
+        {pager.limit_sql(page)}
     """
-    cur.execute(data_sql, params)
-    rows = cur.fetchall()
+    cur.execute(data_sql, params + seek_params)
+    rows = pager.finish(cur.fetchall(), page, total_pages)
+    attach_trends(cur, "health", rows)
     cur.close()
 
-    base_qs = urlencode({k: v for k, v in request.args.items() if k != 'page'})
+    base_qs = urlencode({k: v for k, v in request.args.items() if k not in ('page', 'cursor')})
 
     return render_template(
         "health_list.html",
@@ -222,9 +233,36 @@ def list_health():
         snapshot=snapshot,
         filters={"country_id": country_id, "indicator_id": indicator_id, "year": year, "q": q, "sort_by": sort_by, "order": order},
         snap_filters={"snap_indicator_id": snap_indicator_id, "snap_year": snapshot["year"], "snap_country_id": snap_country_id},
-        page=page, total_pages=total_pages, total_count=total_count, base_qs=base_qs
+        page=page, total_pages=total_pages, total_count=total_count, base_qs=base_qs,
+        next_cursor=pager.next_cursor, prev_cursor=pager.prev_cursor
     )
 
+@health_bp.route("/export.<any(csv, ndjson):fmt>", methods=["GET"])
+def export_health(fmt):
+    """Every row matching the list filters, streamed as CSV or NDJSON."""
+    where_sql, params = _list_filters()
+    sql = f"""
+        SELECT hs.row_id, hs.country_id, c.country_name, c.country_code, c.region,
+               hs.health_indicator_id, hi.indicator_name, hi.unit_symbol,
+               hs.year, hs.indicator_value, hs.source_notes
+        FROM health_system hs
+        JOIN countries c ON hs.country_id = c.country_id
+        JOIN health_indicator_details hi ON hs.health_indicator_id = hi.health_indicator_id
+        {where_sql}
+        ORDER BY hs.row_id
+    """
+    return export_response("health", sql, params, fmt)
+
+@health_bp.route("/api/timeseries", methods=["GET"])
+@conditional(*domain_tables("health"))
+def api_timeseries():
+    return timeseries_response(get_db(), "health")
+
+@health_bp.route("/api/trends", methods=["GET"])
+@conditional(*domain_tables("health"))
+def api_trends():
+    return trends_response(get_db(), "health")
+
 # ---------------------------------------------------------
 # Add, Edit, Delete Operations 
 # ---------------------------------------------------------
@@ -248,10 +286,12 @@ def add_health():
             """, (c_id, i_id, val, year, note))
             new_id = cur.lastrowid
 
-            if student_id:
-                cur.execute("INSERT INTO audit_logs (student_id, action_type, table_name, record_id) VALUES (%s, %s, %s, %s)",
-                            (student_id, "CREATE", "health_system", new_id))
+            refresh_country_coverage(db, "health", c_id)
+            refresh_snapshot_rankings(db, "health", i_id, year)
             db.commit()
+            bump_table_versions("health_system", "country_data_coverage", "health_snapshot_rankings")
+            if student_id:
+                record_audit(student_id, "CREATE", "health_system", new_id)
             flash("Record added successfully.", "success")
             return redirect(url_for("health.list_health"))
         except Exception as e:
@@ -276,10 +316,12 @@ def edit_health(id):
             student_id = session.get("student_id")
 
             cur.execute("UPDATE health_system SET indicator_value=%s, year=%s, source_notes=%s WHERE row_id=%s", (val, year, note, id))
-            if student_id:
-                cur.execute("INSERT INTO audit_logs (student_id, action_type, table_name, record_id) VALUES (%s, %s, %s, %s)",
-                            (student_id, "UPDATE", "health_system", id))
+            refresh_country_coverage(db, "health", record["country_id"])
+            refresh_snapshot_rankings(db, "health", record["health_indicator_id"], record["year"], year)
             db.commit()
+            bump_table_versions("health_system", "country_data_coverage", "health_snapshot_rankings")
+            if student_id:
+                record_audit(student_id, "UPDATE", "health_system", id)
             flash("Record updated.", "success")
             return redirect(url_for("health.list_health"))
         except Exception as e:
@@ -293,12 +335,16 @@ def delete_health(id):
     db = get_db()
     try:
         cur = db.cursor()
+        country_id = get_record_country_id(db, "health", id)
+        snap_indicator_id, snap_year = get_record_snapshot_key(db, "health", id)
         student_id = session.get("student_id")
-        if student_id:
-            cur.execute("INSERT INTO audit_logs (student_id, action_type, table_name, record_id) VALUES (%s, %s, %s, %s)",
-                        (student_id, "DELETE", "health_system", id))
         cur.execute("DELETE FROM health_system WHERE row_id = %s", (id,))
+        refresh_country_coverage(db, "health", country_id)
+        refresh_snapshot_rankings(db, "health", snap_indicator_id, snap_year)
         db.commit()
+        bump_table_versions("health_system", "country_data_coverage", "health_snapshot_rankings")
+        if student_id:
+            record_audit(student_id, "DELETE", "health_system", id)
         flash("Record deleted.", "success")
     except Exception as e:
         db.rollback()
@@ -10,26 +10,22 @@ from flask import (
     abort,
 )
 from App.db import get_db
+from App.pagination import KeysetPager, cached_count
+from App.cache import cached_query, bump_table_versions
+from App.coverage import refresh_country_coverage
+from App.trends import attach_trends, trends_response
+from App.timeseries import timeseries_response
+from App.audit import record_audit
+from App.export import export_response
+from App.conditional import conditional, domain_tables
+from App.search import text_condition
 from App.routes.login import admin_required, editor_required
 
 sustainability_bp = Blueprint("sustainability", __name__, url_prefix="/sustainability")
 
 
-# 1. READ (LIST + FILTER)
-@sustainability_bp.route("/", methods=["GET"])
-def list_sustainability():
-    country_name = request.args.get("country", type=str)
-    country_code = request.args.get("code", type=str)
-    year = request.args.get("year", type=int)
-    indicator_name = request.args.get("indicator", type=str)
-    unit = request.args.get("unit", type=str)
-    sort_by = request.args.get("sort_by", type=str)
-    order = request.args.get("order", type=str)
-
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    base_sql = """
+# 0. HELPER: LIST QUERY + FILTERS (shared by the list and the exports)
+_LIST_SQL = """
         SELECT
             sd.data_id,
             sd.country_id,
@@ -41,8 +37,8 @@ def list_sustainability():
             c.country_code,
             c.region,
             si.indicator_name,
-                si.indicator_code,
-                si.unit_symbol
+            si.indicator_code,
+            si.unit_symbol
         FROM sustainability_data sd
         JOIN countries c
             ON c.country_id = sd.country_id
@@ -50,51 +46,101 @@ def list_sustainability():
             ON si.sus_indicator_id = sd.sus_indicator_id
     """
 
-    conditions = []
-    params = []
-
-    if country_name:
-        conditions.append("c.country_name LIKE %s")
-        params.append(f"%{country_name}%")
 
-    if country_code:
-        conditions.append("c.country_code LIKE %s")
-        params.append(f"%{country_code}%")
+def _list_filters():
+    country_name = request.args.get("country", type=str)
+    country_code = request.args.get("code", type=str)
+    year = request.args.get("year", type=int)
+    indicator_name = request.args.get("indicator", type=str)
+    unit = request.args.get("unit", type=str)
 
-    if indicator_name:
-        conditions.append("si.indicator_name LIKE %s")
-        params.append(f"%{indicator_name}%")
+    conditions = []
+    params = []
 
-    if unit:
-        conditions.append("si.unit_symbol LIKE %s")
-        params.append(f"%{unit}%")
+    # free-text filters are resolved to country / indicator ids first
+    text_filters = (
+        (country_name, "sd.country_id", "countries", "country_name"),
+        (country_code, "sd.country_id", "countries", "country_code"),
+        (indicator_name, "sd.sus_indicator_id", "sustainability_indicator_details", "indicator_name"),
+        (unit, "sd.sus_indicator_id", "sustainability_indicator_details", "unit_symbol"),
+    )
+    for term, column, table, field in text_filters:
+        if term:
+            sql, p = text_condition(get_db(), term, (column, table, (field,)))
+            conditions.append(sql)
+            params.extend(p)
 
     if year:
         conditions.append("sd.year = %s")
         params.append(year)
 
-    if conditions:
-        base_sql += " WHERE " + " AND ".join(conditions)
+    where_sql = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+    return where_sql, params
+
+
+# 1. READ (LIST + FILTER)
+@sustainability_bp.route("/", methods=["GET"])
+@conditional(*domain_tables("sustainability"))
+def list_sustainability():
+    country_name = request.args.get("country", type=str)
+    country_code = request.args.get("code", type=str)
+    year = request.args.get("year", type=int)
+    indicator_name = request.args.get("indicator", type=str)
+    unit = request.args.get("unit", type=str)
+    sort_by = request.args.get("sort_by", type=str)
+    order = request.args.get("order", type=str)
+    page = request.args.get("page", 1, type=int)
+    per_page = 500
+
+    db = get_db()
+    cur = db.cursor(dictionary=True)
+
+    base_sql = _LIST_SQL
+    where_sql, params = _list_filters()
+
+    count_sql = """
+        SELECT COUNT(*) AS total
+        FROM sustainability_data sd
+        JOIN countries c
+            ON c.country_id = sd.country_id
+        JOIN sustainability_indicator_details si
+            ON si.sus_indicator_id = sd.sus_indicator_id
+    """ + where_sql
+    total_count = cached_count(cur, count_sql, params)
+    total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 1
+    page = max(1, min(page, total_pages))
 
     allowed_sorts = {
-        'id': 'sd.data_id',
-        'country': 'c.country_name',
-        'code': 'c.country_code',
-        'region': 'c.region',
-        'indicator': 'si.indicator_name',
-        'unit': 'si.unit_symbol',
-        'year': 'sd.year',
-        'value': 'sd.indicator_value'
+        'id': ('sd.data_id', 'data_id', False),
+        'country': ('c.country_name', 'country_name', False),
+        'code': ('c.country_code', 'country_code', True),
+        'region': ('c.region', 'region', True),
+        'indicator': ('si.indicator_name', 'indicator_name', False),
+        'unit': ('si.unit_symbol', 'unit_symbol', True),
+        'year': ('sd.year', 'year', False),
+        'value': ('sd.indicator_value', 'indicator_value', True)
     }
 
     # default to id ascending
-    sort_expr = allowed_sorts.get(sort_by, 'sd.data_id')
-    order_keyword = 'DESC' if (order and order.lower() == 'desc') else 'ASC'
+    sort_key = allowed_sorts.get(sort_by, allowed_sorts['id'])
+    descending = bool(order and order.lower() == 'desc')
+    keys = [sort_key] if sort_key[0] == 'sd.data_id' else [sort_key, allowed_sorts['id']]
 
-    base_sql += f" ORDER BY {sort_expr} {order_keyword} LIMIT 500"
+    # indicator_value is a FLOAT column: the value sent back in a cursor does not
+    # compare equal to the stored float, so that sort stays on OFFSET paging.
+    token = request.args.get("cursor", type=str) if sort_key[0] != 'sd.indicator_value' else None
+    pager = KeysetPager(keys, descending, token, per_page,
+                        signature=f"{sort_key[0]}:{'desc' if descending else 'asc'}")
 
-    cur.execute(base_sql, params)
-    rows = cur.fetchall()
+    seek_sql, seek_params = pager.where()
+    if seek_sql:
+        where_sql += (" AND " if where_sql else " WHERE ") + seek_sql
+
+    base_sql += f"{where_sql} ORDER BY {pager.order_by()} {pager.limit_sql(page)}"
+
+    cur.execute(base_sql, params + seek_params)
+    rows = pager.finish(cur.fetchall(), page, total_pages)
+    attach_trends(cur, "sustainability", rows)
 
     grouped = {}
     for r in rows:
@@ -128,27 +174,51 @@ def list_sustainability():
         current_sort_by=sort_by or 'data_id',
         current_order=(order or 'asc').lower(),
         sort_options=[('data_id','ID'),('country','Country'),('code','Code'),('region','Region'),('indicator','Indicator'),('unit','Unit'),('year','Year'),('value','Value')],
+        page=page,
+        total_pages=total_pages,
+        total_count=total_count,
+        next_cursor=pager.next_cursor,
+        prev_cursor=pager.prev_cursor,
     )
 
 
+# 1b. TRENDS (JSON)
+@sustainability_bp.route("/api/trends", methods=["GET"])
+@conditional(*domain_tables("sustainability"))
+def api_trends():
+    return trends_response(get_db(), "sustainability")
+
+
+# 1c. TIME SERIES (JSON)
+@sustainability_bp.route("/api/timeseries", methods=["GET"])
+@conditional(*domain_tables("sustainability"))
+def api_timeseries():
+    return timeseries_response(get_db(), "sustainability")
+
+
+# 1d. EXPORT (streamed CSV / NDJSON, same filters as the list)
+@sustainability_bp.route("/export.<any(csv, ndjson):fmt>", methods=["GET"])
+def export_sustainability(fmt):
+    where_sql, params = _list_filters()
+    sql = f"{_LIST_SQL}{where_sql} ORDER BY sd.data_id"
+    return export_response("sustainability", sql, params, fmt)
+
+
 # 2. HELPER: COUNTRY + INDICATOR LISTS FOR FORM
 def _load_countries_and_indicators():
     db = get_db()
-    cur = db.cursor(dictionary=True)
 
-    cur.execute("""
+    countries = cached_query(db, """
         SELECT country_id, country_name, country_code
         FROM countries
         ORDER BY country_name
-    """)
-    countries = cur.fetchall()
+    """, tables=("countries",))
 
-    cur.execute("""
+    indicators = cached_query(db, """
         SELECT sus_indicator_id, indicator_name, indicator_code, unit_symbol
         FROM sustainability_indicator_details
         ORDER BY indicator_name
-    """)
-    indicators = cur.fetchall()
+    """, tables=("sustainability_indicator_details",))
 
     return countries, indicators
 
@@ -174,28 +244,16 @@ def add_sustainability():
                 VALUES (%s, %s, %s, %s, %s)
             """
             cur.execute(insert_sql, (c_id, i_id, val, year, note))
+            refresh_country_coverage(db, "sustainability", c_id)
             db.commit()
+            bump_table_versions("sustainability_data", "country_data_coverage")
 
             new_data_id = cur.lastrowid
 
             # AUDIT
             current_student_id = session.get("student_id")
             if current_student_id:
-                log_sql = """
-                    INSERT INTO audit_logs
-                        (student_id, action_type, table_name, record_id)
-                    VALUES (%s, %s, %s, %s)
-                """
-                cur.execute(
-                    log_sql,
-                    (
-                        current_student_id,
-                        "CREATE",
-                        "sustainability_data",
-                        new_data_id,
-                    ),
-                )
-                db.commit()
+                record_audit(current_student_id, "CREATE", "sustainability_data", new_data_id)
 
             flash("Record added successfully.", "success")
             return redirect(url_for("sustainability.list_sustainability"))
@@ -266,26 +324,14 @@ def edit_sustainability(id):
                 WHERE data_id = %s
             """
             cur.execute(update_sql, (indicator_value, year, source_note, id))
+            refresh_country_coverage(db, "sustainability", record["country_id"])
             db.commit()
+            bump_table_versions("sustainability_data", "country_data_coverage")
 
             # AUDIT
             current_student_id = session.get("student_id")
             if current_student_id:
-                log_sql = """
-                    INSERT INTO audit_logs
-                        (student_id, action_type, table_name, record_id)
-                    VALUES (%s, %s, %s, %s)
-                """
-                cur.execute(
-                    log_sql,
-                    (
-                        current_student_id,
-                        "UPDATE",
-                        "sustainability_data",
-                        id,
-                    ),
-                )
-                db.commit()
+                record_audit(current_student_id, "UPDATE", "sustainability_data", id)
 
             flash("Record updated successfully.", "success")
             return redirect(url_for("sustainability.list_sustainability"))
@@ -315,7 +361,7 @@ def delete_sustainability(id):
     # check if record exists
     cur.execute(
         """
-        SELECT data_id
+        SELECT data_id, country_id
         FROM sustainability_data
         WHERE data_id = %s
         """,
@@ -326,30 +372,17 @@ def delete_sustainability(id):
         abort(404)
 
     try:
-        # AUDIT
-        current_student_id = session.get("student_id")
-        if current_student_id:
-            cur2 = db.cursor()
-            log_sql = """
-                INSERT INTO audit_logs
-                    (student_id, action_type, table_name, record_id)
-                VALUES (%s, %s, %s, %s)
-            """
-            cur2.execute(
-                log_sql,
-                (
-                    current_student_id,
-                    "DELETE",
-                    "sustainability_data",
-                    id,
-                ),
-            )
-            db.commit()
-
         # DELETE
         delete_sql = "DELETE FROM sustainability_data WHERE data_id = %s"
         cur.execute(delete_sql, (id,))
+        refresh_country_coverage(db, "sustainability", record["country_id"])
         db.commit()
+        bump_table_versions("sustainability_data", "country_data_coverage")
+
+        # AUDIT
+        current_student_id = session.get("student_id")
+        if current_student_id:
+            record_audit(current_student_id, "DELETE", "sustainability_data", id)
 
         flash("Record deleted successfully.", "success")
 
@@ -0,0 +1,25 @@
+from flask import Blueprint, jsonify, request
+
+from App.db import get_db
+from App.conditional import conditional
+from App.typeahead import TYPEAHEAD_TABLES, suggest
+
+typeahead_bp = Blueprint("typeahead", __name__)
+
+
+# ---------------------------------------------------------
+# Autocomplete for countries and indicators (all domains)
+# ---------------------------------------------------------
+@typeahead_bp.route("/api/typeahead", methods=["GET"])
+@conditional(*TYPEAHEAD_TABLES)
+def api_typeahead():
+    """
+    ?q=unit&kind=country,indicator&domain=health,energy&limit=10
+    -> {"q": "unit", "results": [{kind, id, label, rank, ...}]}
+    """
+    q = request.args.get("q", "", type=str)
+    kinds = tuple(k for k in request.args.get("kind", "country,indicator").split(",") if k)
+    domains = tuple(d for d in request.args.get("domain", "").split(",") if d) or None
+    limit = request.args.get("limit", 10, type=int)
+    results = suggest(get_db(), q, kinds, domains, limit) if q.strip() else []
+    return jsonify({"q": q, "results": results})
@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+import unicodedata
+
+from App.cache import get_cache
+from App.domains import DOMAINS
+
+# ---------------------------------------------------------
+# Free-text filters resolved to id sets (in-process n-gram index)
+# ---------------------------------------------------------
+# The list filters match substrings of country and indicator names
+# (`?q=`, `?country=`, `?indicator=`). Written as `c.country_name LIKE
+# '%...%'` against the joined fact table they cannot use an index, so every
+# filtered page scanned the fact table.
+#
+# Instead, the text is first matched against the small dimension tables
+# (countries, *_indicator_details) and the fact query filters on the ids
+# that matched: `hs.country_id IN (...)`, which uses the fact table's
+# country / indicator indexes.
+#
+# Matching uses an in-process index of character n-grams (SEARCH_NGRAM,
+# default 3) per searchable column: the candidate ids of a term are the
+# intersection of the id sets of its n-grams, and each candidate is then
+# checked for the whole substring. Text is compared case- and
+# accent-insensitively, like the tables' _ci collation. An index is rebuilt
+# when its table's version in App/cache.py changes or after SEARCH_TTL
+# seconds. With SEARCH_INDEX=0 the ids come from a LIKE query on the
+# dimension table instead.
+
+SEARCH_CONFIG = {
+    "enabled": os.getenv("SEARCH_INDEX", "1") not in ("0", "false", "no", ""),
+    "ttl": float(os.getenv("SEARCH_TTL", "300")),
+    "ngram": max(1, int(os.getenv("SEARCH_NGRAM", "3"))),
+}
+
+# table -> (id column, searchable columns)
+SEARCH_SOURCES = {
+    "countries": ("country_id", ("country_name", "country_code")),
+}
+for _d in DOMAINS.values():
+    SEARCH_SOURCES[_d["detail_table"]] = (_d["indicator_pk"], ("indicator_name", _d["unit_column"]))
+
+
+def fold(text):
+    """Lower-case `text` and strip accents ("Côte" -> "cote")."""
+    if text is None:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text).casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+class TextIndex:
+    """N-gram index over the searchable columns of one table."""
+
+    def __init__(self, table, rows, n, versions):
+        self.table = table
+        self.n = n
+        self.versions = versions
+        self.built_at = time.monotonic()
+        self.texts = {}  # column -> {id: folded text}
+        self.grams = {}  # column -> {gram: set of ids}
+        id_col, columns = SEARCH_SOURCES[table]
+        for col in columns:
+            texts = {row[id_col]: fold(row[col]) for row in rows if row[col] is not None}
+            grams = {}
+            for row_id, text in texts.items():
+                for i in range(len(text) - n + 1):
+                    grams.setdefault(text[i:i + n], set()).add(row_id)
+            self.texts[col] = texts
+            self.grams[col] = grams
+
+    def match(self, term, columns=None):
+        """Ids whose text in any of `columns` (default all) contains `term`."""
+        term = fold(term)
+        found = set()
+        for col in columns or self.texts:
+            texts = self.texts[col]
+            if len(term) < self.n:
+                candidates = texts.keys()
+            else:
+                grams = self.grams[col]
+                sets = [grams.get(term[i:i + self.n]) for i in range(len(term) - self.n + 1)]
+                if any(s is None for s in sets):
+                    continue
+                candidates = set.intersection(*sorted(sets, key=len))
+            found.update(i for i in candidates if term in texts[i])
+        return found
+
+
+_indexes = {}
+_index_lock = threading.Lock()
+
+
+def _build(conn, table, versions):
+    id_col, columns = SEARCH_SOURCES[table]
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute(f"SELECT {id_col}, {', '.join(columns)} FROM {table}")
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+    return TextIndex(table, rows, SEARCH_CONFIG["ngram"], versions)
+
+
+def get_index(conn, table):
+    """Current n-gram index of `table` (rebuilt when the table was bumped)."""
+    versions = get_cache().versions((table,))
+    index = _indexes.get(table)
+    if index is not None and index.versions == versions \
+            and time.monotonic() - index.built_at < SEARCH_CONFIG["ttl"]:
+        return index
+
+    with _index_lock:
+        index = _indexes.get(table)
+        if index is None or index.versions != versions \
+                or time.monotonic() - index.built_at >= SEARCH_CONFIG["ttl"]:
+            index = _build(conn, table, versions)
+            _indexes[table] = index
+    return index
+
+
+def invalidate(table=None):
+    """Drop the index of `table` (or all of them)."""
+    with _index_lock:
+        if table is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(table, None)
+
+
+def match_ids(conn, table, term, columns=None):
+    """Sorted ids of `table` rows whose `columns` (default all searchable) contain `term`."""
+    id_col, searchable = SEARCH_SOURCES[table]
+    columns = tuple(columns or searchable)
+    if SEARCH_CONFIG["enabled"]:
+        return sorted(get_index(conn, table).match(term, columns))
+
+    cur = conn.cursor()
+    try:
+        like = f"%{term}%"
+        cur.execute(
+            f"SELECT {id_col} FROM {table} WHERE "
+            + " OR ".join(f"{col} LIKE %s" for col in columns),
+            (like,) * len(columns),
+        )
+        return sorted(row[0] for row in cur.fetchall())
+    finally:
+        cur.close()
+
+
+def id_condition(column, ids):
+    """(sql, params) restricting `column` to `ids`; never true for an empty set."""
+    if not ids:
+        return "1=0", []
+    return f"{column} IN ({', '.join(['%s'] * len(ids))})", list(ids)
+
+
+def text_condition(conn, term, *targets):
+    """
+    (sql, params) for "any of `targets` matches `term`", where each target is
+    (fact column, dimension table, searchable columns or None), e.g.
+    ("hs.country_id", "countries", ("country_name", "country_code")).
+    """
+    parts, params = [], []
+    for column, table, columns in targets:
+        ids = match_ids(conn, table, term, columns)
+        if ids:
+            sql, p = id_condition(column, ids)
+            parts.append(sql)
+            params.extend(p)
+    if not parts:
+        return "1=0", []
+    if len(parts) == 1:
+        return parts[0], params
+    return "(" + " OR ".join(parts) + ")", params
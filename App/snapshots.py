@@ -0,0 +1,182 @@
+from App.domains import DOMAINS
+from App.statements import query_statement, register_statement
+
+# ---------------------------------------------------------
+# Materialized snapshot rankings (health, freshwater)
+# ---------------------------------------------------------
+# The snapshot panel of the health and freshwater list pages shows, for one
+# (indicator, year): every country's global and regional rank, the global and
+# regional averages and the top/bottom 10. Instead of running the ranking
+# window functions on every page view, the result is stored per domain in
+# <domain>_snapshot_rankings and served with one read on its primary key.
+#
+# The loader rebuilds the tables; the add/edit/delete handlers refresh only
+# the (indicator, year) slices they touched, inside their own transaction.
+
+SNAPSHOT_TABLES = {
+    "health": "health_snapshot_rankings",
+    "freshwater": "freshwater_snapshot_rankings",
+}
+
+for _domain, _table in SNAPSHOT_TABLES.items():
+    _ind_pk = DOMAINS[_domain]["indicator_pk"]
+    register_statement(f"{_domain}.snapshot_rows", f"""
+        SELECT
+            sr.country_id, sr.{_ind_pk}, sr.year, sr.indicator_value,
+            sr.global_rank, sr.region_rank, sr.global_avg, sr.region_avg,
+            c.country_name, c.country_code, c.region
+        FROM {_table} sr
+        JOIN countries c ON c.country_id = sr.country_id
+        WHERE sr.{_ind_pk} = %s AND sr.year = %s
+        ORDER BY sr.global_rank, sr.country_id
+    """)
+
+
+def _ranking_select(d, where_sql):
+    """INSERT...SELECT body computing ranks/averages with window functions."""
+    ind_pk = d["indicator_pk"]
+    partition = f"f.{ind_pk}, f.year"
+    return f"""
+        SELECT
+            f.{ind_pk},
+            f.year,
+            f.country_id,
+            f.indicator_value,
+            RANK() OVER (PARTITION BY {partition} ORDER BY f.indicator_value DESC),
+            RANK() OVER (PARTITION BY {partition}, c.region ORDER BY f.indicator_value DESC),
+            AVG(f.indicator_value) OVER (PARTITION BY {partition}),
+            AVG(f.indicator_value) OVER (PARTITION BY {partition}, c.region)
+        FROM {d['fact_table']} f
+        JOIN countries c ON c.country_id = f.country_id
+        WHERE f.indicator_value IS NOT NULL {where_sql}
+    """
+
+
+def _rank_rows(rows):
+    """
+    Python equivalent of the window functions, for servers without them.
+    `rows` are (indicator_id, year, country_id, value, region) tuples.
+    """
+    groups = {}
+    for ind, year, cid, value, region in rows:
+        groups.setdefault((ind, year), []).append((cid, value, region or "Unknown"))
+
+    ranked = []
+    for (ind, year), items in groups.items():
+        items.sort(key=lambda it: it[1], reverse=True)
+        global_avg = float(sum(float(it[1]) for it in items)) / len(items)
+
+        by_region = {}
+        for it in items:
+            by_region.setdefault(it[2], []).append(it)
+        region_rank = {}
+        region_avg = {}
+        for reg, reg_items in by_region.items():
+            region_avg[reg] = float(sum(float(it[1]) for it in reg_items)) / len(reg_items)
+            last_value, last_rank = None, 0
+            for idx, it in enumerate(reg_items):
+                if it[1] != last_value:
+                    last_value, last_rank = it[1], idx + 1
+                region_rank[it[0]] = last_rank
+
+        last_value, last_rank = None, 0
+        for idx, (cid, value, reg) in enumerate(items):
+            if value != last_value:
+                last_value, last_rank = value, idx + 1
+            ranked.append((ind, year, cid, value, last_rank, region_rank[cid],
+                           global_avg, region_avg[reg]))
+    return ranked
+
+
+def _fill(conn, domain, where_sql="", params=()):
+    d = DOMAINS[domain]
+    ind_pk = d["indicator_pk"]
+    table = SNAPSHOT_TABLES[domain]
+    columns = (f"({ind_pk}, year, country_id, indicator_value, "
+               "global_rank, region_rank, global_avg, region_avg)")
+    cur = conn.cursor()
+    try:
+        try:
+            cur.execute(
+                f"INSERT INTO {table} {columns} " + _ranking_select(d, where_sql),
+                params,
+            )
+        except Exception as e:
+            # window functions need MySQL 8; rank in Python on older servers
+            if getattr(e, "errno", None) != 1064:
+                raise
+            cur.execute(
+                f"""
+                SELECT f.{ind_pk}, f.year, f.country_id, f.indicator_value, c.region
+                FROM {d['fact_table']} f
+                JOIN countries c ON c.country_id = f.country_id
+                WHERE f.indicator_value IS NOT NULL {where_sql}
+                """,
+                params,
+            )
+            ranked = _rank_rows(cur.fetchall())
+            if ranked:
+                cur.executemany(
+                    f"INSERT INTO {table} {columns} VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                    ranked,
+                )
+    finally:
+        cur.close()
+
+
+def rebuild_snapshot_rankings(conn):
+    """Recompute every snapshot ranking table from scratch (used after a bulk load)."""
+    for domain, table in SNAPSHOT_TABLES.items():
+        cur = conn.cursor()
+        try:
+            cur.execute(f"DELETE FROM {table}")
+        finally:
+            cur.close()
+        _fill(conn, domain)
+    conn.commit()
+
+
+def refresh_snapshot_rankings(conn, domain, indicator_id, *years):
+    """
+    Recompute the ranking slice of (indicator_id, year) for each of `years`.
+
+    Does not commit: call it inside the handler's transaction, right before
+    db.commit(), together with refresh_country_coverage().
+    """
+    if domain not in SNAPSHOT_TABLES or not indicator_id:
+        return
+    ind_pk = DOMAINS[domain]["indicator_pk"]
+    # the old and new year of an edit may arrive as int and form string
+    for year in {str(y): y for y in years if y}.values():
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                f"DELETE FROM {SNAPSHOT_TABLES[domain]} WHERE {ind_pk} = %s AND year = %s",
+                (indicator_id, year),
+            )
+        finally:
+            cur.close()
+        _fill(conn, domain, f"AND f.{ind_pk} = %s AND f.year = %s", (indicator_id, year))
+
+
+def get_record_snapshot_key(conn, domain, record_id):
+    """Return (indicator_id, year) of a fact row (needed before deleting it)."""
+    d = DOMAINS[domain]
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            f"SELECT {d['indicator_pk']}, year FROM {d['fact_table']} WHERE {d['pk']} = %s",
+            (record_id,),
+        )
+        row = cur.fetchone()
+    finally:
+        cur.close()
+    return (row[0], row[1]) if row else (None, None)
+
+
+def get_snapshot_rows(conn, domain, indicator_id, year):
+    """
+    All ranked rows of one (indicator, year), best first, with country info.
+    One range read on the ranking table's primary key (a prepared statement).
+    """
+    return query_statement(conn, f"{domain}.snapshot_rows", (indicator_id, year))
@@ -0,0 +1,143 @@
+import os
+import threading
+import weakref
+
+from App.domains import DOMAINS
+
+# ---------------------------------------------------------
+# Server-side prepared statements, cached per connection
+# ---------------------------------------------------------
+# Hot parameterized queries are registered below by name. The first time a
+# connection runs one it is prepared on the server (cursor(prepared=True))
+# and the prepared cursor stays attached to that connection. Because the
+# pool hands the same connections out again, later requests only send the
+# parameters and the server skips parsing and planning.
+#
+# Prepared statements live and die with their connection: when the pool
+# recycles or closes a connection, its cursors go with it. Any error while
+# executing drops the cached cursor, so the next call prepares again.
+
+STATEMENT_CONFIG = {
+    "enabled": os.getenv("DB_PREPARED_STATEMENTS", "1") not in ("0", "false", "no", ""),
+}
+
+STATEMENTS = {}
+for _domain, _d in DOMAINS.items():
+    STATEMENTS[f"{_domain}.max_year"] = (
+        f"SELECT MAX(year) FROM {_d['fact_table']} WHERE {_d['indicator_pk']} = %s"
+    )
+
+
+def register_statement(name, sql):
+    """Add a named statement to the registry (modules owning the SQL call this at import)."""
+    STATEMENTS[name] = sql
+
+
+_cursors = weakref.WeakKeyDictionary()
+_cursors_lock = threading.Lock()
+_stats = {"prepared": 0, "reused": 0, "unprepared": 0, "errors": 0}
+
+
+def _count(name):
+    with _cursors_lock:
+        _stats[name] += 1
+
+
+def _connection_cursors(conn):
+    with _cursors_lock:
+        per_conn = _cursors.get(conn)
+        if per_conn is None:
+            per_conn = _cursors[conn] = {}
+        return per_conn
+
+
+def _prepared_cursor(conn, sql):
+    """Return (cursor, cached): the connection's prepared cursor for `sql` if possible."""
+    if not STATEMENT_CONFIG["enabled"]:
+        _count("unprepared")
+        return conn.cursor(), False
+    try:
+        per_conn = _connection_cursors(conn)
+    except TypeError:
+        # object that cannot be weakly referenced: no caching
+        _count("unprepared")
+        return conn.cursor(), False
+
+    cur = per_conn.get(sql)
+    if cur is not None:
+        _count("reused")
+        return cur, True
+    try:
+        cur = conn.cursor(prepared=True)
+    except Exception:
+        _count("unprepared")
+        return conn.cursor(), False
+    per_conn[sql] = cur
+    _count("prepared")
+    return cur, True
+
+
+def _discard(conn, sql, cur):
+    try:
+        _connection_cursors(conn).pop(sql, None)
+    except TypeError:
+        pass
+    try:
+        cur.close()
+    except Exception:
+        pass
+
+
+def run_prepared(conn, sql, params=(), one=False, dictionary=True):
+    """
+    Execute `sql` through the connection's prepared-statement cache.
+
+    Returns fetchall() rows (fetchone() with one=True) for statements that
+    produce a result set, as dicts when `dictionary` is set, else lastrowid.
+    """
+    cur, cached = _prepared_cursor(conn, sql)
+    try:
+        cur.execute(sql, tuple(params or ()))
+        if not cur.with_rows:
+            return cur.lastrowid
+        # always drain the result: a prepared cursor left unread blocks the connection
+        rows = cur.fetchall()
+    except Exception:
+        _count("errors")
+        if cached:
+            _discard(conn, sql, cur)
+        raise
+    finally:
+        if not cached:
+            cur.close()
+
+    if dictionary:
+        columns = cur.column_names
+        rows = [dict(zip(columns, row)) for row in rows]
+    else:
+        rows = [tuple(row) for row in rows]
+    if one:
+        return rows[0] if rows else None
+    return rows
+
+
+def query_statement(conn, name, params=(), one=False, dictionary=True):
+    """Run the registered SELECT `name` and return its rows."""
+    return run_prepared(conn, STATEMENTS[name], params, one=one, dictionary=dictionary)
+
+
+def execute_statement(conn, name, params=()):
+    """Run the registered INSERT/UPDATE/DELETE `name`; returns lastrowid. Does not commit."""
+    return run_prepared(conn, STATEMENTS[name], params)
+
+
+def get_statement_stats():
+    """
+    Returns prepared-statement metrics (prepared, reused, unprepared, errors...).
+    """
+    with _cursors_lock:
+        data = dict(_stats)
+        data["connections"] = len(_cursors)
+        data["cached_statements"] = sum(len(v) for v in _cursors.values())
+        data["registered"] = sorted(STATEMENTS)
+        return data
@@ -0,0 +1,245 @@
+import gzip
+import json
+import os
+
+from flask import current_app, jsonify, request
+
+from App.cache import get_cache
+from App.columnar import get_store
+from App.domains import DOMAINS
+from App.trends import id_list_arg
+
+# ---------------------------------------------------------
+# Batched time-series assembly for the chart panels
+# ---------------------------------------------------------
+# The list pages draw one chart per country (all indicators, all years, plus
+# the regional average). Instead of querying per country and per indicator,
+# everything needed for a page is fetched in a constant number of queries and
+# assembled in memory into the structure the templates consume:
+#
+#   {country_id: {
+#       'indicators': {indicator_id: {'name': ..., 'unit': ...}},
+#       'country_data': {indicator_id: [{'year': y, 'value': v}, ...]},
+#       'region_avg': {indicator_id: [{'year': y, 'value': v}, ...]},
+#       'region': region_name,
+#       'years': [y1, y2, ...],
+#   }}
+#
+# The charts load it on demand from /<domain>/api/timeseries (see
+# timeseries_response below) instead of the list pages inlining it.
+
+TIMESERIES_CONFIG = {
+    # upper bound on countries in one /api/timeseries call
+    "max_countries": int(os.getenv("TIMESERIES_MAX_COUNTRIES", "100")),
+    # responses at least this large are gzip-compressed when the client accepts it
+    "gzip_min_bytes": int(os.getenv("TIMESERIES_GZIP_MIN_BYTES", "1024")),
+}
+
+
+def _in_clause(values):
+    return ",".join(["%s"] * len(values))
+
+
+def build_time_series(cur, domain, country_ids, value_cast=float, unit_default="",
+                      indicator_ids=None, region_avg=True):
+    """
+    Build the per-country time-series structure for `country_ids`.
+
+    `cur` must be a dictionary cursor. `value_cast` is applied to every
+    non-null value (pass None to keep the raw DB types) and `unit_default`
+    replaces empty units (pass None to keep the raw unit). `indicator_ids`
+    restricts the indicators; region_avg=False skips the regional averages.
+    """
+    d = DOMAINS[domain]
+    fact, ind_pk = d["fact_table"], d["indicator_pk"]
+    country_ids = list(dict.fromkeys(country_ids))
+    if not country_ids:
+        return {}
+    indicator_ids = list(dict.fromkeys(indicator_ids)) if indicator_ids else []
+    indicator_in = f"{ind_pk} IN ({_in_clause(indicator_ids)})" if indicator_ids else None
+
+    def cast(v):
+        if v is None or value_cast is None:
+            return v
+        return value_cast(v)
+
+    # 1. indicator metadata (shared by every country)
+    cur.execute(f"""
+        SELECT {ind_pk} AS indicator_id, indicator_name, {d['unit_column']} AS unit
+        FROM {d['detail_table']}
+        {f"WHERE {indicator_in}" if indicator_in else ""}
+        ORDER BY {ind_pk}
+    """, indicator_ids)
+    indicator_map = {
+        row["indicator_id"]: {
+            "name": row["indicator_name"],
+            "unit": row["unit"] if unit_default is None else (row["unit"] or unit_default),
+        }
+        for row in cur.fetchall()
+    }
+
+    # 2. region of every country on the page
+    placeholders = _in_clause(country_ids)
+    cur.execute(
+        f"SELECT country_id, region FROM countries WHERE country_id IN ({placeholders})",
+        country_ids,
+    )
+    region_by_country = {row["country_id"]: row["region"] for row in cur.fetchall()}
+
+    # 3. every (country, indicator, year, value) row for the page
+    cur.execute(f"""
+        SELECT country_id, {ind_pk} AS indicator_id, year, indicator_value
+        FROM {fact}
+        WHERE country_id IN ({placeholders}) {f"AND {indicator_in}" if indicator_in else ""}
+        ORDER BY country_id, year
+    """, country_ids + indicator_ids)
+    years_by_country = {cid: [] for cid in country_ids}
+    values_by_country = {cid: {} for cid in country_ids}
+    for row in cur.fetchall():
+        cid = row["country_id"]
+        years = years_by_country[cid]
+        if not years or years[-1] != row["year"]:
+            years.append(row["year"])
+        if row["indicator_value"] is not None:
+            values_by_country[cid][(row["indicator_id"], row["year"])] = cast(row["indicator_value"])
+
+    # 4. regional averages for every region on the page, all indicators at once
+    regions = sorted({r for r in region_by_country.values() if r}) if region_avg else []
+    region_values = {}
+    if regions:
+        indicator_filter = f"AND f.{indicator_in}" if indicator_in else ""
+        cur.execute(f"""
+            SELECT c.region, f.{ind_pk} AS indicator_id, f.year, AVG(f.indicator_value) AS avg_value
+            FROM {fact} f
+            INNER JOIN countries c ON c.country_id = f.country_id
+            WHERE c.region IN ({_in_clause(regions)}) AND f.indicator_value IS NOT NULL {indicator_filter}
+            GROUP BY c.region, f.{ind_pk}, f.year
+        """, regions + indicator_ids)
+        for row in cur.fetchall():
+            region_values[(row["region"], row["indicator_id"], row["year"])] = cast(row["avg_value"])
+
+    # 5. assemble the template structure
+    time_series_data = {}
+    for cid in country_ids:
+        all_years = years_by_country[cid]
+        values = values_by_country[cid]
+        region_name = region_by_country.get(cid)
+
+        country_data = {
+            indicator_id: [{"year": y, "value": values.get((indicator_id, y))} for y in all_years]
+            for indicator_id in indicator_map
+        }
+        region_series = {}
+        if region_name and region_avg:
+            region_series = {
+                indicator_id: [
+                    {"year": y, "value": region_values.get((region_name, indicator_id, y))}
+                    for y in all_years
+                ]
+                for indicator_id in indicator_map
+            }
+
+        time_series_data[cid] = {
+            "indicators": indicator_map,
+            "country_data": country_data,
+            "region_avg": region_series,
+            "region": region_name,
+            "years": all_years,
+        }
+    return time_series_data
+
+
+def build_global_averages(cur, domain, indicator_ids, conn=None):
+    """
+    Global average per (indicator, year) for the Trend Explorer, in one query.
+    Returns {indicator_id: [{'year', 'avg_value', 'country_count'}, ...]}.
+
+    With `conn` and the columnar store available, the averages are computed
+    in memory instead (see App/columnar.py).
+    """
+    d = DOMAINS[domain]
+    ind_pk = d["indicator_pk"]
+    result = {indicator_id: [] for indicator_id in indicator_ids}
+    if not result:
+        return result
+
+    store = get_store(conn, domain) if conn is not None else None
+    if store is not None:
+        # (country, indicator, year) is unique, so rows per group = distinct countries
+        averages = store.aggregate(("indicator", "year"), "mean", indicator_ids=list(result))
+        counts = store.aggregate(("indicator", "year"), "count", indicator_ids=list(result))
+        for (indicator_id, year) in sorted(averages):
+            result[indicator_id].append({
+                "year": year,
+                "avg_value": averages[(indicator_id, year)],
+                "country_count": int(counts[(indicator_id, year)]),
+            })
+        return result
+
+    cur.execute(f"""
+        SELECT
+            {ind_pk} AS indicator_id,
+            year,
+            AVG(indicator_value) AS avg_value,
+            COUNT(DISTINCT country_id) AS country_count
+        FROM {d['fact_table']}
+        WHERE {ind_pk} IN ({_in_clause(list(result))})
+        AND indicator_value IS NOT NULL
+        GROUP BY {ind_pk}, year
+        ORDER BY {ind_pk}, year ASC
+    """, list(result))
+    for row in cur.fetchall():
+        result[row["indicator_id"]].append({
+            "year": row["year"],
+            "avg_value": float(row["avg_value"]),
+            "country_count": row["country_count"],
+        })
+    return result
+
+
+# ---------------------------------------------------------
+# JSON endpoint (GET /<domain>/api/timeseries)
+# ---------------------------------------------------------
+def _json_response(raw, compressed):
+    response = current_app.response_class(raw, mimetype="application/json")
+    if compressed is not None and "gzip" in request.accept_encodings:
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def timeseries_response(conn, domain):
+    """
+    ?country_id=1,2&indicator_id=6&region_avg=0
+    Chart series of the given countries, in the build_time_series() shape.
+    Encoded bodies are kept in the query cache until the domain's tables change.
+    """
+    country_ids = id_list_arg("country_id")
+    indicator_ids = id_list_arg("indicator_id")
+    if country_ids is None or indicator_ids is None:
+        return jsonify({"error": "country_id and indicator_id must be integers"}), 400
+    if not country_ids:
+        return jsonify({"error": "country_id is required"}), 400
+    if len(country_ids) > TIMESERIES_CONFIG["max_countries"]:
+        return jsonify({"error": f"at most {TIMESERIES_CONFIG['max_countries']} countries per request"}), 400
+    region_avg = request.args.get("region_avg", "1") not in ("0", "false", "no")
+
+    d = DOMAINS[domain]
+    tables = (d["fact_table"], d["detail_table"], "countries")
+    cache = get_cache()
+    key = cache.make_key(
+        f"timeseries:{domain}", (tuple(sorted(set(country_ids))), tuple(sorted(set(indicator_ids))), region_avg), tables
+    )
+    found, body = cache.get(key)
+    if not found:
+        cur = conn.cursor(dictionary=True)
+        try:
+            data = build_time_series(cur, domain, country_ids, indicator_ids=indicator_ids, region_avg=region_avg)
+        finally:
+            cur.close()
+        raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        compressed = gzip.compress(raw, 6) if len(raw) >= TIMESERIES_CONFIG["gzip_min_bytes"] else None
+        body = (raw, compressed)
+        cache.set(key, body)
+    return _json_response(*body)
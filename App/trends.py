@@ -0,0 +1,268 @@
+import math
+import os
+from bisect import bisect_left
+from itertools import chain
+
+from flask import jsonify, request
+
+from App.columnar import np
+from App.domains import DOMAINS
+
+# ---------------------------------------------------------
+# Shared trend engine
+# ---------------------------------------------------------
+# Given a batch of series {key: (years, values)} (years ascending, NULL
+# values left out), compute for every observation:
+#
+#   prev_year / prev_value   previous available observation
+#   change / percent         difference (and %) against it
+#   yoy                      % change when the previous year is year - 1
+#   cagr                     compound annual growth (%) from the earliest
+#                            observation within the last `window` years
+#   rolling_mean             mean of the last `rolling` observations
+#   next_year / next_value   next available observation
+#
+# With NumPy every series is concatenated into flat arrays and all metrics
+# are computed in one vectorized pass; without it, a per-series Python loop
+# gives the same numbers.
+
+TREND_CONFIG = {
+    "cagr_window": int(os.getenv("TREND_CAGR_WINDOW", "5")),
+    "rolling_window": int(os.getenv("TREND_ROLLING_WINDOW", "3")),
+    # upper bound on series returned by one /api/trends call
+    "max_series": int(os.getenv("TREND_MAX_SERIES", "500")),
+}
+
+_FIELDS = ("value", "prev_year", "prev_value", "change", "percent", "yoy",
+           "cagr", "rolling_mean", "next_year", "next_value")
+
+
+def _clean(v):
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return None
+    return v
+
+
+def _vectorized(series, window, rolling):
+    keys = [k for k in series if len(series[k][0])]
+    if not keys:
+        return {}
+    lengths = np.array([len(series[k][0]) for k in keys])
+    years = np.fromiter(chain.from_iterable(series[k][0] for k in keys), dtype=np.int64)
+    values = np.fromiter(chain.from_iterable(series[k][1] for k in keys), dtype=np.float64)
+    group = np.repeat(np.arange(len(keys)), lengths)
+
+    idx = np.arange(len(values))
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    ends = starts + np.repeat(lengths, lengths) - 1
+
+    has_prev = idx > starts
+    prev_idx = np.where(has_prev, idx - 1, idx)
+    has_next = idx < ends
+    next_idx = np.where(has_next, idx + 1, idx)
+
+    nan = np.nan
+    prev_value = np.where(has_prev, values[prev_idx], nan)
+    prev_year = np.where(has_prev, years[prev_idx], -1)
+    change = values - prev_value
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = np.where(has_prev & (prev_value != 0), change / prev_value * 100, nan)
+    yoy = np.where(has_prev & (prev_year == years - 1), percent, nan)
+
+    # CAGR base: first observation of the same series with year >= year - window
+    composite = group * 10000 + years
+    base_idx = np.searchsorted(composite, composite - window, side="left")
+    base_value = values[base_idx]
+    span = years - years[base_idx]
+    valid = (base_idx < idx) & (base_value > 0) & (values > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cagr = np.where(valid, (np.power(values / base_value, 1.0 / np.maximum(span, 1)) - 1) * 100, nan)
+
+    # trailing mean over at most `rolling` observations of the same series
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    lo = np.maximum(idx - rolling + 1, starts)
+    rolling_mean = (csum[idx + 1] - csum[lo]) / (idx - lo + 1)
+
+    next_value = np.where(has_next, values[next_idx], nan)
+    next_year = np.where(has_next, years[next_idx], -1)
+
+    columns = [values, prev_year, prev_value, change, percent, yoy, cagr, rolling_mean, next_year, next_value]
+    columns = [c.tolist() for c in columns]
+    result = {}
+    pos = 0
+    for key, n in zip(keys, lengths.tolist()):
+        points = {}
+        for i in range(pos, pos + n):
+            point = {field: _clean(col[i]) for field, col in zip(_FIELDS, columns)}
+            for field in ("prev_year", "next_year"):
+                if point[field] == -1:
+                    point[field] = None
+            points[years[i].item()] = point
+        result[key] = points
+        pos += n
+    return result
+
+
+def _python(series, window, rolling):
+    result = {}
+    for key, (years, values) in series.items():
+        years = [int(y) for y in years]
+        values = [float(v) for v in values]
+        points = {}
+        for i, (year, value) in enumerate(zip(years, values)):
+            point = dict.fromkeys(_FIELDS)
+            point["value"] = value
+            if i > 0:
+                prev = values[i - 1]
+                point["prev_year"], point["prev_value"] = years[i - 1], prev
+                point["change"] = value - prev
+                if prev != 0:
+                    point["percent"] = (value - prev) / prev * 100
+                    if years[i - 1] == year - 1:
+                        point["yoy"] = point["percent"]
+            b = bisect_left(years, year - window, 0, i)
+            if b < i and values[b] > 0 and value > 0:
+                point["cagr"] = ((value / values[b]) ** (1.0 / (year - years[b])) - 1) * 100
+            recent = values[max(0, i - rolling + 1): i + 1]
+            point["rolling_mean"] = sum(recent) / len(recent)
+            if i + 1 < len(years):
+                point["next_year"], point["next_value"] = years[i + 1], values[i + 1]
+            points[year] = point
+        if points:
+            result[key] = points
+    return result
+
+
+def compute_trends(series, window=None, rolling=None):
+    """
+    Trend metrics for a batch of series.
+
+    `series` maps any hashable key to (years, values) with years ascending.
+    Returns {key: {year: {value, prev_year, prev_value, change, percent, yoy,
+    cagr, rolling_mean, next_year, next_value}}} (None where undefined).
+    """
+    window = TREND_CONFIG["cagr_window"] if window is None else max(1, int(window))
+    rolling = TREND_CONFIG["rolling_window"] if rolling is None else max(1, int(rolling))
+    if np is not None:
+        return _vectorized(series, window, rolling)
+    return _python(series, window, rolling)
+
+
+# ---------------------------------------------------------
+# Loading series from the fact tables
+# ---------------------------------------------------------
+def load_series(cur, domain, country_ids=None, indicator_ids=None, year_min=None, year_max=None):
+    """
+    Non-null series per (country_id, indicator_id), in one query.
+    At least one of `country_ids` / `indicator_ids` should be given.
+    """
+    d = DOMAINS[domain]
+    ind_pk = d["indicator_pk"]
+    where, params = ["indicator_value IS NOT NULL"], []
+    if country_ids:
+        where.append(f"country_id IN ({','.join(['%s'] * len(country_ids))})")
+        params.extend(country_ids)
+    if indicator_ids:
+        where.append(f"{ind_pk} IN ({','.join(['%s'] * len(indicator_ids))})")
+        params.extend(indicator_ids)
+    if year_min is not None:
+        where.append("year >= %s")
+        params.append(year_min)
+    if year_max is not None:
+        where.append("year <= %s")
+        params.append(year_max)
+
+    cur.execute(f"""
+        SELECT country_id, {ind_pk} AS indicator_id, year, indicator_value
+        FROM {d['fact_table']}
+        WHERE {' AND '.join(where)}
+        ORDER BY country_id, {ind_pk}, year
+    """, params)
+    series = {}
+    for row in cur.fetchall():
+        if isinstance(row, dict):
+            row = (row["country_id"], row["indicator_id"], row["year"], row["indicator_value"])
+        years, values = series.setdefault((row[0], row[1]), ([], []))
+        years.append(row[2])
+        values.append(float(row[3]))
+    return series
+
+
+def attach_trends(cur, domain, rows):
+    """
+    Set row['trend'] on fact rows (dicts with country_id, the domain's
+    indicator key and year) to that observation's trend metrics, or None.
+    """
+    ind_pk = DOMAINS[domain]["indicator_pk"]
+    rows = [r for r in rows if r.get("country_id") is not None and r.get(ind_pk) is not None]
+    for r in rows:
+        r["trend"] = None
+    if not rows:
+        return rows
+
+    wanted = {(r["country_id"], r[ind_pk]) for r in rows}
+    series = load_series(
+        cur, domain,
+        country_ids=sorted({k[0] for k in wanted}),
+        indicator_ids=sorted({k[1] for k in wanted}),
+    )
+    trends = compute_trends({k: v for k, v in series.items() if k in wanted})
+    for r in rows:
+        if r.get("indicator_value") is not None:
+            r["trend"] = trends.get((r["country_id"], r[ind_pk]), {}).get(r["year"])
+    return rows
+
+
+# ---------------------------------------------------------
+# JSON endpoint (GET /<domain>/api/trends)
+# ---------------------------------------------------------
+def id_list_arg(name):
+    """Integers from repeated and/or comma-separated query args (None if one is not an integer)."""
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(v for v in raw.split(",") if v.strip())
+    try:
+        return [int(v) for v in values]
+    except ValueError:
+        return None
+
+
+def trends_response(conn, domain):
+    """
+    ?country_id=1,2&indicator_id=6&year_min=2000&year_max=2020&window=5&rolling=3
+    At least one country_id or indicator_id is required.
+    """
+    country_ids = id_list_arg("country_id")
+    indicator_ids = id_list_arg("indicator_id")
+    if country_ids is None or indicator_ids is None:
+        return jsonify({"error": "country_id and indicator_id must be integers"}), 400
+    if not country_ids and not indicator_ids:
+        return jsonify({"error": "country_id or indicator_id is required"}), 400
+
+    cur = conn.cursor()
+    try:
+        series = load_series(
+            cur, domain, country_ids, indicator_ids,
+            request.args.get("year_min", type=int), request.args.get("year_max", type=int),
+        )
+    finally:
+        cur.close()
+
+    keys = sorted(series)[: TREND_CONFIG["max_series"]]
+    trends = compute_trends(
+        {k: series[k] for k in keys},
+        request.args.get("window", type=int),
+        request.args.get("rolling", type=int),
+    )
+    return jsonify({
+        "domain": domain,
+        "truncated": len(series) > len(keys),
+        "series": [
+            {
+                "country_id": cid,
+                "indicator_id": ind,
+                "points": [dict(point, year=year) for year, point in trends.get((cid, ind), {}).items()],
+            }
+            for cid, ind in keys
+        ],
+    })
@@ -0,0 +1,60 @@
+import math
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from App.trends import _FIELDS, _python, _vectorized, np
+
+# gaps (no yoy), zero and negative values (no percent / cagr), a single
+# observation and an empty series
+SERIES = {
+    (1, 10): ([2000, 2001, 2002, 2005, 2006, 2007, 2010], [100.0, 110.0, 0.0, 50.0, 55.0, 60.5, 70.0]),
+    (1, 11): ([1990, 1991, 1992, 1993], [-5.0, 5.0, 10.0, 20.0]),
+    (2, 10): ([2015], [3.5]),
+    (2, 11): ([2001, 2003, 2004, 2009, 2010, 2011, 2012], [1.0, 2.0, 4.0, 8.0, 8.0, 6.0, 12.0]),
+    (3, 10): ([], []),
+}
+
+
+def _same(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def test_python_trends():
+    result = _python(SERIES, 5, 3)
+    points = result[(1, 10)]
+    assert _same(points[2001]["yoy"], 10.0)
+    assert points[2005]["yoy"] is None  # previous observation is 2002
+    assert points[2005]["percent"] is None and points[2005]["change"] == 50.0  # previous value is 0
+    assert points[2002]["cagr"] is None
+    assert _same(points[2006]["cagr"], ((55.0 / 110.0) ** (1 / 5) - 1) * 100)  # base 2001
+    assert _same(points[2007]["rolling_mean"], (50.0 + 55.0 + 60.5) / 3)
+    assert points[2000]["prev_year"] is None and points[2010]["next_year"] is None
+    assert result[(1, 11)][1991]["cagr"] is None  # negative base
+    assert (3, 10) not in result
+
+
+def test_vectorized_matches_python():
+    if np is None:
+        print("SKIPPED: NumPy is not installed")
+        return
+    for window, rolling in ((5, 3), (1, 1), (3, 5), (20, 2)):
+        expected = _python(SERIES, window, rolling)
+        actual = _vectorized(SERIES, window, rolling)
+        assert set(actual) == set(expected), (window, rolling)
+        for key, points in expected.items():
+            assert list(actual[key]) == list(points), (key, window, rolling)
+            for year, point in points.items():
+                for field in _FIELDS:
+                    assert _same(actual[key][year][field], point[field]), (key, year, field, window, rolling)
+
+
+if __name__ == "__main__":
+    test_python_trends()
+    test_vectorized_matches_python()
+    print("SUCCESS: vectorized and pure-Python trends agree.")
@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from App.cache import get_cache
+from App.db import get_pool
+from App.domains import DOMAINS
+from App.search import fold
+
+# ---------------------------------------------------------
+# In-memory typeahead for countries and indicators
+# ---------------------------------------------------------
+# Autocomplete fields ask /api/typeahead for completions instead of running
+# a LIKE query per keystroke. base.html attaches suggestions to any input
+# marked data-typeahead: the search filters of the health, freshwater,
+# sustainability and GHG pages and the country/indicator pickers of every
+# add form. The energy and GHG list country filters call the endpoint from
+# their own scripts, and /ghg/api/countries is served from the same index.
+#
+# The service holds one sorted array of keys per scope (the countries, and
+# the indicators of each domain); a completion is two bisections over the
+# scopes asked for.
+#
+# Keys are folded (lower-case, no accents) and ranked:
+#
+#   0  the whole name or ISO code equals the query
+#   1  the name or ISO code starts with the query
+#   2  a later word of the name starts with it ("kingdom" -> United Kingdom)
+#
+# ties go to the shorter name. The arrays are loaded when the app starts
+# (TYPEAHEAD_WARM) and rebuilt when countries or an indicator table is
+# bumped in App/cache.py, or after TYPEAHEAD_TTL seconds.
+
+TYPEAHEAD_CONFIG = {
+    "ttl": float(os.getenv("TYPEAHEAD_TTL", "300")),
+    "max_results": int(os.getenv("TYPEAHEAD_MAX_RESULTS", "50")),
+    "warm": os.getenv("TYPEAHEAD_WARM", "1") not in ("0", "false", "no", ""),
+}
+
+TYPEAHEAD_TABLES = ("countries",) + tuple(d["detail_table"] for d in DOMAINS.values())
+
+_RANK_EXACT, _RANK_PREFIX, _RANK_WORD = 0, 1, 2
+_HIGH = "\uffff"
+
+
+class _Scope:
+    """Sorted (key, rank, entry) array for one group of entries."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        keyed = []
+        for pos, entry in enumerate(entries):
+            name = fold(entry["label"])
+            keyed.append((name, _RANK_PREFIX, pos))
+            if entry.get("code"):
+                keyed.append((fold(entry["code"]), _RANK_PREFIX, pos))
+            words = name.split()
+            for i in range(1, len(words)):
+                keyed.append((" ".join(words[i:]), _RANK_WORD, pos))
+        keyed.sort()
+        self.keys = [k for k, _, _ in keyed]
+        self.ranks = [(r, p) for _, r, p in keyed]
+
+    def complete(self, term, best):
+        """Record the best rank per entry whose keys start with `term` into `best`."""
+        lo = bisect_left(self.keys, term)
+        hi = bisect_left(self.keys, term + _HIGH, lo)
+        for i in range(lo, hi):
+            rank, pos = self.ranks[i]
+            if rank == _RANK_PREFIX and self.keys[i] == term:
+                rank = _RANK_EXACT
+            entry = self.entries[pos]
+            key = id(entry)
+            if key not in best or rank < best[key][0]:
+                best[key] = (rank, entry)
+
+
+class Typeahead:
+    """Immutable completion index over countries and every domain's indicators."""
+
+    def __init__(self, countries, indicators, versions):
+        self.versions = versions
+        self.built_at = time.monotonic()
+        self.scopes = {"country": _Scope(countries)}
+        for domain, rows in indicators.items():
+            self.scopes[domain] = _Scope(rows)
+
+    def complete(self, term, kinds=("country", "indicator"), domains=None, limit=10):
+        term = fold(term).strip()
+        if not term:
+            return []
+        names = []
+        if "country" in kinds:
+            names.append("country")
+        if "indicator" in kinds:
+            names.extend(d for d in (domains or DOMAINS) if d in DOMAINS)
+        best = {}
+        for name in names:
+            self.scopes[name].complete(term, best)
+        ranked = sorted(best.values(), key=lambda re: (re[0], len(re[1]["label"]), re[1]["label"]))
+        return [dict(entry, rank=rank) for rank, entry in ranked[:limit]]
+
+
+def _load(conn, versions):
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute("SELECT country_id, country_name, country_code, region FROM countries")
+        countries = [
+            {"kind": "country", "id": r["country_id"], "label": r["country_name"],
+             "code": r["country_code"], "region": r["region"]}
+            for r in cur.fetchall() if r["country_name"]
+        ]
+        indicators = {}
+        for domain, d in DOMAINS.items():
+            cur.execute(
+                f"SELECT {d['indicator_pk']} AS id, indicator_name, {d['unit_column']} AS unit "
+                f"FROM {d['detail_table']}"
+            )
+            indicators[domain] = [
+                {"kind": "indicator", "id": r["id"], "label": r["indicator_name"],
+                 "domain": domain, "unit": r["unit"]}
+                for r in cur.fetchall() if r["indicator_name"]
+            ]
+    finally:
+        cur.close()
+    return Typeahead(countries, indicators, versions)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_typeahead(conn):
+    """Current completion index (rebuilt when one of its tables was bumped)."""
+    global _index
+    versions = get_cache().versions(TYPEAHEAD_TABLES)
+    index = _index
+    if index is not None and index.versions == versions \
+            and time.monotonic() - index.built_at < TYPEAHEAD_CONFIG["ttl"]:
+        return index
+
+    with _index_lock:
+        index = _index
+        if index is None or index.versions != versions \
+                or time.monotonic() - index.built_at >= TYPEAHEAD_CONFIG["ttl"]:
+            index = _load(conn, versions)
+            _index = index
+    return index
+
+
+def suggest(conn, term, kinds=("country", "indicator"), domains=None, limit=10):
+    """
+    Ranked completions of `term` as dicts with kind, id, label and rank, plus
+    code/region for countries and domain/unit for indicators.
+    """
+    limit = max(1, min(int(limit), TYPEAHEAD_CONFIG["max_results"]))
+    return get_typeahead(conn).complete(term, kinds, domains, limit)
+
+
+def warm_typeahead():
+    """Build the index in the background so the first keystroke does not pay for it."""
+    if not TYPEAHEAD_CONFIG["warm"]:
+        return
+
+    def run():
+        pool = get_pool()
+        try:
+            conn = pool.acquire()
+        except Exception:
+            return  # database not reachable yet: built on the first request instead
+        try:
+            get_typeahead(conn)
+        except Exception:
+            pass
+        finally:
+            pool.release(conn)
+
+    threading.Thread(target=run, name="typeahead-warm", daemon=True).start()
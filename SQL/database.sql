@@ -4,9 +4,15 @@ CREATE TABLE countries (
     country_id INT AUTO_INCREMENT PRIMARY KEY,
     country_name VARCHAR(100) NOT NULL UNIQUE,
     country_code VARCHAR(3) NOT NULL UNIQUE,
+    -- ISO 3166-1 alpha-2, filled by App/country_resolver.py
+    iso2 CHAR(2) NULL,
     region VARCHAR(100),
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+    -- regional averages / region profile join on region
+    INDEX idx_countries_region (region),
+    UNIQUE INDEX uq_countries_iso2 (iso2)
     );
 CREATE TABLE students (
     student_id INT AUTO_INCREMENT PRIMARY KEY,
@@ -23,14 +29,27 @@ INSERT INTO students (student_number, full_name, team_no) VALUES --students tabl
 ('150210085', 'Gülbahar Karabaş', 1);
 
 -- Audit Logs 
+-- Monthly partitions on action_timestamp are added (and expired) by
+-- App/audit_partitions.py. Partitioned tables cannot have foreign keys, and
+-- the partitioning column must be part of the primary key.
 CREATE TABLE audit_logs (
-    log_id INT AUTO_INCREMENT PRIMARY KEY,
+    log_id INT AUTO_INCREMENT,
     student_id INT,
     action_type VARCHAR(50),
     table_name VARCHAR(50),
     record_id INT,
-    action_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE SET NULL
+    action_timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (log_id, action_timestamp),
+
+    -- history of one record
+    INDEX idx_audit_record (table_name, record_id, action_timestamp),
+    -- actions of one user in a time range
+    INDEX idx_audit_student_time (student_id, action_timestamp),
+    -- audit viewer (newest first) and time-range scans
+    INDEX idx_audit_time (action_timestamp)
+)
+PARTITION BY RANGE (UNIX_TIMESTAMP(action_timestamp)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
 );
 
 -- --- FRESHWATER (Muhammet Tuncer) ---
@@ -51,7 +70,11 @@ CREATE TABLE freshwater_data (
     
     CONSTRAINT fk_freshwater_country FOREIGN KEY (country_id) REFERENCES countries(country_id) ON DELETE CASCADE,
     CONSTRAINT fk_freshwater_indicator FOREIGN KEY (freshwater_indicator_id) REFERENCES freshwater_indicator_details(freshwater_indicator_id) ON DELETE CASCADE,
-    UNIQUE(country_id, freshwater_indicator_id, year)
+    UNIQUE(country_id, freshwater_indicator_id, year),
+    -- snapshot / global average reads: WHERE freshwater_indicator_id = ? AND year = ? AND indicator_value IS NOT NULL
+    INDEX idx_freshwater_indicator_year_value (freshwater_indicator_id, year, indicator_value, country_id),
+    -- year-only reads (DISTINCT year, MIN/MAX year, year range filters)
+    INDEX idx_freshwater_year (year, country_id)
 );
 
 -- --- HEALTH (Gülbahar Karabaş) ---
@@ -72,7 +95,11 @@ CREATE TABLE health_system (
 
     CONSTRAINT fk_health_country FOREIGN KEY (country_id) REFERENCES countries(country_id) ON DELETE CASCADE,
     CONSTRAINT fk_health_indicator FOREIGN KEY (health_indicator_id) REFERENCES health_indicator_details(health_indicator_id) ON DELETE CASCADE,
-    UNIQUE (country_id, health_indicator_id, year)
+    UNIQUE (country_id, health_indicator_id, year),
+    -- snapshot / global average reads: WHERE health_indicator_id = ? AND year = ? AND indicator_value IS NOT NULL
+    INDEX idx_health_indicator_year_value (health_indicator_id, year, indicator_value, country_id),
+    -- year-only reads (DISTINCT year, MIN/MAX year, year range filters)
+    INDEX idx_health_year (year, country_id)
 );
 
 -- --- GHG EMISSIONS (Fatih Serdar Çakmak) ---
@@ -95,7 +122,11 @@ CREATE TABLE greenhouse_emissions (
 
     CONSTRAINT fk_ghg_country FOREIGN KEY (country_id) REFERENCES countries(country_id) ON DELETE CASCADE,
     CONSTRAINT fk_ghg_indicator FOREIGN KEY (ghg_indicator_id) REFERENCES ghg_indicator_details(ghg_indicator_id) ON DELETE CASCADE,
-    UNIQUE (country_id, ghg_indicator_id, year)
+    UNIQUE (country_id, ghg_indicator_id, year),
+    -- snapshot / global average reads: WHERE ghg_indicator_id = ? AND year = ? AND indicator_value IS NOT NULL
+    INDEX idx_ghg_indicator_year_value (ghg_indicator_id, year, indicator_value, country_id),
+    -- year-only reads (DISTINCT year, MIN/MAX year, year range filters)
+    INDEX idx_ghg_year (year, country_id)
 );
 
 -- --- ENERGY (Atahan Evintan) ---
@@ -117,7 +148,11 @@ CREATE TABLE energy_data (
     
     CONSTRAINT fk_energy_country FOREIGN KEY (country_id) REFERENCES countries(country_id) ON DELETE CASCADE,
     CONSTRAINT fk_energy_indicator FOREIGN KEY (energy_indicator_id) REFERENCES energy_indicator_details(energy_indicator_id) ON DELETE CASCADE,
-    UNIQUE(country_id, energy_indicator_id, year)
+    UNIQUE(country_id, energy_indicator_id, year),
+    -- snapshot / global average reads: WHERE energy_indicator_id = ? AND year = ? AND indicator_value IS NOT NULL
+    INDEX idx_energy_indicator_year_value (energy_indicator_id, year, indicator_value, country_id),
+    -- year-only reads (DISTINCT year, MIN/MAX year, year range filters)
+    INDEX idx_energy_year (year, country_id)
 );
 
 -- --- SUSTAINABILITY (Salih Sefer) ---
@@ -139,7 +174,96 @@ CREATE TABLE sustainability_data (
     
     CONSTRAINT fk_sus_country FOREIGN KEY (country_id) REFERENCES countries(country_id) ON DELETE CASCADE,
     CONSTRAINT fk_sus_indicator FOREIGN KEY (sus_indicator_id) REFERENCES sustainability_indicator_details(sus_indicator_id) ON DELETE CASCADE,
-    UNIQUE(country_id, sus_indicator_id, year)
+    UNIQUE(country_id, sus_indicator_id, year),
+    -- snapshot / global average reads: WHERE sus_indicator_id = ? AND year = ? AND indicator_value IS NOT NULL
+    INDEX idx_sus_indicator_year_value (sus_indicator_id, year, indicator_value, country_id),
+    -- year-only reads (DISTINCT year, MIN/MAX year, year range filters)
+    INDEX idx_sus_year (year, country_id)
+);
+
+-- --- DATA COVERAGE SUMMARY ---
+-- Per-country, per-domain row counts and year range (all rows, and rows with a
+-- non-null value). Rebuilt by scripts/load_all.py and refreshed by the
+-- add/edit/delete handlers (see App/coverage.py).
+CREATE TABLE country_data_coverage (
+    country_id INT NOT NULL,
+    domain VARCHAR(20) NOT NULL,
+    row_count INT NOT NULL DEFAULT 0,
+    min_year INT,
+    max_year INT,
+    value_count INT NOT NULL DEFAULT 0,
+    value_min_year INT,
+    value_max_year INT,
+
+    PRIMARY KEY (country_id, domain),
+    CONSTRAINT fk_coverage_country FOREIGN KEY (country_id) REFERENCES countries(country_id) ON DELETE CASCADE
+);
+
+-- Per-domain totals shown on the dashboard (non-null values only), aggregated
+-- from country_data_coverage whenever one of its rows changes.
+CREATE TABLE domain_coverage_stats (
+    domain VARCHAR(20) PRIMARY KEY,
+    indicator_count INT NOT NULL DEFAULT 0,
+    record_count INT NOT NULL DEFAULT 0,
+    country_count INT NOT NULL DEFAULT 0,
+    min_year INT,
+    max_year INT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- --- SNAPSHOT RANKINGS ---
+-- Precomputed global/regional rank and averages per (indicator, year) for the
+-- snapshot panels of the health and freshwater lists. Rebuilt by
+-- scripts/load_all.py and refreshed by the add/edit/delete handlers
+-- (see App/snapshots.py).
+CREATE TABLE health_snapshot_rankings (
+    health_indicator_id INT NOT NULL,
+    year INT NOT NULL,
+    country_id INT NOT NULL,
+    indicator_value DECIMAL(12,4) NOT NULL,
+    global_rank INT NOT NULL,
+    region_rank INT NOT NULL,
+    global_avg DOUBLE,
+    region_avg DOUBLE,
+
+    PRIMARY KEY (health_indicator_id, year, global_rank, country_id),
+    UNIQUE (health_indicator_id, year, country_id),
+    CONSTRAINT fk_health_snap_country FOREIGN KEY (country_id) REFERENCES countries(country_id) ON DELETE CASCADE,
+    CONSTRAINT fk_health_snap_indicator FOREIGN KEY (health_indicator_id) REFERENCES health_indicator_details(health_indicator_id) ON DELETE CASCADE
+);
+
+CREATE TABLE freshwater_snapshot_rankings (
+    freshwater_indicator_id INT NOT NULL,
+    year INT NOT NULL,
+    country_id INT NOT NULL,
+    indicator_value DECIMAL(20,10) NOT NULL,
+    global_rank INT NOT NULL,
+    region_rank INT NOT NULL,
+    global_avg DOUBLE,
+    region_avg DOUBLE,
+
+    PRIMARY KEY (freshwater_indicator_id, year, global_rank, country_id),
+    UNIQUE (freshwater_indicator_id, year, country_id),
+    CONSTRAINT fk_freshwater_snap_country FOREIGN KEY (country_id) REFERENCES countries(country_id) ON DELETE CASCADE,
+    CONSTRAINT fk_freshwater_snap_indicator FOREIGN KEY (freshwater_indicator_id) REFERENCES freshwater_indicator_details(freshwater_indicator_id) ON DELETE CASCADE
+);
+
+-- --- LOAD MANIFEST ---
+-- One row per CSV file load by scripts/load_all.py: content hash, row counts
+-- and time. The incremental mode skips files whose hash has not changed.
+CREATE TABLE load_manifest (
+    manifest_id INT AUTO_INCREMENT PRIMARY KEY,
+    file_name VARCHAR(255) NOT NULL,
+    table_name VARCHAR(64) NOT NULL,
+    file_hash CHAR(64) NOT NULL,
+    load_mode VARCHAR(20) NOT NULL,
+    rows_in_file INT NOT NULL DEFAULT 0,
+    rows_inserted INT NOT NULL DEFAULT 0,
+    rows_updated INT NOT NULL DEFAULT 0,
+    rows_deleted INT NOT NULL DEFAULT 0,
+    loaded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    INDEX idx_manifest_file (file_name, manifest_id)
 );
 
 SET FOREIGN_KEY_CHECKS = 1;
\ No newline at end of file
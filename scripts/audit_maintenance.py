@@ -0,0 +1,55 @@
+"""
+Audit log maintenance: keeps the monthly partitions of audit_logs ahead of
+the current month and archives/drops the months past retention (see
+App/audit_partitions.py). Meant to run daily from cron.
+
+    python scripts/audit_maintenance.py
+    python scripts/audit_maintenance.py --dry-run
+    python scripts/audit_maintenance.py --retention-months 12 --no-archive
+"""
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# ensure repository root is on sys.path so `from App ...` imports work
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+load_dotenv(os.path.join(REPO_ROOT, '.env'))
+
+import mysql.connector  # noqa: E402
+
+from App.db import DB_CONFIG  # noqa: E402
+from App.audit_partitions import AUDIT_PARTITION_CONFIG, maintain_audit_partitions  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add upcoming audit_logs partitions and expire old ones.")
+    parser.add_argument("--dry-run", action="store_true", help="print the statements without running them")
+    parser.add_argument("--retention-months", type=int, default=AUDIT_PARTITION_CONFIG["retention_months"],
+                        help="months of audit history to keep (0 keeps everything)")
+    parser.add_argument("--no-archive", action="store_true",
+                        help="drop expired months instead of moving them to audit_logs_archive_<partition>")
+    args = parser.parse_args(argv)
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        actions = maintain_audit_partitions(
+            conn,
+            retention_months=args.retention_months,
+            archive=False if args.no_archive else None,
+            dry_run=args.dry_run,
+        )
+    finally:
+        conn.close()
+
+    if not actions:
+        print("audit_logs partitions are up to date")
+    for sql in actions:
+        print(("-- would run: " if args.dry_run else "") + sql + ";")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Index advisor: replays the GET pages of every blueprint against the current
+database, captures each SQL statement they issue and runs EXPLAIN on it.
+
+Reports full table scans, full index scans, filesorts and temporary tables
+per statement (with the pages that issued it), plus any index declared in
+SQL/database.sql that is missing from the live schema.
+
+    python scripts/index_advisor.py
+    python scripts/index_advisor.py --min-rows 500 --url "/health/?sort_by=value&order=desc"
+    python scripts/index_advisor.py --json > advisor.json
+"""
+import os
+import re
+import sys
+import json
+import argparse
+from dotenv import load_dotenv
+
+# ensure repository root is on sys.path so `from App ...` imports work
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+load_dotenv(os.path.join(REPO_ROOT, '.env'))
+
+from App.routes import create_app  # noqa: E402
+from App.db import DB_CONFIG, get_pool  # noqa: E402
+from App.domains import DOMAINS  # noqa: E402
+from App.cache import get_cache  # noqa: E402
+from App import pagination  # noqa: E402
+import mysql.connector  # noqa: E402
+
+SQL_FILE_PATH = os.path.join(REPO_ROOT, 'SQL', 'database.sql')
+
+# extra query strings replayed on every list page (deep pages, other sorts)
+LIST_VARIANTS = ["page=2", "order=desc"]
+
+# pages that change the session instead of reading data (logout would drop
+# the admin session every later page is replayed with)
+SKIP_ENDPOINTS = {"auth.login", "auth.logout"}
+
+
+# ---------------------------------------------------------
+# Statement capture
+# ---------------------------------------------------------
+class _RecordingCursor:
+    """Cursor proxy that logs every execute() before delegating it."""
+
+    def __init__(self, cursor, log, page):
+        self._cursor = cursor
+        self._log = log
+        self._page = page
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._log.append((self._page[0], operation, params))
+        return self._cursor.execute(operation, params, *args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _RecordingConnection:
+    def __init__(self, conn, log, page):
+        self._raw = conn
+        self._log = log
+        self._page = page
+
+    def cursor(self, *args, **kwargs):
+        return _RecordingCursor(self._raw.cursor(*args, **kwargs), self._log, self._page)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+def _install_recorder(log, page):
+    """Hand out recording proxies from the pool; unwrap them on release."""
+    pool = get_pool()
+    acquire, release = pool.acquire, pool.release
+    pool.acquire = lambda: _RecordingConnection(acquire(), log, page)
+    pool.release = lambda conn: release(getattr(conn, "_raw", conn))
+
+
+# ---------------------------------------------------------
+# Pages to replay
+# ---------------------------------------------------------
+def _sample_values(conn):
+    """Real ids/names to fill in URL parameters."""
+    cur = conn.cursor()
+    values = {}
+    try:
+        cur.execute("SELECT MIN(country_id) FROM country_data_coverage")
+        values["country_id"] = (cur.fetchone() or [None])[0]
+        cur.execute("SELECT region FROM countries WHERE region IS NOT NULL AND region != '' ORDER BY region LIMIT 1")
+        row = cur.fetchone()
+        values["region_name"] = row[0] if row else None
+        values["iso2"] = "US"
+        for domain, d in DOMAINS.items():
+            cur.execute(f"SELECT MIN({d['pk']}) FROM {d['fact_table']}")
+            values[f"{domain}.id"] = (cur.fetchone() or [None])[0]
+    finally:
+        cur.close()
+    return values
+
+
+def _page_urls(app, samples):
+    urls = []
+    with app.test_request_context():
+        from flask import url_for
+        for rule in app.url_map.iter_rules():
+            if "GET" not in rule.methods or rule.endpoint == "static" or rule.endpoint in SKIP_ENDPOINTS:
+                continue
+            blueprint = rule.endpoint.split(".")[0]
+            args = {}
+            for arg in rule.arguments:
+                value = samples.get(f"{blueprint}.{arg}", samples.get(arg))
+                if value is None:
+                    break
+                args[arg] = value
+            else:
+                url = url_for(rule.endpoint, **args)
+                urls.append(url)
+                if rule.endpoint.split(".")[-1].startswith("list_"):
+                    urls.extend(f"{url}?{qs}" for qs in LIST_VARIANTS)
+    return urls
+
+
+# ---------------------------------------------------------
+# EXPLAIN analysis
+# ---------------------------------------------------------
+def _normalize(sql):
+    return " ".join(sql.split())
+
+
+def _explain(conn, sql, params, min_rows):
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute("EXPLAIN " + sql, params or ())
+        plan = cur.fetchall()
+    except mysql.connector.Error as e:
+        return [], [f"EXPLAIN failed: {e}"]
+    finally:
+        cur.close()
+
+    issues = []
+    for step in plan:
+        table = step.get("table") or "-"
+        access = (step.get("type") or "").upper()
+        rows = step.get("rows") or 0
+        extra = step.get("Extra") or ""
+        if access == "ALL" and rows >= min_rows:
+            issues.append(f"full table scan on {table} (~{rows} rows)")
+        elif access == "INDEX" and rows >= min_rows:
+            issues.append(f"full index scan on {table} via {step.get('key')} (~{rows} rows)")
+        if "Using filesort" in extra:
+            issues.append(f"filesort on {table}")
+        if "Using temporary" in extra:
+            issues.append(f"temporary table on {table}")
+    return plan, issues
+
+
+def _declared_indexes():
+    """(table, index_name, columns) for every INDEX declared in database.sql."""
+    with open(SQL_FILE_PATH, "r", encoding="utf-8") as f:
+        sql_text = re.sub(r"--.*\n", "\n", f.read())
+    declared = []
+    for table, body in re.findall(r"CREATE TABLE\s+(\w+)\s*\((.*?)\);", sql_text, flags=re.S | re.I):
+        for name, cols in re.findall(r"\bINDEX\s+(\w+)\s*\(([^)]*)\)", body, flags=re.I):
+            declared.append((table, name, cols.strip()))
+    return declared
+
+
+def _missing_indexes(conn):
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT DISTINCT table_name, index_name FROM information_schema.statistics WHERE table_schema = %s",
+            (DB_CONFIG["database"],),
+        )
+        existing = {(t.lower(), i.lower()) for t, i in cur.fetchall()}
+    finally:
+        cur.close()
+    return [
+        (table, name, cols) for table, name, cols in _declared_indexes()
+        if (table.lower(), name.lower()) not in existing
+    ]
+
+
+# ---------------------------------------------------------
+# Main
+# ---------------------------------------------------------
+def run(extra_urls=(), min_rows=100):
+    app = create_app()
+    app.config["TESTING"] = True
+
+    log = []
+    page = [None]
+    _install_recorder(log, page)
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        samples = _sample_values(conn)
+        urls = _page_urls(app, samples) + list(extra_urls)
+
+        client = app.test_client()
+        failed = []
+        for url in urls:
+            # admin, so every page renders; set again in case a page changed the session
+            with client.session_transaction() as sess:
+                sess["student_id"] = 0
+                sess["team_no"] = 1
+            # replay cold: cached lookups must reach the database to be captured
+            get_cache().clear()
+            pagination._count_cache.clear()
+            page[0] = url
+            status = client.get(url).status_code
+            if status != 200:
+                failed.append((url, status))
+
+        statements = {}
+        for url, sql, params in log:
+            if not re.match(r"\s*(SELECT|WITH)\b", sql, flags=re.I):
+                continue
+            entry = statements.setdefault(_normalize(sql), {"sql": sql, "params": params, "pages": []})
+            if url not in entry["pages"]:
+                entry["pages"].append(url)
+
+        findings = []
+        for key, entry in statements.items():
+            _plan, issues = _explain(conn, entry["sql"], entry["params"], min_rows)
+            findings.append({"sql": key, "pages": entry["pages"], "issues": issues})
+
+        missing = _missing_indexes(conn)
+    finally:
+        conn.close()
+
+    return {"pages": urls, "failed_pages": failed, "statements": findings, "missing_indexes": missing}
+
+
+def _print_report(result):
+    flagged = [f for f in result["statements"] if f["issues"]]
+    print(f"Replayed {len(result['pages'])} pages, "
+          f"{len(result['statements'])} distinct SELECT statements, {len(flagged)} flagged.\n")
+    if result["failed_pages"]:
+        print("Pages that did not return 200 (their statements may be missing below):")
+        for url, status in result["failed_pages"]:
+            print(f"  {status} {url}")
+        print()
+    for f in flagged:
+        sql = f["sql"] if len(f["sql"]) <= 300 else f["sql"][:297] + "..."
+        print(sql)
+        print("  pages: " + ", ".join(f["pages"][:5]) + (" ..." if len(f["pages"]) > 5 else ""))
+        for issue in f["issues"]:
+            print(f"  - {issue}")
+        print()
+    if result["missing_indexes"]:
+        print("Indexes declared in SQL/database.sql but missing from the database:")
+        for table, name, cols in result["missing_indexes"]:
+            print(f"  ALTER TABLE {table} ADD INDEX {name} ({cols});")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EXPLAIN every SELECT issued by the blueprints' GET pages.")
+    parser.add_argument("--url", action="append", default=[], help="extra page to replay (repeatable)")
+    parser.add_argument("--min-rows", type=int, default=100,
+                        help="ignore full scans of tables estimated below this many rows")
+    parser.add_argument("--json", action="store_true", help="print the full result as JSON")
+    args = parser.parse_args(argv)
+
+    result = run(args.url, args.min_rows)
+    if args.json:
+        print(json.dumps(result, indent=2, default=str))
+    else:
+        _print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
 import os
 import sys
 import csv
+import time
+import argparse
+import itertools
+import tempfile
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import mysql.connector
 from dotenv import load_dotenv
 
@@ -44,8 +51,23 @@ def _clean_val(v):
             return v
 
 
-def load_csv_to_table(csv_path, table_name, column_order=None, dedupe_key=None, id_map=None, id_map_col=None, unique_cols=None, conn=None):
-    rows = []
+# ---------------------------------------------------------
+# Streaming load settings (overridable from .env or the command line)
+# ---------------------------------------------------------
+LOAD_CONFIG = {
+    # "insert": chunked multi-row INSERTs, "infile": LOAD DATA LOCAL INFILE
+    "mode": os.getenv("LOAD_MODE", "insert"),
+    # rows per INSERT statement
+    "batch_size": int(os.getenv("LOAD_BATCH_SIZE", "1000")),
+    # rows written between two commits
+    "commit_every": int(os.getenv("LOAD_COMMIT_EVERY", "50000")),
+    # recently seen unique keys remembered for dedupe (the UNIQUE index catches the rest)
+    "dedupe_window": int(os.getenv("LOAD_DEDUPE_WINDOW", "100000")),
+}
+
+
+def _read_csv_rows(csv_path, column_order=None, id_map=None, id_map_col=None):
+    """Yield cleaned row dicts one at a time instead of reading the whole file."""
     with open(csv_path, newline='', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for r in reader:
@@ -63,137 +85,537 @@ def load_csv_to_table(csv_path, table_name, column_order=None, dedupe_key=None,
                 original = filtered.get(id_map_col)
                 if original in id_map:
                     filtered[id_map_col] = id_map[original]
-            rows.append(filtered)
+            yield filtered
 
-    if not rows:
-        print(f"No rows found in {csv_path}")
-        return {}
+
+def _dedupe_by_key(rows, dedupe_key, id_col, id_mapping_result):
+    """
+    Drop rows whose `dedupe_key` was already seen (indicator detail tables),
+    recording old id -> canonical id in `id_mapping_result`. Memory grows with
+    the number of distinct keys, i.e. the number of indicators, not data rows.
+    """
+    seen = {}
+    for r in rows:
+        val = r.get(dedupe_key)
+        rid = r.get(id_col) if id_col else None
+        if val in seen:
+            canonical = seen[val]
+            if rid is not None:
+                id_mapping_result[rid] = canonical
+            continue
+        seen[val] = rid
+        yield r
+
+
+def _dedupe_recent(rows, unique_cols, window):
+    """
+    Drop rows whose unique key was seen among the last `window` keys.
+
+    Duplicates in the WDI dumps are almost always close together, so a bounded
+    LRU of recent keys filters them without holding every key in memory; the
+    table's UNIQUE index (with IGNORE / ON DUPLICATE KEY) catches the rest.
+    """
+    recent = OrderedDict()
+    for r in rows:
+        key = tuple(r.get(c) for c in unique_cols)
+        if key in recent:
+            recent.move_to_end(key)
+            continue
+        recent[key] = None
+        if len(recent) > window:
+            recent.popitem(last=False)
+        yield r
+
+
+def _chunks(rows, size):
+    chunk = []
+    for r in rows:
+        chunk.append(r)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert_chunks(conn, table_name, cols, rows, unique_cols, batch_size, commit_every, update_cols=None):
+    """
+    Write rows with multi-row INSERT statements; returns the affected row count.
+    With `update_cols`, rows whose key already exists are updated (upsert).
+    """
+    cols_sql = ', '.join(cols)
+    row_placeholders = '(' + ', '.join(['%s'] * len(cols)) + ')'
+    if update_cols:
+        on_dup = " ON DUPLICATE KEY UPDATE " + ', '.join(f"{c} = VALUES({c})" for c in update_cols)
+    elif unique_cols:
+        # keep the first occurrence on duplicate keys, like the in-memory dedupe did
+        on_dup = f" ON DUPLICATE KEY UPDATE {cols[0]} = {cols[0]}"
+    else:
+        on_dup = ""
+
+    written = 0
+    since_commit = 0
+    cur = conn.cursor()
+    try:
+        for chunk in _chunks(rows, batch_size):
+            sql = (f"INSERT INTO {table_name} ({cols_sql}) VALUES "
+                   + ', '.join([row_placeholders] * len(chunk)) + on_dup)
+            params = [r.get(c) for r in chunk for c in cols]
+            cur.execute(sql, params)
+            written += cur.rowcount if cur.rowcount and cur.rowcount > 0 else 0
+            since_commit += len(chunk)
+            if since_commit >= commit_every:
+                conn.commit()
+                since_commit = 0
+        conn.commit()
+    finally:
+        cur.close()
+    return written
+
+
+def _tsv_field(v):
+    if v is None:
+        return '\\N'
+    return (str(v).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _load_data_chunks(conn, table_name, cols, rows, unique_cols, commit_every):
+    """
+    Spool rows to a temporary tab-separated file and bulk load it with
+    LOAD DATA LOCAL INFILE, one file and one commit per `commit_every` rows.
+    """
+    cols_sql = ', '.join(cols)
+    ignore = " IGNORE" if unique_cols else ""
+    written = 0
+    cur = conn.cursor()
+    try:
+        for chunk in _chunks(rows, commit_every):
+            fd, tmp_path = tempfile.mkstemp(suffix='.tsv')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8', newline='') as tmp:
+                    for r in chunk:
+                        tmp.write('\t'.join(_tsv_field(r.get(c)) for c in cols) + '\n')
+                cur.execute(
+                    f"LOAD DATA LOCAL INFILE %s{ignore} INTO TABLE {table_name} "
+                    "CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+                    f"LINES TERMINATED BY '\\n' ({cols_sql})",
+                    (tmp_path,),
+                )
+                written += cur.rowcount if cur.rowcount and cur.rowcount > 0 else 0
+                conn.commit()
+            finally:
+                os.remove(tmp_path)
+    finally:
+        cur.close()
+    return written
+
+
+# ---------------------------------------------------------
+# Incremental (delta) loading
+# ---------------------------------------------------------
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def last_loaded_hash(conn, file_name):
+    """Hash recorded by the latest load of `file_name`, or None."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT file_hash FROM load_manifest WHERE file_name = %s ORDER BY manifest_id DESC LIMIT 1",
+            (file_name,),
+        )
+        row = cur.fetchone()
+    finally:
+        cur.close()
+    return row[0] if row else None
+
+
+def record_manifest(conn, file_name, table_name, file_hash, load_mode, stats):
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            INSERT INTO load_manifest
+                (file_name, table_name, file_hash, load_mode, rows_in_file, rows_inserted, rows_updated, rows_deleted)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            (file_name, table_name, file_hash, load_mode, stats.get("rows_in_file", 0),
+             stats.get("inserted", 0), stats.get("updated", 0), stats.get("deleted", 0)),
+        )
+        conn.commit()
+    finally:
+        cur.close()
+
+
+def _count_rows(rows, counter):
+    for r in rows:
+        counter[0] += 1
+        yield r
+
+
+def _table_count(cur, table_name):
+    cur.execute(f"SELECT COUNT(*) FROM {table_name}")
+    return cur.fetchone()[0]
+
+
+def _apply_fact_delta(conn, table_name, cols, rows, unique_cols, batch_size, commit_every, delete_missing):
+    """
+    Stage the file in a temporary copy of the table, then apply only the
+    difference against the live rows matched on `unique_cols`
+    (country_id, <indicator>, year): changed values are updated, new keys
+    inserted and, with `delete_missing`, keys absent from the file deleted.
+    """
+    stage = f"_stage_{table_name}"
+    join = ' AND '.join(f"t.{c} = s.{c}" for c in unique_cols)
+    value_cols = [c for c in cols if c not in unique_cols]
+    cur = conn.cursor()
+    try:
+        cur.execute(f"DROP TEMPORARY TABLE IF EXISTS {stage}")
+        cur.execute(f"CREATE TEMPORARY TABLE {stage} LIKE {table_name}")
+        _insert_chunks(conn, stage, cols, rows, unique_cols, batch_size, commit_every)
+
+        updated = 0
+        if value_cols:
+            cur.execute(
+                f"UPDATE {table_name} t JOIN {stage} s ON {join} "
+                f"SET " + ', '.join(f"t.{c} = s.{c}" for c in value_cols) + " "
+                f"WHERE " + ' OR '.join(f"NOT (t.{c} <=> s.{c})" for c in value_cols)
+            )
+            updated = cur.rowcount
+        cur.execute(
+            f"INSERT INTO {table_name} ({', '.join(cols)}) "
+            f"SELECT {', '.join('s.' + c for c in cols)} FROM {stage} s "
+            f"LEFT JOIN {table_name} t ON {join} WHERE t.{unique_cols[0]} IS NULL"
+        )
+        inserted = cur.rowcount
+        deleted = 0
+        if delete_missing:
+            cur.execute(
+                f"DELETE t FROM {table_name} t LEFT JOIN {stage} s ON {join} WHERE s.{unique_cols[0]} IS NULL"
+            )
+            deleted = cur.rowcount
+        conn.commit()
+        cur.execute(f"DROP TEMPORARY TABLE IF EXISTS {stage}")
+    finally:
+        cur.close()
+    return inserted, updated, deleted
+
+
+def _apply_dimension_upsert(conn, table_name, cols, rows, batch_size, commit_every):
+    """
+    Upsert countries / indicator details on their primary key (first column).
+    Rows missing from the file are kept: deleting them would cascade to facts.
+    """
+    cur = conn.cursor()
+    try:
+        before = _table_count(cur, table_name)
+        affected = _insert_chunks(conn, table_name, cols, rows, None, batch_size, commit_every,
+                                  update_cols=cols[1:] or cols[:1])
+        inserted = _table_count(cur, table_name) - before
+    finally:
+        cur.close()
+    # MySQL reports 1 per inserted row and 2 per updated row
+    return inserted, max(0, (affected - inserted) // 2), 0
+
+
+def load_csv_to_table(csv_path, table_name, column_order=None, dedupe_key=None, id_map=None, id_map_col=None,
+                      unique_cols=None, conn=None, mode=None, batch_size=None, commit_every=None, stats=None,
+                      incremental=False, delete_missing=True):
+    """
+    Stream `csv_path` into `table_name` in constant memory.
+
+    Rows are parsed one at a time, deduplicated on the fly and written in
+    batches (multi-row INSERTs or LOAD DATA LOCAL INFILE), committing every
+    `commit_every` rows. Returns the old id -> canonical id mapping produced
+    by `dedupe_key` (empty for data tables). When a `stats` dict is given it
+    receives the rows read/written/inserted/updated/deleted and the elapsed seconds.
+
+    With `incremental=True` the table is not truncated: only the difference
+    against the existing rows is applied (see _apply_fact_delta).
+    """
+    if conn is None:
+        raise RuntimeError("Database connection (conn) must be provided to load_csv_to_table")
+    mode = mode or LOAD_CONFIG["mode"]
+    batch_size = max(1, batch_size or LOAD_CONFIG["batch_size"])
+    commit_every = max(batch_size, commit_every or LOAD_CONFIG["commit_every"])
+
+    read_counter = [0]
+    rows = _count_rows(_read_csv_rows(csv_path, column_order, id_map, id_map_col), read_counter)
 
     # optionally deduplicate rows by a key (useful for indicator detail tables)
     id_mapping_result = {}
     if dedupe_key:
-        seen = {}
-        deduped = []
         id_col = column_order[0] if column_order else None
-        for r in rows:
-            val = r.get(dedupe_key)
-            rid = r.get(id_col) if id_col else None
-            if val in seen:
-                canonical = seen[val]
-                if rid is not None:
-                    id_mapping_result[rid] = canonical
-                continue
-            seen[val] = rid
-            deduped.append(r)
-        rows = deduped
+        rows = _dedupe_by_key(rows, dedupe_key, id_col, id_mapping_result)
 
     # optionally deduplicate data rows by unique columns (prevent UNIQUE constraint errors)
     if unique_cols:
-        seen_keys = set()
-        filtered_rows = []
-        for r in rows:
-            key = tuple(r.get(c) for c in unique_cols)
-            if key in seen_keys:
-                continue
-            seen_keys.add(key)
-            filtered_rows.append(r)
-        rows = filtered_rows
-
-    cols = list(rows[0].keys())
-    cols_sql = ', '.join(cols)
-    placeholders = ', '.join(['%s'] * len(cols))
-    insert_sql = f"INSERT INTO {table_name} ({cols_sql}) VALUES ({placeholders})"
+        rows = _dedupe_recent(rows, unique_cols, LOAD_CONFIG["dedupe_window"])
 
-    if conn is None:
-        raise RuntimeError("Database connection (conn) must be provided to load_csv_to_table")
+    # peek at the first row to learn the column list
+    first = next(rows, None)
+    if first is None:
+        print(f"No rows found in {csv_path}")
+        return {}
+    cols = list(first.keys())
+    rows = itertools.chain([first], rows)
 
-    cur = conn.cursor()
-    try:
+    started = time.monotonic()
+    if incremental:
+        if unique_cols:
+            inserted, updated, deleted = _apply_fact_delta(
+                conn, table_name, cols, rows, unique_cols, batch_size, commit_every, delete_missing)
+        else:
+            inserted, updated, deleted = _apply_dimension_upsert(
+                conn, table_name, cols, rows, batch_size, commit_every)
+        written = inserted + updated + deleted
+        elapsed = time.monotonic() - started
+        print(f"Applied delta to {table_name} from {csv_path}: +{inserted} ~{updated} -{deleted} ({elapsed:.1f}s)")
+    else:
+        cur = conn.cursor()
         try:
-            cur.execute(f"TRUNCATE TABLE {table_name};")
-        except Exception:
-            pass
+            try:
+                cur.execute(f"TRUNCATE TABLE {table_name};")
+            except Exception:
+                pass
+        finally:
+            cur.close()
 
-        data_tuples = [tuple(r.get(c) for c in cols) for r in rows]
-        if data_tuples:
-            cur.executemany(insert_sql, data_tuples)
-            conn.commit()
-    finally:
-        cur.close()
+        if mode == "infile":
+            written = _load_data_chunks(conn, table_name, cols, rows, unique_cols, commit_every)
+        else:
+            written = _insert_chunks(conn, table_name, cols, rows, unique_cols, batch_size, commit_every)
+        inserted, updated, deleted = written, 0, 0
+        elapsed = time.monotonic() - started
+        print(f"Loaded {written} rows into {table_name} from {csv_path} ({mode}, {elapsed:.1f}s)")
 
-    print(f"Loaded {len(rows)} rows into {table_name} from {csv_path}")
+    if stats is not None:
+        stats.update(rows=written, seconds=elapsed, rows_in_file=read_counter[0],
+                     inserted=inserted, updated=updated, deleted=deleted)
     return id_mapping_result
 
 
-def main():
-    # create/drop DB and schema
-    try:
-        # import locally to avoid circular at module import
-        from App.db_setup import setup_nuclear
-        setup_nuclear()
-    except Exception as e:
-        print(f"Warning: could not run setup_nuclear(): {e}")
-
-    # open a DB connection and disable foreign key checks for the duration of the bulk load
-    conn = mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME, port=DB_PORT)
+# ---------------------------------------------------------
+# What to load, and in which order
+# ---------------------------------------------------------
+# mapping: csv filename -> (table_name, column_order, dedupe_key, unique_cols)
+CSV_MAPPING = {
+    'countries.csv': ('countries', ['country_id', 'country_name', 'country_code', 'region'], None, None),
+    'energy_indicator_details.csv': ('energy_indicator_details', ['energy_indicator_id', 'indicator_name', 'indicator_code', 'indicator_description', 'measurement_unit'], 'indicator_code', None),
+    'energy_data.csv': ('energy_data', ['country_id', 'energy_indicator_id', 'year', 'indicator_value', 'data_source'], None, ['country_id', 'energy_indicator_id', 'year']),
+    'freshwater_indicators.csv': ('freshwater_indicator_details', ['freshwater_indicator_id', 'indicator_name', 'description', 'unit_of_measure'], None, None),
+    'freshwater_data.csv': ('freshwater_data', ['country_id', 'freshwater_indicator_id', 'indicator_value', 'year', 'source_notes'], None, ['country_id', 'freshwater_indicator_id', 'year']),
+    'ghg_indicator_details.csv': ('ghg_indicator_details', ['ghg_indicator_id', 'indicator_name', 'indicator_description', 'unit_symbol'], None, None),
+    'greenhouse_emissions.csv': ('greenhouse_emissions', ['country_id', 'ghg_indicator_id', 'indicator_value', 'share_of_total_pct', 'uncertainty_pct', 'year', 'source_notes'], None, ['country_id', 'ghg_indicator_id', 'year']),
+    'health_indicator_details.csv': ('health_indicator_details', ['health_indicator_id', 'indicator_name', 'indicator_description', 'unit_symbol'], None, None),
+    'health_system.csv': ('health_system', ['country_id', 'health_indicator_id', 'indicator_value', 'year', 'source_notes'], None, ['country_id', 'health_indicator_id', 'year']),
+    'sustainability_indicator_details.csv': ('sustainability_indicator_details', ['sus_indicator_id', 'indicator_name', 'indicator_code', 'indicator_description', 'unit_symbol'], None, None),
+    'sustainability_data.csv': ('sustainability_data', ['country_id', 'sus_indicator_id', 'year', 'indicator_value', 'source_note'], None, ['country_id', 'sus_indicator_id', 'year']),
+}
+
+# countries is loaded first (every fact table references it); after that each
+# domain is an independent group whose detail table must precede its fact
+# table, so the groups are loaded concurrently.
+FIRST_GROUP = ['countries.csv']
+DOMAIN_GROUPS = [
+    ['energy_indicator_details.csv', 'energy_data.csv'],
+    ['freshwater_indicators.csv', 'freshwater_data.csv'],
+    ['ghg_indicator_details.csv', 'greenhouse_emissions.csv'],
+    ['health_indicator_details.csv', 'health_system.csv'],
+    ['sustainability_indicator_details.csv', 'sustainability_data.csv'],
+]
+
+
+def _connect(mode):
+    """Open a loader connection with foreign key checks disabled for the bulk load."""
+    conn = mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME, port=DB_PORT,
+                                   allow_local_infile=(mode == "infile"))
     cur = conn.cursor()
     try:
         cur.execute("SET FOREIGN_KEY_CHECKS=0;")
     finally:
         cur.close()
+    return conn
 
-    # mapping: csv filename -> (table_name, column_order)
-    mapping = {
-        'countries.csv': ('countries', ['country_id', 'country_name', 'country_code', 'region'], None, None),
-        'energy_indicator_details.csv': ('energy_indicator_details', ['energy_indicator_id', 'indicator_name', 'indicator_code', 'indicator_description', 'measurement_unit'], 'indicator_code', None),
-        'energy_data.csv': ('energy_data', ['country_id', 'energy_indicator_id', 'year', 'indicator_value', 'data_source'], None, ['country_id', 'energy_indicator_id', 'year']),
-        'freshwater_indicators.csv': ('freshwater_indicator_details', ['freshwater_indicator_id', 'indicator_name', 'description', 'unit_of_measure'], None, None),
-        'freshwater_data.csv': ('freshwater_data', ['country_id', 'freshwater_indicator_id', 'indicator_value', 'year', 'source_notes'], None, ['country_id', 'freshwater_indicator_id', 'year']),
-        'ghg_indicator_details.csv': ('ghg_indicator_details', ['ghg_indicator_id', 'indicator_name', 'indicator_description', 'unit_symbol'], None, None),
-        'greenhouse_emissions.csv': ('greenhouse_emissions', ['country_id', 'ghg_indicator_id', 'indicator_value', 'share_of_total_pct', 'uncertainty_pct', 'year', 'source_notes'], None, ['country_id', 'ghg_indicator_id', 'year']),
-        'health_indicator_details.csv': ('health_indicator_details', ['health_indicator_id', 'indicator_name', 'indicator_description', 'unit_symbol'], None, None),
-        'health_system.csv': ('health_system', ['country_id', 'health_indicator_id', 'indicator_value', 'year', 'source_notes'], None, ['country_id', 'health_indicator_id', 'year']),
-        'sustainability_indicator_details.csv': ('sustainability_indicator_details', ['sus_indicator_id', 'indicator_name', 'indicator_code', 'indicator_description', 'unit_symbol'], None, None),
-        'sustainability_data.csv': ('sustainability_data', ['country_id', 'sus_indicator_id', 'year', 'indicator_value', 'source_note'], None, ['country_id', 'sus_indicator_id', 'year']),
-    }
 
-    # global mapping of old indicator ids -> canonical ids per id column name
-    global_id_map = {}
+def _load_group(fnames, conn, incremental=False, delete_missing=True):
+    """
+    Load the CSVs of one group in order on `conn`.
 
-    for fname, (table, cols, *extra) in mapping.items():
+    Returns (id_maps, stats): the old id -> canonical id mappings produced by
+    the group's detail tables, keyed by id column, and one timing entry per table.
+    In incremental mode files whose hash matches the last manifest entry are skipped.
+    """
+    id_maps = {}
+    report = []
+    for fname in fnames:
+        table, cols, dedupe_key, unique_cols = CSV_MAPPING[fname]
         csv_path = os.path.join(DATA_DIR, fname)
         if not os.path.exists(csv_path):
             print(f"CSV not found: {csv_path}, skipping {table}")
             continue
-        # some CSV headers use slightly different names; try to standardize keys
-        # For freshwater_data and health_system consistency, our load function maps by header names.
-        dedupe_key = extra[0] if extra else None
-        unique_cols = extra[1] if len(extra) > 1 else None
-        # determine if we need to pass an id_map for remapping referenced ids
-        id_map = None
-        id_map_col = None
-        # if this table is a detail table and returns mappings, capture them
+        stats = {"table": table, "rows": 0, "seconds": 0.0}
+        file_hash = file_sha256(csv_path)
+        if incremental and last_loaded_hash(conn, fname) == file_hash:
+            print(f"Unchanged since last load: {fname}, skipping {table}")
+            if dedupe_key:
+                # the fact table of this group may still need the id remapping
+                res = {}
+                for _ in _dedupe_by_key(_read_csv_rows(csv_path, cols), dedupe_key, cols[0], res):
+                    pass
+                if res:
+                    id_maps[cols[0]] = res
+            stats["skipped"] = True
+            report.append(stats)
+            continue
+        load_kwargs = dict(unique_cols=unique_cols, conn=conn, stats=stats,
+                           incremental=incremental, delete_missing=delete_missing)
         if dedupe_key:
-            res = load_csv_to_table(csv_path, table, column_order=cols, dedupe_key=dedupe_key, unique_cols=unique_cols, conn=conn)
-            # res maps old_id -> canonical_id for this detail table
+            res = load_csv_to_table(csv_path, table, column_order=cols, dedupe_key=dedupe_key, **load_kwargs)
+            # res maps old_id -> canonical_id for this detail table, keyed by its id column (first column)
             if res:
-                # store mapping keyed by its id column name (first column)
-                id_col = cols[0]
-                global_id_map[id_col] = res
+                id_maps[cols[0]] = res
         else:
-            # for data tables that reference an id column, attempt to remap using global_id_map
-            # pick potential id column names from cols to see if any mapping exists
+            # for data tables that reference a remapped id column, pass the mapping along
+            id_map = None
+            id_map_col = None
             for possible_id_col in cols:
-                if possible_id_col in global_id_map:
-                    id_map = global_id_map[possible_id_col]
+                if possible_id_col in id_maps:
+                    id_map = id_maps[possible_id_col]
                     id_map_col = possible_id_col
                     break
-            load_csv_to_table(csv_path, table, column_order=cols, id_map=id_map, id_map_col=id_map_col, unique_cols=unique_cols, conn=conn)
+            load_csv_to_table(csv_path, table, column_order=cols, id_map=id_map, id_map_col=id_map_col,
+                              **load_kwargs)
+        record_manifest(conn, fname, table, file_hash, "incremental" if incremental else LOAD_CONFIG["mode"], stats)
+        report.append(stats)
+    return id_maps, report
+
+
+def _run_group(fnames, mode, incremental=False, delete_missing=True):
+    """Worker entry point: one connection per group."""
+    conn = _connect(mode)
+    try:
+        return _load_group(fnames, conn, incremental, delete_missing)
+    finally:
+        conn.close()
+
+
+def _print_report(report, total_seconds):
+    print("\nTable                               Rows    Seconds     Rows/s")
+    for st in report:
+        if st.get("skipped"):
+            print(f"{st['table']:<32} {'unchanged':>8}")
+            continue
+        rate = st["rows"] / st["seconds"] if st["seconds"] else 0.0
+        print(f"{st['table']:<32} {st['rows']:>8} {st['seconds']:>10.2f} {rate:>10.0f}")
+    total_rows = sum(st["rows"] for st in report)
+    rate = total_rows / total_seconds if total_seconds else 0.0
+    print(f"{'TOTAL (wall clock)':<32} {total_rows:>8} {total_seconds:>10.2f} {rate:>10.0f}\n")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load the bundled WDI CSV files into MySQL.")
+    parser.add_argument("--mode", choices=["insert", "infile"], default=LOAD_CONFIG["mode"],
+                        help="multi-row INSERTs (default) or LOAD DATA LOCAL INFILE")
+    parser.add_argument("--batch-size", type=int, default=LOAD_CONFIG["batch_size"],
+                        help="rows per INSERT statement")
+    parser.add_argument("--commit-every", type=int, default=LOAD_CONFIG["commit_every"],
+                        help="rows written between commits")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("LOAD_WORKERS", "5")),
+                        help="domain groups loaded concurrently (1 = sequential)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="keep the database and apply only changes from CSVs that changed since the last load")
+    parser.add_argument("--keep-missing", action="store_true",
+                        help="with --incremental, keep data rows that are no longer in the CSV")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    LOAD_CONFIG.update(mode=args.mode, batch_size=args.batch_size, commit_every=args.commit_every)
+
+    if not args.incremental:
+        # create/drop DB and schema
+        try:
+            # import locally to avoid circular at module import
+            from App.db_setup import setup_nuclear
+            setup_nuclear()
+        except Exception as e:
+            print(f"Warning: could not run setup_nuclear(): {e}")
+
+    started = time.monotonic()
+
+    # global mapping of old indicator ids -> canonical ids per id column name
+    global_id_map = {}
+    report = []
+
+    # countries first, on the main connection
+    conn = _connect(args.mode)
+    if args.incremental:
+        # keep existing data; only add tables the database does not have yet
+        from App.db_setup import ensure_schema
+        ensure_schema(conn)
+        with conn.cursor() as cur:
+            cur.execute("SET FOREIGN_KEY_CHECKS=0;")
+    id_maps, group_report = _load_group(FIRST_GROUP, conn, args.incremental, not args.keep_missing)
+    global_id_map.update(id_maps)
+    report.extend(group_report)
+
+    # ISO2 codes used by the country resolver (adds the column to older databases)
+    from App.country_resolver import ensure_iso2_column
+    ensure_iso2_column(conn)
+
+    # monthly audit_logs partitions and retention (converts older databases)
+    from App.audit_partitions import maintain_audit_partitions
+    maintain_audit_partitions(conn)
+
+    # then the independent domain groups, one connection per worker
+    workers = max(1, min(args.workers, len(DOMAIN_GROUPS)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_run_group, group, args.mode, args.incremental, not args.keep_missing)
+            for group in DOMAIN_GROUPS
+        ]
+        for future in futures:
+            id_maps, group_report = future.result()
+            global_id_map.update(id_maps)
+            report.extend(group_report)
+
+    _print_report(report, time.monotonic() - started)
+    for id_col, id_map in global_id_map.items():
+        print(f"Remapped {len(id_map)} duplicate {id_col} values to their canonical ids")
 
     # re-enable foreign key checks after loading
     with conn.cursor() as cur:
         cur.execute("SET FOREIGN_KEY_CHECKS=1;")
     conn.commit()
+
+    if report and all(st.get("skipped") for st in report):
+        print("No CSV changed since the last load; summaries left as they are")
+        conn.close()
+        return
+
+    # rebuild the per-country data availability summary
+    from App.coverage import rebuild_country_coverage
+    from App.snapshots import rebuild_snapshot_rankings
+    rebuild_country_coverage(conn)
+    print("Rebuilt country_data_coverage and domain_coverage_stats")
+    rebuild_snapshot_rankings(conn)
+    print("Rebuilt snapshot ranking tables")
+
+    # invalidate cached results and ETags of the tables that changed (reaches
+    # the running app only through a shared QUERY_CACHE_URL backend)
+    from App.cache import bump_table_versions
+    from App.snapshots import SNAPSHOT_TABLES
+    changed = [st["table"] for st in report if not st.get("skipped")]
+    bump_table_versions(*changed, "country_data_coverage", "domain_coverage_stats", *SNAPSHOT_TABLES.values())
+
     conn.close()
 
 
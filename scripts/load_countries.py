@@ -1,10 +1,16 @@
 import os
+import sys
 import csv
 import mysql.connector
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# ensure repository root is on sys.path so `from App ...` imports work
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
 DB_USER = os.getenv("DB_USER", "root")
 DB_PASS = os.getenv("DB_PASSWORD", "db_pass")
 DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -41,6 +47,10 @@ def load():
         finally:
             cur.close()
         conn.commit()
+
+        # ISO2 codes used by the country resolver (adds the column to older databases)
+        from App.country_resolver import ensure_iso2_column
+        ensure_iso2_column(conn)
     finally:
         conn.close()
 